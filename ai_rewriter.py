@@ -1,92 +1,58 @@
-import psycopg2
-import openai
+import asyncio
 import os
+import time
 from datetime import datetime
+from psycopg2.extras import execute_values
+from chunking import CHUNK_TOKENS, MAX_OUTPUT_TOKENS, MIN_OUTPUT_TOKENS, OUTPUT_RATIO, output_budget, plan_chunks
+from database import db_connection
+from events import notify_changed
+from llm_client import Completion, LLMClient
+import rewrite_cache
+from select_articles import mark_selected
 
 # Load API key from environment variable
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise ValueError("❌ OpenAI API key is missing. Please set the OPENAI_API_KEY environment variable.")
 
-# Database connection settings (securely using environment variables)
-DB_SETTINGS = {
-    "dbname": os.getenv("DB_NAME", "news_platform"),
-    "user": os.getenv("DB_USER", "news_admin"),
-    "password": os.getenv("DB_PASSWORD"),
-    "host": os.getenv("DB_HOST", "localhost")
-}
+def complete_rewrites(conn, rewrites):
+    """Stores (article_id, Completion) pairs and marks their articles 'completed'; the caller commits once.
 
-def save_to_database(original_article_id, rewritten_text):
-    """Saves the rewritten article to PostgreSQL."""
-    try:
-        conn = psycopg2.connect(**DB_SETTINGS)
-        cursor = conn.cursor()
-
-        query = """
-        INSERT INTO rewritten_articles (original_article_id, rewritten_content, editor_approved, created_at)
-        VALUES (%s, %s, %s, %s)
-        """
-        cursor.execute(query, (original_article_id, rewritten_text, False, datetime.now()))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-        print(f"✅ Successfully saved article {original_article_id} to database.")
-    except Exception as e:
-        print(f"❌ Database error: {e}")
-
-def update_article_status_to_rewritten(original_article_id):
-    """Updates the rewrite_status of the article to 'rewritten' in the database."""
-    try:
-        conn = psycopg2.connect(**DB_SETTINGS)
-        cursor = conn.cursor()
-
-        query = """
-        UPDATE articles
-        SET rewrite_status = %s
-        WHERE id = %s
-        """
-        cursor.execute(query, ('rewritten', original_article_id))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-        print(f"✅ Article {original_article_id} status updated to 'rewritten'.")
-    except Exception as e:
-        print(f"❌ Failed to update article status: {e}")
+    A repeated rewrite replaces the stored text (and resets editor approval) instead of adding a row.
+    """
+    if not rewrites:
+        return
+    cursor = conn.cursor()
+    execute_values(cursor, """
+        INSERT INTO rewritten_articles (original_article_id, rewritten_content, editor_approved, created_at,
+                                        model, prompt_tokens, completion_tokens, latency_ms)
+        VALUES %s
+        ON CONFLICT (original_article_id) DO UPDATE
+        SET rewritten_content = EXCLUDED.rewritten_content, editor_approved = false, created_at = EXCLUDED.created_at,
+            model = EXCLUDED.model, prompt_tokens = EXCLUDED.prompt_tokens,
+            completion_tokens = EXCLUDED.completion_tokens, latency_ms = EXCLUDED.latency_ms
+    """, [(article_id, completion.text, False, datetime.now(), completion.model, completion.prompt_tokens,
+           completion.completion_tokens, round(completion.latency_ms)) for article_id, completion in rewrites])
+    cursor.execute("UPDATE articles SET rewrite_status = 'completed' WHERE id = ANY(%s)",
+                   ([article_id for article_id, _ in rewrites],))
+    # Already-completed articles get new text without a status change, so announce it explicitly
+    notify_changed(cursor, [article_id for article_id, _ in rewrites])
+    cursor.close()
 
 def select_articles(article_id):
-    """Allows user to manually select which articles should be rewritten and updates their status."""
+    """Selects one article for rewriting (not_selected -> pending) and queues its rewrite job."""
     try:
-        conn = psycopg2.connect(**DB_SETTINGS)
-        cursor = conn.cursor()
-
-        # Update the article status to 'selected_for_rewriting'
-        query = """
-        UPDATE articles
-        SET rewrite_status = %s
-        WHERE id = %s
-        """
-        cursor.execute(query, ('selected_for_rewriting', article_id))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-        print(f"✅ Article {article_id} selected for rewriting.")
-
+        if mark_selected([article_id]):
+            print(f"✅ Article {article_id} selected for rewriting.")
+        else:
+            print(f"⚠️ Article {article_id} is missing, a near-duplicate or not in 'not_selected'")
     except Exception as e:
         print(f"❌ Failed to select article {article_id}: {e}")
 
-def rewrite_article(original_article_id, article_text):
-    """Rewrites the article using OpenAI's GPT-4 and saves it to the database."""
+SYSTEM_PROMPT = "Sinä olet kokenut suomalainen toimittaja, joka kirjoittaa kansallismielisestä ja taloudellisesti konservatiivisesta näkökulmasta. Uutiset on kirjoitettava selkeästi, loogisesti ja asiapohjaisesti."
+TEMPERATURE = 0.3
 
-    if not OPENAI_API_KEY:
-        return "⚠️ OpenAI API key is missing."
-
-    client = openai.OpenAI(api_key=OPENAI_API_KEY)
-
-    prompt = f"""
+PROMPT_TEMPLATE = """
     Kirjoita tämä uutinen täysin uudelleen kansallismielisestä ja taloudellisesti konservatiivisesta näkökulmasta.
     - Älä kopioi alkuperäistä uutista, vaan muokkaa se uusiksi täysin uudella rakenteella.
     - Korosta Suomen omavaraisuutta, taloudellista riippumattomuutta ja kansallista etua.
@@ -100,23 +66,120 @@ def rewrite_article(original_article_id, article_text):
     ✍️ **Uudelleenkirjoitettu uutinen:**
     """
 
+# Prepended to the prompt when a long article is rewritten in parts
+CHUNK_NOTE = """
+    Tämä on osa {part}/{parts} pitkästä uutisesta. Osat kirjoitetaan uudelleen erikseen ja liitetään yhteen,
+    joten kirjoita vain tämän osan sisältö: ei otsikkoa, johdantoa eikä yhteenvetoa.
+    """
+LEDE_NOTE = """
+    Uutisen alku taustaksi (älä kirjoita sitä uudelleen): {lede}
+    """
+# Settings besides the prompt, model and temperature that change a rewrite, so they are part of its cache key
+REWRITE_SETTINGS = {"chunk_tokens": CHUNK_TOKENS, "output_ratio": OUTPUT_RATIO,
+                    "min_output_tokens": MIN_OUTPUT_TOKENS, "max_output_tokens": MAX_OUTPUT_TOKENS}
+
+def build_messages(article_text, part=1, parts=1, lede=None):
+    """Builds the chat messages for rewriting one article, or one part of a chunked article."""
+    content = PROMPT_TEMPLATE.format(article_text=article_text)
+    if parts > 1:
+        content = CHUNK_NOTE.format(part=part, parts=parts) + (LEDE_NOTE.format(lede=lede) if lede and part > 1 else "") + content
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": content}]
+
+async def complete_chunk(llm, messages, budget):
+    """Runs one rewrite request; a reply cut off at max_tokens is retried once with double the budget, then rejected."""
+    completion = await llm.complete(messages, max_tokens=budget, temperature=TEMPERATURE)
+    if completion.finish_reason == "length" and budget < MAX_OUTPUT_TOKENS:
+        budget = min(budget * 2, MAX_OUTPUT_TOKENS)
+        print(f"✂️ Rewrite hit max_tokens; retrying with max_tokens={budget}")
+        completion = await llm.complete(messages, max_tokens=budget, temperature=TEMPERATURE)
+    if completion.finish_reason == "length":
+        raise RuntimeError(f"Rewrite was truncated at max_tokens={budget}")
+    return completion
+
+async def complete_rewrite(llm, article_text):
+    """Rewrites an article in paragraph-aligned chunks sized by token count, concurrently on the shared client.
+
+    Each chunk gets an output budget sized to its input; the parts are joined in order into
+    one Completion carrying the summed token counts and the wall-clock latency.
+    """
+    chunks = plan_chunks(article_text, llm.model)
+    if len(chunks) == 1:
+        return await complete_chunk(llm, build_messages(article_text), output_budget(chunks[0][1]))
+
+    lede = chunks[0][0].split("\n")[0]
+    started = time.perf_counter()
+    # A failed chunk fails the whole rewrite, so the other chunks are cancelled instead of spending tokens
+    tasks = [asyncio.ensure_future(complete_chunk(llm, build_messages(text, part, len(chunks), lede), output_budget(tokens)))
+             for part, (text, tokens) in enumerate(chunks, start=1)]
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "system", "content": "Sinä olet kokenut suomalainen toimittaja, joka kirjoittaa kansallismielisestä ja taloudellisesti konservatiivisesta näkökulmasta. Uutiset on kirjoitettava selkeästi, loogisesti ja asiapohjaisesti."},
-                      {"role": "user", "content": prompt}],
-            max_tokens=700,
-            temperature=0.3
-        )
-
-        rewritten_text = response.choices[0].message.content.strip()
-        print(f"🔹 AI Output for article {original_article_id}: {rewritten_text[:100]}...")  # Print first 100 chars
-        
-        save_to_database(original_article_id, rewritten_text)
-        update_article_status_to_rewritten(original_article_id)
-        
-        return rewritten_text
+        completions = await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return Completion("\n\n".join(completion.text for completion in completions), completions[0].model,
+                      sum(completion.prompt_tokens for completion in completions),
+                      sum(completion.completion_tokens for completion in completions),
+                      (time.perf_counter() - started) * 1000, "stop", max(completion.attempts for completion in completions))
+
+def cached_rewrite(key):
+    """Returns a cached rewrite as a zero-cost Completion, or None on a miss."""
+    started = time.perf_counter()
+    with db_connection() as conn:
+        row = rewrite_cache.lookup(conn, key)
+    if row is None:
+        return None
+    text, model = row
+    return Completion(text, model, 0, 0, (time.perf_counter() - started) * 1000, "stop", 0, cached=True)
 
-    except Exception as e:
-        print(f"❌ OpenAI API error: {e}")
+def cache_rewrite(key, completion):
+    with db_connection() as conn:
+        rewrite_cache.store(conn, key, completion)
+
+async def rewrite_article_async(original_article_id, article_text, llm):
+    """Rewrites the article on the shared LLMClient; returns the Completion, or None on failure.
+
+    Identical requests (same normalized text, prompt, model and sampling settings) are served
+    from the rewrite cache without calling the model.
+    """
+    key = None
+    if rewrite_cache.MODE != "off":
+        key = rewrite_cache.cache_key(article_text, SYSTEM_PROMPT + PROMPT_TEMPLATE + CHUNK_NOTE + LEDE_NOTE, llm.model, TEMPERATURE,
+                                      settings=REWRITE_SETTINGS)
+        completion = await asyncio.to_thread(cached_rewrite, key)
+        if completion is None and rewrite_cache.MODE == "replay":
+            print(f"❌ No cached rewrite for article {original_article_id} (REWRITE_CACHE=replay)")
+            return None
+    if key is None or completion is None:
+        try:
+            completion = await complete_rewrite(llm, article_text)
+        except Exception as e:
+            print(f"❌ Rewrite failed for article {original_article_id}: {e}")
+            return None
+        if key is not None and completion.text:
+            await asyncio.to_thread(cache_rewrite, key, completion)
+
+    source = "cache" if completion.cached else f"{completion.prompt_tokens}+{completion.completion_tokens} tokens"
+    print(f"🔹 AI Output for article {original_article_id} ({source}, {completion.latency_ms:.0f} ms): {completion.text[:100]}...")  # Print first 100 chars
+    return completion
+
+def rewrite_article(original_article_id, article_text):
+    """Rewrites the article using OpenAI's GPT-4 and saves it to the database."""
+
+    if not OPENAI_API_KEY:
+        return "⚠️ OpenAI API key is missing."
+
+    async def run():
+        async with LLMClient(api_key=OPENAI_API_KEY) as llm:
+            return await rewrite_article_async(original_article_id, article_text, llm)
+
+    completion = asyncio.run(run())
+    if not completion:
         return None
+    try:
+        with db_connection() as conn:
+            complete_rewrites(conn, [(original_article_id, completion)])
+        print(f"✅ Saved rewritten article {original_article_id} and marked it 'completed'.")
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+    return completion.text
@@ -5,10 +5,23 @@ from sqlalchemy import pool
 
 from alembic import context
 
+import re
+
+from sqlalchemy import make_url
+
+from database import Base, DATABASE_URL
+import models  # noqa: F401  registers the tables on Base.metadata
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
+# The database URL comes from the app's settings (.env), not alembic.ini
+config.set_main_option(
+    "sqlalchemy.url",
+    make_url(DATABASE_URL).render_as_string(hide_password=False).replace("%", "%%"),
+)
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
@@ -18,7 +31,14 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-target_metadata = None
+target_metadata = Base.metadata
+
+# Monthly articles partitions are created at runtime (archive.ensure_partitions), not modelled
+PARTITION_NAME = re.compile(r"^articles_(\d{4}_\d{2}|default)$")
+
+
+def include_name(name, type_, parent_names):
+    return not (type_ == "table" and PARTITION_NAME.match(name))
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -42,6 +62,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -65,7 +86,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
@@ -0,0 +1,36 @@
+"""article search vector
+
+Revision ID: 3e8d1a6f9c22
+Revises: 9b41e7d2c015
+Create Date: 2025-03-17 13:40:05.287461
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8d1a6f9c22'
+down_revision: Union[str, None] = '9b41e7d2c015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A stored generated column rewrites the articles table once; on a large archive run
+    # this in a maintenance window.
+    op.add_column('articles', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed("setweight(to_tsvector('finnish', coalesce(title, '')), 'A') || "
+                    "setweight(to_tsvector('finnish', coalesce(content, '')), 'B')", persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_articles_search_vector', 'articles', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_articles_search_vector', table_name='articles', postgresql_using='gin')
+    op.drop_column('articles', 'search_vector')
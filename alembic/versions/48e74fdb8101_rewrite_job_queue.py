@@ -0,0 +1,46 @@
+"""rewrite job queue
+
+Revision ID: 48e74fdb8101
+Revises: 6c62ee0256a3
+Create Date: 2025-03-11 14:05:52.904127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '48e74fdb8101'
+down_revision: Union[str, None] = '6c62ee0256a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rewrite_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('article_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_by', sa.String(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('article_id'),
+    )
+    op.create_index('ix_rewrite_jobs_queued', 'rewrite_jobs', ['run_after', 'id'], postgresql_where=sa.text("status = 'queued'"))
+    op.create_index('ix_rewrite_jobs_running_lease', 'rewrite_jobs', ['lease_expires_at'], postgresql_where=sa.text("status = 'running'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rewrite_jobs_running_lease', table_name='rewrite_jobs')
+    op.drop_index('ix_rewrite_jobs_queued', table_name='rewrite_jobs')
+    op.drop_table('rewrite_jobs')
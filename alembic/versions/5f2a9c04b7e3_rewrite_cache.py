@@ -0,0 +1,42 @@
+"""rewrite cache
+
+Revision ID: 5f2a9c04b7e3
+Revises: d8ce33cf1110
+Create Date: 2025-03-13 09:21:44.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2a9c04b7e3'
+down_revision: Union[str, None] = 'd8ce33cf1110'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rewrite_cache',
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('rewritten_content', sa.Text(), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+        sa.Column('completion_tokens', sa.Integer(), nullable=True),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('hits', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('cache_key'),
+    )
+    op.create_index('ix_rewrite_cache_last_used_at', 'rewrite_cache', ['last_used_at'])
+    op.create_index('ix_rewrite_cache_created_at', 'rewrite_cache', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rewrite_cache_created_at', table_name='rewrite_cache')
+    op.drop_index('ix_rewrite_cache_last_used_at', table_name='rewrite_cache')
+    op.drop_table('rewrite_cache')
@@ -0,0 +1,71 @@
+"""rewritten_articles and hot path indexes
+
+rewritten_articles was created by hand on existing installs, so it is created
+only if missing. Duplicate rewrites (the batch used to insert each one twice)
+and rows pointing at deleted articles are removed before the unique index and
+foreign key are added; the newest rewrite per article is kept.
+
+Revision ID: 6c62ee0256a3
+Revises: dd014b3d8c64
+Create Date: 2025-03-10 09:31:07.552817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c62ee0256a3'
+down_revision: Union[str, None] = 'dd014b3d8c64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS rewritten_articles (
+            id SERIAL PRIMARY KEY,
+            original_article_id INTEGER NOT NULL,
+            rewritten_content TEXT NOT NULL,
+            editor_approved BOOLEAN NOT NULL DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+    op.execute("""
+        DELETE FROM rewritten_articles r
+        WHERE NOT EXISTS (SELECT 1 FROM articles a WHERE a.id = r.original_article_id)
+    """)
+    op.execute("""
+        DELETE FROM rewritten_articles
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (PARTITION BY original_article_id ORDER BY id DESC) AS newest
+                FROM rewritten_articles
+            ) ranked
+            WHERE newest > 1
+        )
+    """)
+    op.create_index('ux_rewritten_articles_original_article_id', 'rewritten_articles', ['original_article_id'], unique=True)
+    op.create_foreign_key(
+        'rewritten_articles_original_article_id_fkey', 'rewritten_articles', 'articles',
+        ['original_article_id'], ['id'], ondelete='CASCADE',
+    )
+
+    op.create_index('ix_articles_created_at_id', 'articles', ['created_at', 'id'])
+    op.create_index('ix_articles_rewrite_status_created_at_id', 'articles', ['rewrite_status', 'created_at', 'id'])
+    op.create_index('ix_articles_source_created_at_id', 'articles', ['source', 'created_at', 'id'])
+    op.create_index(
+        'ix_articles_unselected_created_at', 'articles', [sa.text('created_at DESC')],
+        postgresql_where=sa.text('selected_for_rewrite = false'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_articles_unselected_created_at', table_name='articles')
+    op.drop_index('ix_articles_source_created_at_id', table_name='articles')
+    op.drop_index('ix_articles_rewrite_status_created_at_id', table_name='articles')
+    op.drop_index('ix_articles_created_at_id', table_name='articles')
+    op.drop_constraint('rewritten_articles_original_article_id_fkey', 'rewritten_articles', type_='foreignkey')
+    op.drop_index('ux_rewritten_articles_original_article_id', table_name='rewritten_articles')
@@ -0,0 +1,44 @@
+"""notify article status
+
+Revision ID: 9b41e7d2c015
+Revises: 5f2a9c04b7e3
+Create Date: 2025-03-14 11:02:37.640915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b41e7d2c015'
+down_revision: Union[str, None] = '5f2a9c04b7e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every rewrite_status change is published on the article_status channel when its
+    # transaction commits; the API's LISTEN connection relays it to dashboard clients.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_article_status() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('article_status', json_build_object(
+                'id', NEW.id, 'rewrite_status', NEW.rewrite_status, 'previous_status', OLD.rewrite_status
+            )::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER articles_notify_status
+        AFTER UPDATE OF rewrite_status ON articles
+        FOR EACH ROW WHEN (OLD.rewrite_status IS DISTINCT FROM NEW.rewrite_status)
+        EXECUTE FUNCTION notify_article_status()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS articles_notify_status ON articles")
+    op.execute("DROP FUNCTION IF EXISTS notify_article_status()")
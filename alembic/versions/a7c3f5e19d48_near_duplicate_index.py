@@ -0,0 +1,45 @@
+"""near duplicate index
+
+Revision ID: a7c3f5e19d48
+Revises: 3e8d1a6f9c22
+Create Date: 2025-03-18 15:26:11.904372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3f5e19d48'
+down_revision: Union[str, None] = '3e8d1a6f9c22'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing articles are signed afterwards with `python near_dup.py --backfill`
+    op.add_column('articles', sa.Column('minhash', postgresql.ARRAY(sa.BigInteger()), nullable=True))
+    op.add_column('articles', sa.Column('duplicate_of', sa.Integer(), nullable=True))
+    op.create_foreign_key('articles_duplicate_of_fkey', 'articles', 'articles', ['duplicate_of'], ['id'], ondelete='SET NULL')
+    op.create_index('ix_articles_duplicate_of', 'articles', ['duplicate_of'], postgresql_where=sa.text('duplicate_of IS NOT NULL'))
+    op.create_table(
+        'article_lsh_buckets',
+        sa.Column('band', sa.SmallInteger(), nullable=False),
+        sa.Column('bucket', sa.BigInteger(), nullable=False),
+        sa.Column('article_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('band', 'bucket', 'article_id'),
+    )
+    op.create_index('ix_article_lsh_buckets_article_id', 'article_lsh_buckets', ['article_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_article_lsh_buckets_article_id', table_name='article_lsh_buckets')
+    op.drop_table('article_lsh_buckets')
+    op.drop_index('ix_articles_duplicate_of', table_name='articles', postgresql_where=sa.text('duplicate_of IS NOT NULL'))
+    op.drop_constraint('articles_duplicate_of_fkey', 'articles', type_='foreignkey')
+    op.drop_column('articles', 'duplicate_of')
+    op.drop_column('articles', 'minhash')
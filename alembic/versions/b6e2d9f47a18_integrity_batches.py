@@ -0,0 +1,85 @@
+"""integrity batches
+
+Revision ID: b6e2d9f47a18
+Revises: e4b9d27a1c53
+Create Date: 2025-03-27 14:22:41.086215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2d9f47a18'
+down_revision: Union[str, None] = 'e4b9d27a1c53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'integrity_batches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('root', sa.String(length=64), nullable=False),
+        sa.Column('leaf_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('anchor_backend', sa.String(), nullable=True),
+        sa.Column('anchor_ref', sa.String(), nullable=True),
+        sa.Column('anchored_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'integrity_leaves',
+        sa.Column('batch_id', sa.Integer(), nullable=False),
+        sa.Column('leaf_index', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('article_id', sa.Integer(), nullable=False),
+        sa.Column('item_created_at', sa.DateTime(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('proof', postgresql.ARRAY(sa.String(length=64)), nullable=False),
+        sa.ForeignKeyConstraint(['batch_id'], ['integrity_batches.id']),
+        sa.PrimaryKeyConstraint('batch_id', 'leaf_index'),
+    )
+    op.create_index('ix_integrity_leaves_item', 'integrity_leaves', ['kind', 'article_id', 'batch_id'])
+
+    # Sealed batches are history: leaves never change, and a batch only gains its anchor once
+    op.execute("""
+        CREATE OR REPLACE FUNCTION integrity_append_only() RETURNS trigger AS $$
+        BEGIN
+            RAISE EXCEPTION '% is append-only', TG_TABLE_NAME;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER integrity_leaves_append_only
+        BEFORE UPDATE OR DELETE ON integrity_leaves
+        FOR EACH ROW EXECUTE FUNCTION integrity_append_only()
+    """)
+    op.execute("""
+        CREATE TRIGGER integrity_batches_no_delete
+        BEFORE DELETE ON integrity_batches
+        FOR EACH ROW EXECUTE FUNCTION integrity_append_only()
+    """)
+    op.execute("""
+        CREATE TRIGGER integrity_batches_sealed
+        BEFORE UPDATE ON integrity_batches
+        FOR EACH ROW WHEN (OLD.root IS DISTINCT FROM NEW.root OR OLD.leaf_count IS DISTINCT FROM NEW.leaf_count
+                           OR OLD.created_at IS DISTINCT FROM NEW.created_at OR OLD.anchor_ref IS NOT NULL)
+        EXECUTE FUNCTION integrity_append_only()
+    """)
+    for table in ('integrity_batches', 'integrity_leaves'):
+        op.execute(f"""
+            CREATE TRIGGER {table}_no_truncate
+            BEFORE TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION integrity_append_only()
+        """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_integrity_leaves_item', table_name='integrity_leaves')
+    op.drop_table('integrity_leaves')
+    op.drop_table('integrity_batches')
+    op.execute("DROP FUNCTION IF EXISTS integrity_append_only()")
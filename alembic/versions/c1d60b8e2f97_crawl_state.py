@@ -0,0 +1,47 @@
+"""crawl state
+
+Revision ID: c1d60b8e2f97
+Revises: a7c3f5e19d48
+Create Date: 2025-03-19 10:12:58.331740
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1d60b8e2f97'
+down_revision: Union[str, None] = 'a7c3f5e19d48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('feed_cache', sa.Column('last_guid', sa.String(), nullable=True))
+    op.add_column('feed_cache', sa.Column('last_published_at', sa.DateTime(), nullable=True))
+    op.create_table(
+        'crawl_items',
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('feed_url', sa.String(), nullable=False),
+        sa.Column('guid', sa.String(), nullable=True),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('author', sa.String(), nullable=True),
+        sa.Column('published_at', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(), server_default=sa.text("'pending'"), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('url'),
+    )
+    op.create_index('ix_crawl_items_due', 'crawl_items', ['feed_url', 'next_attempt_at'], postgresql_where=sa.text("status IN ('pending', 'failed')"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_crawl_items_due', table_name='crawl_items', postgresql_where=sa.text("status IN ('pending', 'failed')"))
+    op.drop_table('crawl_items')
+    op.drop_column('feed_cache', 'last_published_at')
+    op.drop_column('feed_cache', 'last_guid')
@@ -0,0 +1,32 @@
+"""rewrite model accounting
+
+Revision ID: d8ce33cf1110
+Revises: 48e74fdb8101
+Create Date: 2025-03-12 10:47:19.226531
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8ce33cf1110'
+down_revision: Union[str, None] = '48e74fdb8101'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('rewritten_articles', sa.Column('model', sa.String(), nullable=True))
+    op.add_column('rewritten_articles', sa.Column('prompt_tokens', sa.Integer(), nullable=True))
+    op.add_column('rewritten_articles', sa.Column('completion_tokens', sa.Integer(), nullable=True))
+    op.add_column('rewritten_articles', sa.Column('latency_ms', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('rewritten_articles', 'latency_ms')
+    op.drop_column('rewritten_articles', 'completion_tokens')
+    op.drop_column('rewritten_articles', 'prompt_tokens')
+    op.drop_column('rewritten_articles', 'model')
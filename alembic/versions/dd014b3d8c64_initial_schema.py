@@ -0,0 +1,57 @@
+"""initial schema
+
+Creates the tables db_setup.py used to create with Base.metadata.create_all.
+Databases created that way already have them: run `alembic stamp dd014b3d8c64`
+once instead of upgrading through this revision.
+
+Revision ID: dd014b3d8c64
+Revises: 
+Create Date: 2025-03-10 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dd014b3d8c64'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'articles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('source_url', sa.String(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('author', sa.String(), nullable=True),
+        sa.Column('published_at', sa.DateTime(), nullable=True),
+        sa.Column('rewrite_status', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('selected_for_rewrite', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source_url'),
+    )
+    op.create_index('ix_articles_id', 'articles', ['id'])
+    op.create_table(
+        'feed_cache',
+        sa.Column('feed_url', sa.String(), nullable=False),
+        sa.Column('etag', sa.String(), nullable=True),
+        sa.Column('last_modified', sa.String(), nullable=True),
+        sa.Column('body_hash', sa.String(length=64), nullable=True),
+        sa.Column('checked_at', sa.DateTime(), nullable=True),
+        sa.Column('changed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('feed_url'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('feed_cache')
+    op.drop_index('ix_articles_id', table_name='articles')
+    op.drop_table('articles')
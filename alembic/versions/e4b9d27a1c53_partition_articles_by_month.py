@@ -0,0 +1,202 @@
+"""partition articles by month
+
+Revision ID: e4b9d27a1c53
+Revises: c1d60b8e2f97
+Create Date: 2025-03-24 09:41:07.512903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b9d27a1c53'
+down_revision: Union[str, None] = 'c1d60b8e2f97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR_SQL = ("setweight(to_tsvector('finnish', coalesce(title, '')), 'A') || "
+                     "setweight(to_tsvector('finnish', coalesce(content, '')), 'B')")
+ARTICLE_COLUMNS = "id, title, content, source_url, source, author, published_at, rewrite_status, created_at, selected_for_rewrite, minhash, duplicate_of"
+# (table, column, on delete) for every foreign key that pointed at articles.id
+REFERENCES = [
+    ('rewritten_articles', 'original_article_id', 'CASCADE'),
+    ('rewrite_jobs', 'article_id', 'CASCADE'),
+    ('article_lsh_buckets', 'article_id', 'CASCADE'),
+]
+ARTICLE_INDEXES = [
+    "CREATE INDEX ix_articles_created_at_id ON articles (created_at, id)",
+    "CREATE INDEX ix_articles_rewrite_status_created_at_id ON articles (rewrite_status, created_at, id)",
+    "CREATE INDEX ix_articles_source_created_at_id ON articles (source, created_at, id)",
+    "CREATE INDEX ix_articles_unselected_created_at ON articles (created_at DESC) WHERE selected_for_rewrite = false",
+    "CREATE INDEX ix_articles_search_vector ON articles USING gin (search_vector)",
+    "CREATE INDEX ix_articles_duplicate_of ON articles (duplicate_of) WHERE duplicate_of IS NOT NULL",
+]
+NOTIFY_TRIGGER = """
+    CREATE TRIGGER articles_notify_status
+    AFTER UPDATE OF rewrite_status ON articles
+    FOR EACH ROW WHEN (OLD.rewrite_status IS DISTINCT FROM NEW.rewrite_status)
+    EXECUTE FUNCTION notify_article_status()
+"""
+
+
+def upgrade() -> None:
+    # Ids and URL uniqueness move to article_urls: a unique index on a partitioned table must
+    # include the partition key, and foreign keys need a unique target, so every table that
+    # referenced articles.id now references article_urls.id. Archived articles keep their row.
+    op.execute("""
+        CREATE TABLE article_urls (
+            id integer PRIMARY KEY,
+            source_url varchar NOT NULL CONSTRAINT article_urls_source_url_key UNIQUE,
+            created_at timestamp NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("UPDATE articles SET created_at = now() WHERE created_at IS NULL")
+    op.execute("INSERT INTO article_urls (id, source_url, created_at) SELECT id, source_url, created_at FROM articles")
+    op.execute("ALTER SEQUENCE articles_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE articles ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE articles_id_seq RENAME TO article_urls_id_seq")
+    op.execute("ALTER SEQUENCE article_urls_id_seq OWNED BY article_urls.id")
+    op.execute("ALTER TABLE article_urls ALTER COLUMN id SET DEFAULT nextval('article_urls_id_seq')")
+    for table, column, on_delete in REFERENCES:
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {table}_{column}_fkey")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey FOREIGN KEY ({column}) "
+                   f"REFERENCES article_urls (id) ON DELETE {on_delete}")
+
+    # Rebuild articles as a table range-partitioned by created_at month. Copying rewrites the
+    # table once; on a large database run this in a maintenance window.
+    op.execute("ALTER TABLE articles RENAME TO articles_unpartitioned")
+    op.execute(f"""
+        CREATE TABLE articles (
+            id integer NOT NULL,
+            title varchar NOT NULL,
+            content text NOT NULL,
+            source_url varchar NOT NULL,
+            source varchar NOT NULL,
+            author varchar,
+            published_at timestamp,
+            rewrite_status varchar,
+            created_at timestamp NOT NULL DEFAULT now(),
+            selected_for_rewrite boolean,
+            search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED,
+            minhash bigint[],
+            duplicate_of integer
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("""
+        DO $$
+        DECLARE
+            month date := date_trunc('month', LEAST((SELECT min(created_at) FROM articles_unpartitioned), now()));
+        BEGIN
+            WHILE month <= date_trunc('month', now()) + interval '2 months' LOOP
+                EXECUTE format('CREATE TABLE %I PARTITION OF articles FOR VALUES FROM (%L) TO (%L)',
+                               'articles_' || to_char(month, 'YYYY_MM'), month, month + interval '1 month');
+                month := month + interval '1 month';
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE articles_default PARTITION OF articles DEFAULT")
+    op.execute(f"INSERT INTO articles ({ARTICLE_COLUMNS}) SELECT {ARTICLE_COLUMNS} FROM articles_unpartitioned")
+    op.execute("DROP TABLE articles_unpartitioned")
+
+    op.execute("ALTER TABLE articles ADD CONSTRAINT articles_pkey PRIMARY KEY (id, created_at)")
+    op.execute("ALTER TABLE articles ADD CONSTRAINT articles_id_fkey FOREIGN KEY (id) REFERENCES article_urls (id) ON DELETE CASCADE")
+    op.execute("ALTER TABLE articles ADD CONSTRAINT articles_duplicate_of_fkey FOREIGN KEY (duplicate_of) "
+               "REFERENCES article_urls (id) ON DELETE SET NULL")
+    for statement in ARTICLE_INDEXES:
+        op.execute(statement)
+    op.execute(NOTIFY_TRIGGER)
+
+    # Plain INSERTs without an id register the URL first; a repeated URL fails on article_urls
+    op.execute("""
+        CREATE OR REPLACE FUNCTION register_article_url() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.id IS NULL THEN
+                INSERT INTO article_urls (source_url, created_at) VALUES (NEW.source_url, NEW.created_at)
+                RETURNING id INTO NEW.id;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER articles_register_url
+        BEFORE INSERT ON articles
+        FOR EACH ROW EXECUTE FUNCTION register_article_url()
+    """)
+
+    op.create_table(
+        'article_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('author', sa.String(), nullable=True),
+        sa.Column('published_at', sa.DateTime(), nullable=True),
+        sa.Column('rewrite_status', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('duplicate_of', sa.Integer(), nullable=True),
+        sa.Column('codec', sa.String(), nullable=False),
+        sa.Column('content', sa.LargeBinary(), nullable=False),
+        sa.Column('content_bytes', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['id'], ['article_urls.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    # Compressed content cannot be restored in SQL; run `python archive.py --restore` first
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM article_archive) THEN
+                RAISE EXCEPTION 'article_archive is not empty; restore archived articles before downgrading';
+            END IF;
+        END $$
+    """)
+    op.drop_table('article_archive')
+    op.execute("ALTER TABLE articles RENAME TO articles_partitioned")
+    op.execute("ALTER TABLE articles_partitioned DROP CONSTRAINT articles_pkey")
+    op.execute(f"""
+        CREATE TABLE articles (
+            id integer NOT NULL,
+            title varchar NOT NULL,
+            content text NOT NULL,
+            source_url varchar NOT NULL,
+            source varchar NOT NULL,
+            author varchar,
+            published_at timestamp,
+            rewrite_status varchar,
+            created_at timestamp,
+            selected_for_rewrite boolean,
+            search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED,
+            minhash bigint[],
+            duplicate_of integer
+        )
+    """)
+    op.execute(f"INSERT INTO articles ({ARTICLE_COLUMNS}) SELECT {ARTICLE_COLUMNS} FROM articles_partitioned")
+    for table, column, on_delete in REFERENCES:
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {table}_{column}_fkey")
+    op.execute("DROP TABLE articles_partitioned")  # drops its partitions and triggers
+    op.execute("DROP FUNCTION IF EXISTS register_article_url()")
+
+    op.execute("ALTER SEQUENCE article_urls_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE article_urls ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE article_urls_id_seq RENAME TO articles_id_seq")
+    op.execute("ALTER SEQUENCE articles_id_seq OWNED BY articles.id")
+    op.execute("ALTER TABLE articles ALTER COLUMN id SET DEFAULT nextval('articles_id_seq')")
+    op.execute("DROP TABLE article_urls")
+
+    op.execute("ALTER TABLE articles ADD CONSTRAINT articles_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE articles ADD CONSTRAINT articles_source_url_key UNIQUE (source_url)")
+    op.execute("CREATE INDEX ix_articles_id ON articles (id)")
+    op.execute("ALTER TABLE articles ADD CONSTRAINT articles_duplicate_of_fkey FOREIGN KEY (duplicate_of) "
+               "REFERENCES articles (id) ON DELETE SET NULL")
+    for statement in ARTICLE_INDEXES:
+        op.execute(statement)
+    op.execute(NOTIFY_TRIGGER)
+    for table, column, on_delete in REFERENCES:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey FOREIGN KEY ({column}) "
+                   f"REFERENCES articles (id) ON DELETE {on_delete}")
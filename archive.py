@@ -0,0 +1,277 @@
+import argparse
+import os
+import zlib
+from datetime import date, datetime
+from psycopg2.extras import execute_values
+from database import db_connection
+from events import notify_changed
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; archives are written with zlib without it
+    zstandard = None
+
+# Finished articles older than ARCHIVE_AFTER_DAYS move from the monthly partitions into article_archive
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_STATUSES = [status.strip() for status in os.getenv("ARCHIVE_STATUSES", "completed").split(",") if status.strip()]
+ARCHIVE_BATCH = int(os.getenv("ARCHIVE_BATCH", "500"))
+ZSTD_LEVEL = int(os.getenv("ARCHIVE_ZSTD_LEVEL", "10"))
+CODEC = "zstd" if zstandard is not None else "zlib"
+# Monthly partitions are created this many months ahead so inserts never fall into articles_default
+PARTITION_MONTHS_AHEAD = int(os.getenv("ARTICLE_PARTITION_MONTHS_AHEAD", "2"))
+
+def compress(text):
+    """Returns (codec, blob) for article text."""
+    data = text.encode("utf-8")
+    if CODEC == "zstd":
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, 9)
+
+def decompress(codec, blob):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Reading zstd archives requires the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(bytes(blob)).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(bytes(blob)).decode("utf-8")
+    raise ValueError(f"Unknown archive codec: {codec}")
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    return f"articles_{month:%Y_%m}"
+
+def partitions(conn):
+    """Returns {partition name: row estimate} for the monthly partitions, oldest first."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT c.relname, c.reltuples::bigint FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'articles'::regclass AND c.relname ~ '^articles_\\d{4}_\\d{2}$'
+        ORDER BY c.relname
+    """)
+    rows = dict(cursor.fetchall())
+    cursor.close()
+    return rows
+
+# Columns copied when rows move out of articles_default (search_vector is generated)
+PARTITION_COLUMNS = ("id, title, content, source_url, source, author, published_at, rewrite_status, created_at, "
+                     "selected_for_rewrite, minhash, duplicate_of")
+
+def create_partition(cursor, start):
+    """Creates the monthly partition starting at `start`, moving any of its rows out of articles_default.
+
+    Postgres refuses to create a partition whose range already has rows in the default
+    partition (inserts land there while no monthly partition exists), so the default is
+    detached, its rows for the month are moved, and it is attached again. Detaching locks
+    the articles table until the caller commits.
+    """
+    name, end = partition_name(start), add_months(start, 1)
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM articles_default WHERE created_at >= %s AND created_at < %s)", (start, end))
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF articles FOR VALUES FROM (%s) TO (%s)", (start, end))
+        return 0
+    cursor.execute("ALTER TABLE articles DETACH PARTITION articles_default")
+    cursor.execute(f"CREATE TABLE {name} PARTITION OF articles FOR VALUES FROM (%s) TO (%s)", (start, end))
+    cursor.execute(f"""
+        WITH moved AS (DELETE FROM articles_default WHERE created_at >= %s AND created_at < %s RETURNING {PARTITION_COLUMNS})
+        INSERT INTO {name} ({PARTITION_COLUMNS}) SELECT {PARTITION_COLUMNS} FROM moved
+    """, (start, end))
+    moved = cursor.rowcount
+    cursor.execute("ALTER TABLE articles ATTACH PARTITION articles_default DEFAULT")
+    return moved
+
+def ensure_partitions(conn, months_ahead=PARTITION_MONTHS_AHEAD, today=None):
+    """Creates the current month's partition and the next `months_ahead`; returns the names created.
+
+    Each month is created in its own savepoint, so one failing month does not stop the later ones.
+    """
+    existing = partitions(conn)
+    month = (today or date.today()).replace(day=1)
+    created = []
+    cursor = conn.cursor()
+    for offset in range(months_ahead + 1):
+        start = add_months(month, offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        cursor.execute("SAVEPOINT create_partition")
+        try:
+            moved = create_partition(cursor, start)
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT create_partition")
+            print(f"❌ Creating partition {name} failed: {e}")
+            continue
+        cursor.execute("RELEASE SAVEPOINT create_partition")
+        if moved:
+            print(f"📦 Moved {moved} articles from articles_default into {name}")
+        created.append(name)
+    cursor.close()
+    return created
+
+def create_partitions():
+    """Opens a connection and creates the upcoming monthly partitions; returns the names created."""
+    with db_connection() as conn:
+        return ensure_partitions(conn)
+
+def archive_batch(conn, older_than_days=ARCHIVE_AFTER_DAYS, statuses=ARCHIVE_STATUSES, limit=ARCHIVE_BATCH):
+    """Moves up to `limit` old articles in the given statuses into article_archive; returns how many moved.
+
+    The content is compressed; ids, URLs and rewrites stay where they are, so rewritten
+    articles and duplicate links keep pointing at the same id.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, title, content, source, author, published_at, rewrite_status, created_at, duplicate_of FROM articles
+        WHERE created_at < now() - make_interval(days => %s) AND rewrite_status = ANY(%s)
+        ORDER BY created_at
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    """, (older_than_days, statuses, limit))
+    rows = cursor.fetchall()
+    if not rows:
+        cursor.close()
+        return 0
+
+    archived = []
+    for article_id, title, content, source, author, published_at, rewrite_status, created_at, duplicate_of in rows:
+        codec, blob = compress(content)
+        archived.append((article_id, title, source, author, published_at, rewrite_status, created_at, duplicate_of,
+                         codec, blob, len(content.encode("utf-8"))))
+    execute_values(cursor, """
+        INSERT INTO article_archive (id, title, source, author, published_at, rewrite_status, created_at, duplicate_of,
+                                     codec, content, content_bytes)
+        VALUES %s
+    """, archived)
+    ids = [row[0] for row in rows]
+    cursor.execute("DELETE FROM article_lsh_buckets WHERE article_id = ANY(%s)", (ids,))
+    cursor.execute("DELETE FROM articles WHERE id = ANY(%s) AND created_at <= %s", (ids, max(row[7] for row in rows)))
+    notify_changed(cursor, ids)
+    cursor.close()
+    return len(rows)
+
+def drop_empty_partitions(conn, older_than_days=ARCHIVE_AFTER_DAYS):
+    """Drops monthly partitions that ended before the archive cutoff and hold no rows; returns their names.
+
+    Dropping a partition briefly locks the articles table, so this only runs from the archive job.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT (now() - make_interval(days => %s))::date", (older_than_days,))
+    cutoff = cursor.fetchone()[0]
+    dropped = []
+    for name in partitions(conn):
+        year, month = int(name[9:13]), int(name[14:16])
+        if add_months(date(year, month, 1), 1) > cutoff:
+            break
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {name})")
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"DROP TABLE {name}")
+            dropped.append(name)
+    cursor.close()
+    return dropped
+
+def restore_batch(conn, limit=ARCHIVE_BATCH):
+    """Moves up to `limit` archived articles back into the partitioned table; returns how many moved.
+
+    MinHash signatures are not archived; run `python near_dup.py --backfill` afterwards.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT a.id, a.title, a.codec, a.content, u.source_url, a.source, a.author, a.published_at, a.rewrite_status,
+               a.created_at, a.duplicate_of
+        FROM article_archive a JOIN article_urls u USING (id)
+        ORDER BY a.created_at
+        LIMIT %s
+        FOR UPDATE OF a SKIP LOCKED
+    """, (limit,))
+    rows = cursor.fetchall()
+    if rows:
+        restored = [(article_id, title, decompress(codec, blob), source_url, source, author, published_at, rewrite_status,
+                     created_at, rewrite_status != "not_selected", duplicate_of)
+                    for article_id, title, codec, blob, source_url, source, author, published_at, rewrite_status, created_at, duplicate_of in rows]
+        execute_values(cursor, """
+            INSERT INTO articles (id, title, content, source_url, source, author, published_at, rewrite_status,
+                                  created_at, selected_for_rewrite, duplicate_of)
+            VALUES %s
+        """, restored)
+        cursor.execute("DELETE FROM article_archive WHERE id = ANY(%s)", ([row[0] for row in rows],))
+        notify_changed(cursor, [row[0] for row in rows])
+    cursor.close()
+    return len(rows)
+
+def archive(older_than_days=ARCHIVE_AFTER_DAYS, statuses=ARCHIVE_STATUSES, batch_size=ARCHIVE_BATCH):
+    """Archives old finished articles batch by batch (one transaction each), then drops emptied partitions."""
+    total = 0
+    while True:
+        with db_connection() as conn:
+            moved = archive_batch(conn, older_than_days, statuses, batch_size)
+        if not moved:
+            break
+        total += moved
+        print(f"🗄️ Archived {total} articles so far")
+    with db_connection() as conn:
+        dropped = drop_empty_partitions(conn, older_than_days)
+    print(f"✅ Archived {total} articles older than {older_than_days} days; dropped partitions: {', '.join(dropped) or 'none'}")
+    return total
+
+def restore(batch_size=ARCHIVE_BATCH):
+    total = 0
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT min(created_at) FROM article_archive")
+        oldest = cursor.fetchone()[0]
+        cursor.close()
+        if oldest:
+            # Recreate dropped months so restored rows do not pile up in articles_default
+            months = (datetime.now().year - oldest.year) * 12 + datetime.now().month - oldest.month
+            ensure_partitions(conn, months + PARTITION_MONTHS_AHEAD, today=oldest.date())
+    while True:
+        with db_connection() as conn:
+            moved = restore_batch(conn, batch_size)
+        if not moved:
+            break
+        total += moved
+        print(f"🔹 Restored {total} articles so far")
+    print(f"✅ Restored {total} archived articles")
+    return total
+
+def storage_stats(conn):
+    """Rows and on-disk size per monthly partition, plus archive totals."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT c.relname, pg_total_relation_size(c.oid), c.reltuples::bigint
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'articles'::regclass
+        ORDER BY c.relname
+    """)
+    partition_rows = [{"partition": name, "bytes": size, "rows": max(rows, 0)} for name, size, rows in cursor.fetchall()]
+    cursor.execute("SELECT count(*), coalesce(sum(content_bytes), 0), coalesce(sum(octet_length(content)), 0) FROM article_archive")
+    count, raw_bytes, stored_bytes = cursor.fetchone()
+    cursor.close()
+    return {"partitions": partition_rows,
+            "archive": {"articles": count, "content_bytes": raw_bytes, "compressed_bytes": stored_bytes}}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Article partition and cold archive maintenance.")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--statuses", default=",".join(ARCHIVE_STATUSES), help="comma-separated rewrite statuses to archive")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH)
+    parser.add_argument("--partitions-only", action="store_true", help="create upcoming monthly partitions and exit")
+    parser.add_argument("--restore", action="store_true", help="move every archived article back into the articles table")
+    parser.add_argument("--stats", action="store_true", help="print partition and archive sizes and exit")
+    args = parser.parse_args()
+
+    if args.stats:
+        with db_connection() as conn:
+            stats = storage_stats(conn)
+        for partition in stats["partitions"]:
+            print(f"📦 {partition['partition']}: {partition['rows']} rows, {partition['bytes'] / 1024 / 1024:.1f} MB")
+        print(f"🗄️ Archive: {stats['archive']}")
+    elif args.restore:
+        restore(args.batch_size)
+    else:
+        created = create_partitions()
+        print(f"📅 Partitions created: {', '.join(created) or 'none'}")
+        if not args.partitions_only:
+            archive(args.older_than_days, [status.strip() for status in args.statuses.split(",") if status.strip()], args.batch_size)
@@ -0,0 +1,83 @@
+from psycopg2.extras import execute_values
+from sqlalchemy import select
+from database import SessionLocal, db_connection
+from models import ArticleUrl
+from near_dup import DUPLICATE_THRESHOLD, find_duplicates, index_signatures, minhash, similarity
+
+def known_links(links):
+    """Returns the subset of links that are already stored (or archived), using a single IN query."""
+    if not links:
+        return set()
+    db = SessionLocal()
+    rows = db.execute(select(ArticleUrl.source_url).where(ArticleUrl.source_url.in_(set(links)))).scalars().all()
+    db.close()
+    return set(rows)
+
+def save_articles(articles):
+    """Bulk-inserts scraped articles in one statement, ignoring stored links and flagging near-duplicates.
+
+    An article whose MinHash signature matches a stored article (or an earlier one in the
+    same batch) is saved with duplicate_of pointing at that story's first copy. Returns the
+    set of links that were stored; links already stored (or archived) are left out.
+    """
+    if not articles:
+        return set()
+    signatures = {}
+    for index, article in enumerate(articles):
+        signature = article.get("minhash") or minhash(article["content"])
+        if signature:
+            signatures[index] = signature
+
+    with db_connection() as conn:
+        matches = {index: root_id for index, (root_id, _) in find_duplicates(conn, signatures).items()}
+        # Copies inside this batch point at the first copy once it has an id
+        batch_roots = {}
+        for index, signature in signatures.items():
+            if index in matches:
+                continue
+            for earlier in range(index):
+                if earlier in signatures and earlier not in matches and earlier not in batch_roots \
+                        and similarity(signature, signatures[earlier]) >= DUPLICATE_THRESHOLD:
+                    batch_roots[index] = earlier
+                    break
+
+        cursor = conn.cursor()
+        # The URL is registered in article_urls first; stored (or archived) links register nothing and are skipped
+        inserted = execute_values(cursor, """
+            WITH batch (title, content, source_url, source, author, published_at, minhash, duplicate_of) AS (VALUES %s),
+            registered AS (
+                INSERT INTO article_urls (source_url, created_at)
+                SELECT DISTINCT source_url, timezone('utc', now()) FROM batch
+                ON CONFLICT (source_url) DO NOTHING
+                RETURNING id, source_url, created_at
+            )
+            INSERT INTO articles (id, title, content, source_url, source, author, published_at, rewrite_status,
+                                  created_at, selected_for_rewrite, minhash, duplicate_of)
+            SELECT DISTINCT ON (r.id) r.id, b.title, b.content, b.source_url, b.source, b.author, b.published_at, 'not_selected',
+                   r.created_at, false, b.minhash, b.duplicate_of
+            FROM batch b JOIN registered r USING (source_url)
+            RETURNING id, source_url
+        """, [(article["title"], article["content"], article["url"], article["source"], article.get("author"),
+               article.get("published_at") or None, signatures.get(index), matches.get(index))
+              for index, article in enumerate(articles)],
+            template="(%s, %s, %s, %s, %s, %s::timestamp, %s::bigint[], %s::integer)", fetch=True)
+        ids = {url: article_id for article_id, url in inserted}
+
+        batch_duplicates = [(ids[articles[root]["url"]], ids[articles[index]["url"]]) for index, root in batch_roots.items()
+                            if articles[index]["url"] in ids and articles[root]["url"] in ids]
+        if batch_duplicates:
+            execute_values(cursor, "UPDATE articles SET duplicate_of = v.root FROM (VALUES %s) AS v(root, id) WHERE articles.id = v.id",
+                           batch_duplicates)
+        cursor.close()
+        index_signatures(conn, {ids[article["url"]]: signatures[index] for index, article in enumerate(articles)
+                                if index in signatures and article["url"] in ids})
+
+    duplicates = set(matches) | set(batch_roots)
+    for index, article in enumerate(articles):
+        if article["url"] not in ids:
+            continue
+        if index in duplicates:
+            print(f"🔁 Saving near-duplicate article: {article['title']}")
+        else:
+            print(f"✅ Saving article: {article['title']}, Published At: {article['published_at']}")
+    return set(ids)
@@ -0,0 +1,68 @@
+"""Compares article extractor backends: per-article CPU time and peak memory.
+
+Usage: python -m benchmarks.bench_extract [--pages DIR] [--count 200] [--paragraphs 30]
+
+Without --pages, synthetic HS-style pages from the stub server are used. Each backend
+runs in a fresh process so peak RSS figures do not bleed into each other.
+"""
+import argparse
+import multiprocessing
+import pathlib
+import resource
+import time
+import tracemalloc
+
+from benchmarks.stub_server import article_page
+from extractors import EXTRACTORS
+
+
+def load_pages(pages_dir, count, paragraphs):
+    if pages_dir:
+        return [path.read_bytes() for path in sorted(pathlib.Path(pages_dir).glob("*.html"))]
+    return [article_page(f"sample-{i}", paragraphs) for i in range(count)]
+
+
+def run_backend(name, pages, results):
+    extractor = EXTRACTORS[name]()
+    extractor.extract(pages[0])  # warm up imports and caches
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.process_time()
+    extracted = sum(1 for page in pages if extractor.extract(page)[0])
+    cpu = time.process_time() - start
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    # Separate pass: tracemalloc slows pure-Python parsing down too much to time it at once
+    tracemalloc.start()
+    for page in pages:
+        extractor.extract(page)
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results[name] = (extracted, cpu, python_peak, rss_growth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", help="directory of saved article .html files")
+    parser.add_argument("--count", type=int, default=200, help="synthetic pages to generate")
+    parser.add_argument("--paragraphs", type=int, default=30, help="paragraphs per synthetic page")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages, args.count, args.paragraphs)
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1024:.0f} KiB average")
+
+    with multiprocessing.Manager() as manager:
+        results = manager.dict()
+        for name in EXTRACTORS:
+            process = multiprocessing.Process(target=run_backend, args=(name, pages, results))
+            process.start()
+            process.join()
+        results = dict(results)
+
+    print(f"{'backend':8} {'ok':>5} {'ms/article':>11} {'py peak KiB':>12} {'rss +KiB':>9}")
+    for name, (extracted, cpu, python_peak, rss_growth) in results.items():
+        print(f"{name:8} {extracted:5d} {cpu / len(pages) * 1000:11.3f} {python_peak / 1024:12.0f} {rss_growth:9d}")
+
+
+if __name__ == "__main__":
+    main()
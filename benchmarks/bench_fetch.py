@@ -0,0 +1,67 @@
+"""Benchmarks the async fetch engine against the old serial requests + sleep loop.
+
+Usage: python -m benchmarks.bench_fetch [--items 10] [--latency 0.05] [--serial-sleep 1.0]
+"""
+import argparse
+import asyncio
+import time
+import xml.etree.ElementTree as ET
+
+import requests
+
+from benchmarks.stub_server import StubServer
+from fetcher import Fetcher
+
+
+def item_links(content):
+    return [item.findtext("link") for item in ET.fromstring(content).findall(".//item")]
+
+
+def run_serial(feed_urls, serial_sleep):
+    """Mirrors the pre-fetcher scrape loop: one blocking request at a time plus a fixed sleep."""
+    fetched = 0
+    for feed_url in feed_urls:
+        response = requests.get(feed_url)
+        for link in item_links(response.content):
+            requests.get(link)
+            fetched += 1
+            time.sleep(serial_sleep)
+    return fetched
+
+
+async def run_async(feed_urls, rate, burst, per_host):
+    async with Fetcher(per_host=per_host, rate=rate, burst=burst) as fetcher:
+        feeds = await fetcher.get_many(feed_urls)
+        links = [link for response in feeds for link in item_links(response.content)]
+        articles = await fetcher.get_many(links)
+    return sum(1 for response in articles if response is not None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10, help="items per feed")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per request (s)")
+    parser.add_argument("--serial-sleep", type=float, default=1.0, help="sleep after each article in the serial path (s)")
+    parser.add_argument("--rate", type=float, default=50.0, help="async requests per second per host")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--per-host", type=int, default=8)
+    args = parser.parse_args()
+
+    with StubServer(items=args.items, latency=args.latency) as server:
+        feed_urls = server.feed_urls()
+
+        start = time.perf_counter()
+        serial_count = run_serial(feed_urls, args.serial_sleep)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        async_count = asyncio.run(run_async(feed_urls, args.rate, args.burst, args.per_host))
+        async_time = time.perf_counter() - start
+
+    print(f"serial: {serial_count} articles in {serial_time:.2f}s ({serial_count / serial_time:.1f}/s)")
+    print(f"async:  {async_count} articles in {async_time:.2f}s ({async_count / async_time:.1f}/s)")
+    print(f"speedup: {serial_time / async_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Measures rewrite throughput of the shared LLM client at several concurrency levels.
+
+Usage: python -m benchmarks.bench_llm [--requests 40] [--latency 0.5] [--capacity 16] [--levels 1,2,4,8,16,32]
+
+Runs against a local fake chat-completions server, so no API key or network is needed.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.fake_llm import FakeLLMServer
+from llm_client import LLMClient
+
+ARTICLE = "Hallitus esitti keskiviikkona uusia säästötoimia, joiden tavoitteena on vakauttaa julkinen talous. " * 20
+
+
+async def run_level(base_url, concurrency, requests):
+    messages = [{"role": "user", "content": ARTICLE}]
+    async with LLMClient(api_key="fake", base_url=base_url, concurrency=concurrency) as llm:
+        started = time.perf_counter()
+        completions = await asyncio.gather(*(llm.complete(messages, max_tokens=700, temperature=0.3) for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+    latencies = sorted(completion.latency_ms for completion in completions)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return elapsed, statistics.median(latencies), p99, llm.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model latency per request (s)")
+    parser.add_argument("--capacity", type=int, default=16, help="requests in flight before the fake server answers 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="comma-separated concurrency levels")
+    args = parser.parse_args()
+
+    with FakeLLMServer(latency=args.latency, capacity=args.capacity, error_rate=args.error_rate) as server:
+        print(f"{'conc':>4} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'retries':>7} {'tokens':>8}")
+        for concurrency in (int(level) for level in args.levels.split(",")):
+            elapsed, p50, p99, stats = asyncio.run(run_level(server.base_url, concurrency, args.requests))
+            tokens = stats["prompt_tokens"] + stats["completion_tokens"]
+            print(f"{concurrency:4d} {args.requests / elapsed:7.2f} {p50:8.0f} {p99:8.0f} {stats['retries']:7d} {tokens:8d}")
+
+
+if __name__ == "__main__":
+    main()
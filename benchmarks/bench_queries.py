@@ -0,0 +1,121 @@
+"""Seeds a scratch schema and compares hot query plans before and after the index migration.
+
+Usage: python -m benchmarks.bench_queries [--articles 100000] [--plans]
+
+Runs against DATABASE_URL in a throwaway `bench_queries` schema that is dropped afterwards.
+"""
+import argparse
+import re
+
+from database import db_connection
+
+SCHEMA = "bench_queries"
+
+BASELINE_DDL = """
+CREATE TABLE articles (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR NOT NULL,
+    content TEXT NOT NULL,
+    source_url VARCHAR NOT NULL UNIQUE,
+    source VARCHAR NOT NULL,
+    author VARCHAR,
+    published_at TIMESTAMP,
+    rewrite_status VARCHAR,
+    created_at TIMESTAMP,
+    selected_for_rewrite BOOLEAN
+);
+CREATE TABLE rewritten_articles (
+    id SERIAL PRIMARY KEY,
+    original_article_id INTEGER NOT NULL,
+    rewritten_content TEXT NOT NULL,
+    editor_approved BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+"""
+
+SEED = """
+INSERT INTO articles (title, content, source_url, source, rewrite_status, created_at, selected_for_rewrite)
+SELECT 'Uutinen ' || i,
+       repeat('Suomen talous kasvoi ennakoitua nopeammin. ', %(paragraphs)s),
+       'https://www.hs.fi/art-' || i || '.html',
+       (ARRAY['Helsingin Sanomat', 'Yle Uutiset'])[1 + i %% 2],
+       CASE WHEN i %% 100 = 0 THEN 'pending' WHEN i %% 10 = 0 THEN 'completed' ELSE 'not_selected' END,
+       NOW() - (i || ' minutes')::interval,
+       i %% 10 = 0
+FROM generate_series(1, %(articles)s) AS i;
+INSERT INTO rewritten_articles (original_article_id, rewritten_content)
+SELECT id, 'Uudelleenkirjoitettu ' || id FROM articles WHERE rewrite_status = 'completed';
+ANALYZE articles;
+ANALYZE rewritten_articles;
+"""
+
+# Same indexes as migration 6c62ee0256a3
+MIGRATION_DDL = """
+CREATE UNIQUE INDEX ux_rewritten_articles_original_article_id ON rewritten_articles (original_article_id);
+ALTER TABLE rewritten_articles ADD FOREIGN KEY (original_article_id) REFERENCES articles (id) ON DELETE CASCADE;
+CREATE INDEX ix_articles_created_at_id ON articles (created_at, id);
+CREATE INDEX ix_articles_rewrite_status_created_at_id ON articles (rewrite_status, created_at, id);
+CREATE INDEX ix_articles_source_created_at_id ON articles (source, created_at, id);
+CREATE INDEX ix_articles_unselected_created_at ON articles (created_at DESC) WHERE selected_for_rewrite = false;
+ANALYZE articles;
+ANALYZE rewritten_articles;
+"""
+
+QUERIES = {
+    "pending batch (NOT IN)": "SELECT id, content FROM articles WHERE rewrite_status = 'pending' AND id NOT IN (SELECT original_article_id FROM rewritten_articles)",
+    "pending batch (NOT EXISTS)": """SELECT a.id, a.content FROM articles a WHERE a.rewrite_status = 'pending'
+        AND NOT EXISTS (SELECT 1 FROM rewritten_articles r WHERE r.original_article_id = a.id)""",
+    "list unselected": "SELECT id, title FROM articles WHERE selected_for_rewrite = FALSE ORDER BY created_at DESC",
+    "/articles/ first page": "SELECT id, title, rewrite_status, source, created_at FROM articles ORDER BY created_at DESC, id DESC LIMIT 51",
+    "/articles/?rewrite_status=pending": """SELECT id, title, rewrite_status, source, created_at FROM articles
+        WHERE rewrite_status = 'pending' ORDER BY created_at DESC, id DESC LIMIT 51""",
+}
+
+
+def explain(cursor, sql):
+    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql)
+    plan = [row[0] for row in cursor.fetchall()]
+    runtime = next(float(re.search(r"([\d.]+) ms", line).group(1)) for line in plan if line.startswith("Execution Time"))
+    return plan, runtime
+
+
+def run_queries(cursor, label, show_plans):
+    results = {}
+    print(f"\n== {label} ==")
+    for name, sql in QUERIES.items():
+        plan, runtime = explain(cursor, sql)
+        results[name] = runtime
+        print(f"{name:38} {runtime:10.2f} ms   {plan[0].strip()[:70]}")
+        if show_plans:
+            print("\n".join("    " + line for line in plan))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--paragraphs", type=int, default=20, help="sentence repeats per article body")
+    parser.add_argument("--plans", action="store_true", help="print full query plans")
+    args = parser.parse_args()
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}; SET search_path TO {SCHEMA}")
+        try:
+            cursor.execute(BASELINE_DDL)
+            cursor.execute(SEED, {"articles": args.articles, "paragraphs": args.paragraphs})
+            before = run_queries(cursor, f"before migration ({args.articles} articles)", args.plans)
+            cursor.execute(MIGRATION_DDL)
+            after = run_queries(cursor, "after migration", args.plans)
+        finally:
+            cursor.execute(f"RESET search_path; DROP SCHEMA {SCHEMA} CASCADE")
+
+    print("\n== speedup ==")
+    baseline = before["pending batch (NOT IN)"]
+    for name in QUERIES:
+        reference = baseline if name.startswith("pending batch") else before[name]
+        print(f"{name:38} {reference / max(after[name], 0.001):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
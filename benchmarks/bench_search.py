@@ -0,0 +1,157 @@
+"""Grows a synthetic Finnish archive and times /articles/search queries at each size.
+
+Usage: python -m benchmarks.bench_search [--sizes 25000,100000,300000] [--words 120] [--repeats 5]
+
+Runs against DATABASE_URL in a throwaway `bench_search` schema that is dropped afterwards.
+Columns: "rank" is the endpoint's query (rank the newest SEARCH_RANK_WINDOW matches, found by
+walking the newest SEARCH_SCAN_ROWS rows or, for sparse terms, through the GIN index), "rank-all"
+ranks every match through the GIN index, "recent" is order=recent, and "seqscan" is rank-all
+with index scans disabled.
+"""
+import argparse
+import io
+import itertools
+import random
+import re
+import statistics
+from datetime import datetime, timedelta
+
+from database import db_connection
+from main import SEARCH_RANK_WINDOW, SEARCH_SCAN_ROWS
+from models import SEARCH_VECTOR_SQL
+
+SCHEMA = "bench_search"
+
+# Common words first; inflected forms on purpose, so the finnish stemmer has something to fold
+VOCABULARY = """
+hallitus hallituksen hallitukselle eduskunta eduskunnassa eduskunnan ministeri ministerin valtiovarainministeri
+talous talouden taloudellinen kasvu kasvoi kasvun työttömyys työttömyyden vienti viennin tuonti yritys yritykset
+yrityksen kunta kunnan kunnissa vero verot verotus verotuksen budjetti budjetin säästö säästöt säästötoimet
+puolustus puolustusvoimat raja rajan turvallisuus turvallisuuden energia energian sähkö sähkön hinta hinnat
+inflaatio korko korot korkojen pankki pankin eläke eläkkeet eläkkeiden koulutus koulutuksen terveys terveydenhuolto
+sairaala sairaalan hoitaja hoitajat maatalous maanviljelijä metsä metsät metsien teollisuus teollisuuden paperi
+suomi suomen suomalainen suomalaiset helsinki helsingin tampere tampereen oulu oulun turku turun pohjois etelä
+vaalit vaaleissa puolue puolueen kokoomus perussuomalaiset keskusta demarit vihreät vasemmisto kansanedustaja
+sopimus sopimuksen neuvottelu neuvottelut lakko lakon palkka palkat palkankorotus ammattiliitto työnantaja
+venäjä venäjän ruotsi ruotsin norja viro euroopan unioni unionin nato naton komissio komission parlamentti
+""".split()
+# Compounds give the long tail of rare words a real news archive has (~25k distinct terms)
+VOCABULARY += [first + second for first in VOCABULARY[:150] for second in VOCABULARY[-170:] if first != second]
+
+DDL = f"""
+CREATE TABLE articles (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR NOT NULL,
+    content TEXT NOT NULL,
+    source VARCHAR NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED
+);
+CREATE INDEX ix_articles_search_vector ON articles USING gin (search_vector);
+CREATE INDEX ix_articles_created_at_id ON articles (created_at, id);
+"""
+
+QUERIES = {
+    "common term": "hallitus",
+    "rare term": "parlamentti",
+    "two terms": "eduskunta verotus",
+    "phrase": '"energian hinta"',
+    "exclusion": "talous -inflaatio",
+}
+
+# Same shape as /articles/search: rank only the newest SEARCH_RANK_WINDOW matches
+SEARCH_RANKED = f"""
+WITH recent AS MATERIALIZED (
+    SELECT id, created_at FROM (
+        SELECT id, created_at, search_vector FROM articles
+        ORDER BY created_at DESC, id DESC LIMIT {SEARCH_SCAN_ROWS}
+    ) newest_rows
+    WHERE search_vector @@ websearch_to_tsquery('finnish', %(q)s)
+    ORDER BY created_at DESC, id DESC LIMIT {SEARCH_RANK_WINDOW}
+), matching AS MATERIALIZED (
+    SELECT id, created_at FROM articles WHERE search_vector @@ websearch_to_tsquery('finnish', %(q)s)
+)
+SELECT a.id, a.title, ts_rank(a.search_vector, q, 1) AS rank
+FROM articles a JOIN (
+    SELECT id, created_at FROM recent WHERE (SELECT count(*) FROM recent) = {SEARCH_RANK_WINDOW}
+    UNION ALL
+    (SELECT id, created_at FROM matching WHERE (SELECT count(*) FROM recent) < {SEARCH_RANK_WINDOW}
+     ORDER BY created_at DESC, id DESC LIMIT {SEARCH_RANK_WINDOW})
+) newest USING (id, created_at), websearch_to_tsquery('finnish', %(q)s) q
+ORDER BY rank DESC, id DESC
+LIMIT 21
+"""
+SEARCH_RANKED_ALL = """
+SELECT id, title, ts_rank(search_vector, q, 1) AS rank
+FROM articles, websearch_to_tsquery('finnish', %(q)s) q
+WHERE search_vector @@ q
+ORDER BY rank DESC, id DESC
+LIMIT 21
+"""
+SEARCH_RECENT = """
+SELECT id, title FROM articles
+WHERE search_vector @@ websearch_to_tsquery('finnish', %(q)s)
+ORDER BY created_at DESC, id DESC
+LIMIT 21
+"""
+
+
+def grow(cursor, start, stop, words, rng):
+    """Appends synthetic articles with Zipf-like word frequencies via COPY."""
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1)))
+    now = datetime.utcnow()
+    rows = io.StringIO()
+    for i in range(start, stop + 1):
+        title = " ".join(rng.choices(VOCABULARY, cum_weights=cum_weights, k=6))
+        content = " ".join(rng.choices(VOCABULARY, cum_weights=cum_weights, k=words))
+        rows.write(f"{title}\t{content}\ths\t{now - timedelta(minutes=i)}\n")
+    rows.seek(0)
+    cursor.copy_expert("COPY articles (title, content, source, created_at) FROM STDIN", rows)
+    # Flush the GIN pending list so queries measure the index, not a sequential pending-list scan
+    cursor.execute("SELECT gin_clean_pending_list('ix_articles_search_vector'); ANALYZE articles")
+
+
+def timed(cursor, sql, params, repeats):
+    runtimes = []
+    for _ in range(repeats):
+        cursor.execute("EXPLAIN (ANALYZE) " + sql, params)
+        plan = [row[0] for row in cursor.fetchall()]
+        runtimes.append(next(float(re.search(r"([\d.]+) ms", line).group(1)) for line in plan if line.startswith("Execution Time")))
+    return statistics.median(runtimes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="25000,100000,300000", help="comma-separated archive sizes")
+    parser.add_argument("--words", type=int, default=120, help="words per article body")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SET statement_timeout = 0; DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}; SET search_path TO {SCHEMA}, public")
+        try:
+            cursor.execute(DDL)
+            loaded = 0
+            rng = random.Random(42)
+            print(f"{'articles':>8} {'query':14} {'matches':>8} {'rank ms':>8} {'rank-all ms':>11} {'recent ms':>9} {'seqscan ms':>10}")
+            for size in (int(size) for size in args.sizes.split(",")):
+                grow(cursor, loaded + 1, size, args.words, rng)
+                loaded = size
+                for name, q in QUERIES.items():
+                    params = {"q": q}
+                    cursor.execute("SELECT count(*) FROM articles WHERE search_vector @@ websearch_to_tsquery('finnish', %(q)s)", params)
+                    matches = cursor.fetchone()[0]
+                    ranked = timed(cursor, SEARCH_RANKED, params, args.repeats)
+                    ranked_all = timed(cursor, SEARCH_RANKED_ALL, params, args.repeats)
+                    recent = timed(cursor, SEARCH_RECENT, params, args.repeats)
+                    cursor.execute("SET enable_bitmapscan = off; SET enable_indexscan = off")
+                    seqscan = timed(cursor, SEARCH_RANKED_ALL, params, 1)
+                    cursor.execute("RESET enable_bitmapscan; RESET enable_indexscan")
+                    print(f"{size:8d} {name:14} {matches:8d} {ranked:8.1f} {ranked_all:11.1f} {recent:9.1f} {seqscan:10.1f}")
+        finally:
+            cursor.execute(f"RESET search_path; DROP SCHEMA {SCHEMA} CASCADE")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Measures status-event fan-out latency of /articles/events with many connected dashboard clients.
+
+Usage: python -m benchmarks.bench_sse [--clients 50,200,500] [--updates 50] [--port 8765]
+
+Starts the API with uvicorn in a subprocess against DATABASE_URL (migrated to head), connects
+N streaming clients, flips rewrite_status on scratch articles and times commit -> client receipt.
+The scratch articles are deleted afterwards.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from database import db_connection
+
+SOURCE = "bench-sse"
+
+
+def seed(count):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO articles (title, content, source_url, source, rewrite_status, created_at, selected_for_rewrite)
+            SELECT 'SSE ' || g, 'x', 'bench-sse://' || g, %s, 'not_selected', now(), false FROM generate_series(1, %s) g
+            RETURNING id
+        """, (SOURCE, count))
+        ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+    return ids
+
+
+def cleanup():
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM article_urls WHERE source_url LIKE 'bench-sse://%%'")  # cascades to articles
+        cursor.close()
+
+
+def rss_kb(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def client(http, base_url, sent, latencies, ready):
+    async with http.stream("GET", f"{base_url}/articles/events") as response:
+        ready.release()
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: ") and event == "status":
+                change = json.loads(line[6:])
+                key = (change["id"], change["rewrite_status"])
+                if key in sent:
+                    latencies.append(time.perf_counter() - sent[key])
+
+
+async def run_level(base_url, clients, ids, updates, server_pid):
+    sent, latencies = {}, []
+    ready = asyncio.Semaphore(0)
+    limits = httpx.Limits(max_connections=clients + 1, max_keepalive_connections=0)
+    async with httpx.AsyncClient(limits=limits, timeout=None) as http:
+        idle_rss = rss_kb(server_pid)
+        tasks = [asyncio.create_task(client(http, base_url, sent, latencies, ready)) for _ in range(clients)]
+        for _ in range(clients):
+            await ready.acquire()
+        connected_rss = rss_kb(server_pid)
+
+        started = time.perf_counter()
+        for n in range(updates):
+            article_id = ids[n % len(ids)]
+            status = "pending" if (n // len(ids)) % 2 == 0 else "not_selected"
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE articles SET rewrite_status = %s WHERE id = %s", (status, article_id))
+                cursor.close()
+                sent[(article_id, status)] = time.perf_counter()  # stamped just before commit
+        expected = clients * updates
+        deadline = time.perf_counter() + 30
+        while len(latencies) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "delivered": len(latencies),
+        "expected": expected,
+        "events_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else None,
+        "rss_per_client_kb": (connected_rss - idle_rss) / clients,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", default="50,200,500", help="comma-separated client counts")
+    parser.add_argument("--updates", type=int, default=50, help="status changes per level")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+                              env={**os.environ, "SSE_CLIENT_QUEUE_SIZE": str(args.updates + 10)})
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/")
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        cleanup()
+        ids = seed(max(1, args.updates // 2))
+        print(f"{'clients':>7} {'delivered':>11} {'events/s':>9} {'p50 ms':>7} {'p99 ms':>7} {'KB/client':>9}")
+        for clients in (int(level) for level in args.clients.split(",")):
+            result = asyncio.run(run_level(base_url, clients, ids, args.updates, server.pid))
+            print(f"{result['clients']:7d} {result['delivered']:5d}/{result['expected']:<5d} {result['events_per_s']:9.0f} "
+                  f"{result['p50_ms']:7.1f} {result['p99_ms']:7.1f} {result['rss_per_client_kb']:9.1f}")
+    finally:
+        cleanup()
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
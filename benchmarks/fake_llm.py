@@ -0,0 +1,97 @@
+"""Local stand-in for the OpenAI chat-completions API with configurable latency and throttling."""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = "Suomen etu edellyttää vastuullista taloudenpitoa ja omavaraisuutta. "
+
+
+class FakeLLMServer:
+    """Serves /v1/chat/completions in a background thread; use as a context manager.
+
+    latency is seconds per request (plus up to `jitter`, plus `token_latency` per generated
+    token), capacity is how many requests may be in flight before the server answers 429,
+    and error_rate adds random 500s.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.1, capacity=None, error_rate=0.0, retry_after="0.5", port=0, token_latency=0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.jitter = jitter
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.counts = {"ok": 0, "throttled": 0, "errors": 0}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server.lock:
+                    throttled = server.capacity is not None and server.in_flight >= server.capacity
+                    if not throttled:
+                        server.in_flight += 1
+                if throttled:
+                    server.counts["throttled"] += 1
+                    self.reply(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}}, {"Retry-After": server.retry_after})
+                    return
+                try:
+                    reply = server.completion(request)
+                    time.sleep(server.latency + random.random() * server.jitter + reply["usage"]["completion_tokens"] * server.token_latency)
+                    if random.random() < server.error_rate:
+                        server.counts["errors"] += 1
+                        self.reply(500, {"error": {"message": "Internal error", "type": "server_error"}})
+                        return
+                    server.counts["ok"] += 1
+                    self.reply(200, reply)
+                finally:
+                    with server.lock:
+                        server.in_flight -= 1
+
+            def reply(self, status, body, headers=None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def completion(self, request):
+        prompt_chars = sum(len(message.get("content", "")) for message in request.get("messages", []))
+        max_tokens = request.get("max_tokens") or 700
+        completion_tokens = max(1, min(max_tokens, prompt_chars // 5))
+        text = (REPLY * (completion_tokens * 4 // len(REPLY) + 1))[:completion_tokens * 4]
+        return {
+            "id": f"chatcmpl-fake-{random.getrandbits(32):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                         "finish_reason": "length" if completion_tokens == max_tokens else "stop"}],
+            "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_chars // 4 + completion_tokens},
+        }
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,332 @@
+"""Runs the end-to-end benchmark suite against local stand-ins and saves the results.
+
+Usage: python -m benchmarks.run [--scenarios scrape,rewrite,api] [--feeds 20] [--articles 200] [--requests 1000]
+
+Creates a throwaway database on the DATABASE_URL server (bench_<pid>), migrates it to head and
+runs each scenario in a fresh process against it, so peak memory figures do not bleed into each
+other. The scenarios are:
+
+  scrape   scrape_hs_rss over the stub RSS/article server
+  rewrite  process_batch against the fake chat-completions server
+  api      the FastAPI endpoints served by uvicorn, under concurrent load
+
+Results go to benchmarks/results/<timestamp>-<commit>.json and are compared with the previous run.
+The suite needs Postgres (search, near-duplicate and queue queries use Postgres-only SQL).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import pathlib
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+RESULTS_DIR = pathlib.Path(__file__).resolve().parent / "results"
+REPO_DIR = pathlib.Path(__file__).resolve().parent.parent
+SCENARIOS = ("scrape", "rewrite", "api")
+SOURCE = "bench-run"
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else None
+
+
+def summarize(latencies_s, elapsed, **extra):
+    """Throughput and p50/p99 latency (ms) for one scenario."""
+    return {
+        "operations": len(latencies_s),
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(latencies_s) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(latencies_s, 0.5) * 1000, 2) if latencies_s else None,
+        "p99_ms": round(percentile(latencies_s, 0.99) * 1000, 2) if latencies_s else None,
+        **extra,
+    }
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+def process_peak_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+
+def seed_articles(count, status="not_selected"):
+    """Inserts `count` distinct articles from the stub text generator and returns their ids."""
+    from benchmarks.stub_server import article_text
+    from database import db_connection
+    from psycopg2.extras import execute_values
+
+    rows = [(f"Bench {status} {i}", "\n".join(article_text(f"{status}-{i}")), f"bench://{status}/{i}", SOURCE, status, status == "pending")
+            for i in range(count)]
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        ids = execute_values(cursor, """
+            INSERT INTO articles (title, content, source_url, source, rewrite_status, selected_for_rewrite, created_at)
+            VALUES %s RETURNING id
+        """, rows, template="(%s, %s, %s, %s, %s, %s, now())", page_size=1000, fetch=True)
+        cursor.close()
+    return [row[0] for row in ids]
+
+
+# --- scenarios (each runs in its own process) ---
+
+def run_scrape(args):
+    from benchmarks.stub_server import StubServer
+    from fetcher import Fetcher
+    from scraper import scrape_hs_rss_async
+
+    latencies = []
+
+    class TimedFetcher(Fetcher):
+        async def get(self, url, *a, **kw):
+            started = time.perf_counter()
+            try:
+                return await super().get(url, *a, **kw)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+    async def scrape(feeds):
+        async with TimedFetcher(max_connections=args.per_host, per_host=args.per_host, rate=args.rate, burst=args.per_host) as fetcher:
+            return await scrape_hs_rss_async(fetcher, feeds=feeds)
+
+    with StubServer(items=args.items, latency=args.latency) as server:
+        urls = server.feed_urls(tuple(f"feed{i}" for i in range(args.feeds)))
+        feeds = [{"source": "bench", "name": "Bench", "url": url, "poll_interval": 60, "concurrency": args.per_host, "extractor": {}}
+                 for url in urls]
+        started = time.perf_counter()
+        saved = asyncio.run(scrape(feeds))
+        elapsed = time.perf_counter() - started
+    # Throughput counts stored articles; latency is per HTTP request (feeds and articles)
+    result = summarize(latencies, elapsed, articles=len(saved), articles_per_s=round(len(saved) / elapsed, 2))
+    result["peak_rss_mb"] = peak_rss_mb()
+    result["parse_pool_peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    return result
+
+
+def run_rewrite(args):
+    from benchmarks.fake_llm import FakeLLMServer
+
+    with FakeLLMServer(latency=args.llm_latency, capacity=args.llm_capacity) as server:
+        os.environ.update(OPENAI_BASE_URL=server.base_url, OPENAI_API_KEY="fake", REWRITE_CACHE="off",
+                          LLM_CONCURRENCY=str(args.llm_concurrency))
+        from batch_rewrite import process_batch
+        from database import db_connection
+
+        ids = seed_articles(args.articles, status="pending")
+        started = time.perf_counter()
+        process_batch()
+        elapsed = time.perf_counter() - started
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT latency_ms FROM rewritten_articles WHERE original_article_id = ANY(%s)", (ids,))
+            latencies = [row[0] / 1000 for row in cursor.fetchall()]
+            cursor.close()
+        result = summarize(latencies, elapsed, queued=len(ids), llm_requests=dict(server.counts))
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+async def drive_api(base_url, requests, concurrency):
+    """Sends (label, path) requests from `concurrency` clients; returns latencies per label, errors and elapsed time."""
+    import httpx
+
+    latencies = {}
+    errors = 0
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    async def client(http):
+        nonlocal errors
+        while not queue.empty():
+            label, path = queue.get_nowait()
+            started = time.perf_counter()
+            response = await http.get(base_url + path)
+            latencies.setdefault(label, []).append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def run_api(args):
+    import httpx
+
+    ids = seed_articles(args.articles)
+    mix = [
+        ("list", lambda i: "/articles/?limit=50"),
+        ("list_source", lambda i: f"/articles/?limit=20&source={SOURCE}"),
+        ("detail", lambda i: f"/articles/{ids[i % len(ids)]}"),
+        ("search", lambda i: "/articles/search?q=talousarvio&limit=20"),
+    ]
+    requests = [(label, path(i)) for i in range(args.requests) for label, path in [mix[i % len(mix)]]]
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+                              cwd=REPO_DIR)
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/")
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        asyncio.run(drive_api(base_url, requests[:args.concurrency * 4], args.concurrency))  # warm up pools and plans
+        latencies, errors, elapsed = asyncio.run(drive_api(base_url, requests, args.concurrency))
+        server_rss = process_peak_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    result = summarize([value for values in latencies.values() for value in values], elapsed, errors=errors)
+    result["endpoints"] = {label: summarize(values, elapsed) for label, values in sorted(latencies.items())}
+    result["peak_rss_mb"] = server_rss
+    return result
+
+
+RUNNERS = {"scrape": run_scrape, "rewrite": run_rewrite, "api": run_api}
+
+
+# --- orchestration ---
+
+@contextmanager
+def scratch_database(keep=False):
+    """Creates a fresh database next to DATABASE_URL, migrates it to head and yields its URL."""
+    from sqlalchemy import create_engine, make_url, text
+    from database import DATABASE_URL
+
+    url = make_url(DATABASE_URL)
+    name = f"bench_{os.getpid()}"
+    admin = create_engine(url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE "{name}"'))
+    scratch_url = url.set(database=name).render_as_string(hide_password=False)
+    try:
+        subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=REPO_DIR, check=True,
+                       env={**os.environ, "DATABASE_URL": scratch_url}, capture_output=True)
+        yield scratch_url
+    finally:
+        if keep:
+            print(f"🔹 Kept benchmark database {name}")
+        else:
+            with admin.connect() as conn:
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+        admin.dispose()
+
+
+def run_scenario(scenario, argv, database_url):
+    """Runs one scenario in a child process and returns its result dict."""
+    with tempfile.NamedTemporaryFile(suffix=".json") as output:
+        child = subprocess.run([sys.executable, "-m", "benchmarks.run", *argv, "--child", scenario, "--output", output.name],
+                               cwd=REPO_DIR, env={**os.environ, "DATABASE_URL": database_url},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if child.returncode != 0:
+            return {"error": child.stderr.strip().splitlines()[-1] if child.stderr.strip() else f"exit {child.returncode}"}
+        return json.loads(pathlib.Path(output.name).read_text())
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def previous_run(results_dir):
+    runs = sorted(results_dir.glob("*.json"))
+    return json.loads(runs[-1].read_text()) if runs else None
+
+
+def change(new, old):
+    if new is None or not old:
+        return ""
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def report(results, previous):
+    print(f"{'scenario':<10} {'ops':>6} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak MB':>8}   vs previous (ops/s, p99)")
+    for scenario, result in results.items():
+        if "error" in result:
+            print(f"{scenario:<10} ❌ {result['error']}")
+            continue
+        old = (previous or {}).get("results", {}).get(scenario, {})
+        print(f"{scenario:<10} {result['operations']:6d} {result['throughput'] or 0:9.1f} {result['p50_ms'] or 0:9.1f} "
+              f"{result['p99_ms'] or 0:9.1f} {result['peak_rss_mb'] or 0:8.1f}   "
+              f"{change(result['throughput'], old.get('throughput'))} {change(result['p99_ms'], old.get('p99_ms'))}")
+        for label, endpoint in result.get("endpoints", {}).items():
+            print(f"  {label:<11} {endpoint['operations']:3d} {'':>9} {endpoint['p50_ms']:9.1f} {endpoint['p99_ms']:9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--feeds", type=int, default=20, help="stub RSS feeds to scrape")
+    parser.add_argument("--items", type=int, default=10, help="items per stub feed (the pipeline takes at most 10 per feed)")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub server latency per request (s)")
+    parser.add_argument("--rate", type=float, default=500.0, help="fetcher requests per second per host")
+    parser.add_argument("--per-host", type=int, default=16, help="fetcher connections per host")
+    parser.add_argument("--articles", type=int, default=200, help="articles seeded for the rewrite and api scenarios")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake model latency per request (s)")
+    parser.add_argument("--llm-capacity", type=int, default=32, help="requests in flight before the fake model answers 429")
+    parser.add_argument("--llm-concurrency", type=int, default=16, help="LLM_CONCURRENCY for the rewrite worker")
+    parser.add_argument("--requests", type=int, default=1000, help="API requests in the api scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent API clients")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--results-dir", type=pathlib.Path, default=RESULTS_DIR)
+    parser.add_argument("--keep-db", action="store_true", help="keep the scratch database for inspection")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        logging.basicConfig(handlers=[logging.NullHandler()])  # keeps batch_rewrite from appending to its log file
+        pathlib.Path(args.output).write_text(json.dumps(RUNNERS[args.child](args)))
+        return
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    started_at = datetime.now(timezone.utc)
+    results = {}
+    with scratch_database(args.keep_db) as database_url:
+        for scenario in scenarios:
+            print(f"🔹 Running {scenario}...")
+            results[scenario] = run_scenario(scenario, sys.argv[1:], database_url)
+
+    previous = previous_run(args.results_dir)
+    run = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {key: (str(value) if isinstance(value, pathlib.Path) else value) for key, value in vars(args).items()
+                     if key not in ("child", "output", "keep_db", "results_dir")},
+        "results": results,
+    }
+    args.results_dir.mkdir(parents=True, exist_ok=True)
+    path = args.results_dir / f"{started_at:%Y%m%dT%H%M%S}-{run['commit']}.json"
+    path.write_text(json.dumps(run, indent=2) + "\n")
+    report(results, previous)
+    print(f"✅ Saved {path.relative_to(REPO_DIR) if path.is_relative_to(REPO_DIR) else path}")
+
+
+if __name__ == "__main__":
+    main()
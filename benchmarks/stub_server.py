@@ -0,0 +1,97 @@
+"""Local stand-in for HS.fi: serves generated RSS feeds and article pages with configurable latency."""
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PARAGRAPH = "Helsingin kaupunginvaltuusto käsitteli keskiviikkona talousarviota, ja keskustelu venyi myöhään iltaan."
+WORDS = ("hallitus eduskunta kunta talous budjetti vaalit puolue ministeri kaupunki yritys työ palkka vero koulu "
+         "sairaala liikenne rautatie energia sähkö tuuli ilmasto metsä järvi poliisi oikeus tutkimus yliopisto "
+         "urheilu ottelu joukkue kulttuuri teatteri kirja musiikki asunto vuokra korko pankki pörssi osake").split()
+
+
+def rss_feed(base_url, feed, items):
+    """Builds an HS-style RSS document whose items link back to the stub server."""
+    entries = "".join(
+        f"<item><title>Uutinen {feed}-{i}</title><link>{base_url}/article/{feed}-{i}.html</link>"
+        f"<pubDate>Mon, 03 Mar 2025 08:{i % 60:02d}:00 +0200</pubDate>"
+        f"<dc:creator>Toimittaja {i}</dc:creator></item>"
+        for i in range(items)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        f"<channel><title>{feed}</title>{entries}</channel></rss>"
+    ).encode("utf-8")
+
+
+def article_text(slug, paragraphs=12):
+    """Returns deterministic per-slug paragraphs, varied enough that pages are not near-duplicates."""
+    rng = random.Random(slug)
+    return [PARAGRAPH + " " + " ".join(rng.choices(WORDS, k=24)) + "." for _ in range(paragraphs)]
+
+
+def article_page(slug, paragraphs=12):
+    """Builds an HS-style article page with a header, body and trailing boilerplate."""
+    body = "".join(f"<p>{paragraph}</p>" for paragraph in article_text(slug, paragraphs))
+    boilerplate = "".join(f"<li><a href='/muut/{i}'>Lue myös {i}</a></li>" for i in range(200))
+    return (
+        "<!DOCTYPE html><html><head><title>HS</title>"
+        "<meta itemprop='datePublished' content='2025-03-03T08:00:00+02:00'></head><body>"
+        f"<nav><ul>{boilerplate}</ul></nav><article><h1>{slug}</h1>"
+        f"<div class='article-body'>{body}</div></article>"
+        f"<footer><ul>{boilerplate}</ul></footer></body></html>"
+    ).encode("utf-8")
+
+
+class StubServer:
+    """Runs the stub site in a background thread; use as a context manager."""
+
+    def __init__(self, items=10, latency=0.05, port=0):
+        self.items = items
+        self.latency = latency
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(server.latency)
+                if self.path.startswith("/rss/"):
+                    feed = self.path.rsplit("/", 1)[-1].removesuffix(".xml")
+                    payload, content_type = rss_feed(server.base_url, feed, server.items), "application/rss+xml"
+                elif self.path.startswith("/article/"):
+                    slug = self.path.rsplit("/", 1)[-1].removesuffix(".html")
+                    payload, content_type = article_page(slug), "text/html; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def feed_urls(self, feeds=("suomi", "maailma", "politiikka")):
+        return [f"{self.base_url}/rss/{feed}.xml" for feed in feeds]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,110 @@
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; responses fall back to gzip
+    brotli = None
+
+# Article detail responses kept in memory per API process, bounded by total body bytes
+ARTICLE_CACHE_BYTES = int(os.getenv("ARTICLE_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 512
+ENTRY_OVERHEAD_BYTES = 256  # dict, key and ETag bookkeeping per entry
+
+class Encoded:
+    """One response body with its ETag and precompressed variants."""
+
+    __slots__ = ("etag", "bodies", "size")
+
+    def __init__(self, payload):
+        self.etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+        self.bodies = {"identity": payload}
+        if len(payload) >= COMPRESS_MIN_BYTES:
+            self.bodies["gzip"] = gzip.compress(payload, 6, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(payload, quality=5)
+        self.size = sum(len(body) for body in self.bodies.values()) + ENTRY_OVERHEAD_BYTES
+
+    def body_for(self, accept_encoding):
+        """Returns (content encoding or None, body) for an Accept-Encoding header."""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.bodies:
+                return encoding, self.bodies[encoding]
+        return None, self.bodies["identity"]
+
+def accepted_encodings(header):
+    """Codings named in an Accept-Encoding header, minus those refused with q=0."""
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+class ByteLRU:
+    """Least-recently-used cache bounded by the summed size of its values, not their count.
+
+    Values need a `size` attribute. `token()`/`put(..., token)` guard against a read that
+    started before an invalidation putting its stale result back into the cache.
+    """
+
+    def __init__(self, max_bytes=ARTICLE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.invalidations = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "stale_puts": 0}
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.stats["misses"] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def token(self):
+        return self.invalidations
+
+    def put(self, key, value, token=None):
+        if token is not None and token != self.invalidations:
+            self.stats["stale_puts"] += 1
+            return False
+        if value.size > self.max_bytes:
+            return False
+        self._drop(key)
+        self.entries[key] = value
+        self.bytes += value.size
+        while self.bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.stats["evictions"] += 1
+        return True
+
+    def invalidate(self, keys):
+        self.invalidations += 1
+        for key in keys:
+            if self._drop(key):
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        self.invalidations += 1
+        self.entries.clear()
+        self.bytes = 0
+
+    def _drop(self, key):
+        value = self.entries.pop(key, None)
+        if value is not None:
+            self.bytes -= value.size
+        return value is not None
+
+    def describe(self):
+        return {"entries": len(self.entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                "brotli": brotli is not None, **self.stats}
@@ -0,0 +1,106 @@
+import math
+import os
+import re
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; token counts fall back to a character estimate
+    tiktoken = None
+
+# Articles longer than CHUNK_TOKENS are rewritten in paragraph-aligned chunks of about this size
+CHUNK_TOKENS = int(os.getenv("REWRITE_CHUNK_TOKENS", "1200"))
+# Output budget per chunk: the rewrite may run OUTPUT_RATIO times the input, plus a fixed margin
+OUTPUT_RATIO = float(os.getenv("REWRITE_OUTPUT_RATIO", "1.3"))
+OUTPUT_MARGIN_TOKENS = 64
+MIN_OUTPUT_TOKENS = int(os.getenv("REWRITE_MIN_OUTPUT_TOKENS", "700"))
+MAX_OUTPUT_TOKENS = int(os.getenv("REWRITE_MAX_OUTPUT_TOKENS", "4096"))
+# Without tiktoken: a conservative characters-per-token estimate for Finnish text
+CHARS_PER_TOKEN = 3
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+_encodings = {}
+
+def encoding_for(model):
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model]
+
+def count_tokens(text, model=None):
+    """Counts tokens with the model's tokenizer when tiktoken is installed, else estimates from length."""
+    encoding = encoding_for(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def output_budget(input_tokens):
+    """max_tokens for rewriting `input_tokens` of article text."""
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, math.ceil(input_tokens * OUTPUT_RATIO) + OUTPUT_MARGIN_TOKENS))
+
+def split_words(text, limit, model):
+    """Splits text at spaces into pieces of at most `limit` tokens; a single longer word is cut in halves."""
+    tokens = count_tokens(text, model)
+    if tokens <= limit or len(text) < 2:
+        return [text]
+    words = text.split(" ")
+    if len(words) == 1:
+        middle = len(text) // 2
+        return split_words(text[:middle], limit, model) + split_words(text[middle:], limit, model)
+    # Sized from the average token density, then re-checked: dense stretches are split again
+    step = max(1, min(len(words) // 2, len(words) * limit // tokens))
+    pieces = []
+    for start in range(0, len(words), step):
+        pieces.extend(split_words(" ".join(words[start:start + step]), limit, model))
+    return pieces
+
+def split_oversized(text, limit, model):
+    """Splits one paragraph that alone exceeds `limit` into units of at most `limit` tokens, at sentence ends, then at words."""
+    pieces = []
+    for sentence in SENTENCE_END_RE.split(text):
+        pieces.extend(split_words(sentence, limit, model))
+    units, current = [], []
+    for piece in pieces:
+        if current and count_tokens(" ".join(current + [piece]), model) > limit:
+            units.append(" ".join(current))
+            current = []
+        current.append(piece)
+    if current:
+        units.append(" ".join(current))
+    return units
+
+def plan_chunks(text, model=None, chunk_tokens=CHUNK_TOKENS):
+    """Splits article text at paragraph boundaries into chunks of at most `chunk_tokens` tokens.
+
+    Returns [(chunk text, token count)]; an article that fits is a single chunk. Chunk sizes
+    are evened out (an 1800-token article becomes two ~900-token chunks, not 1200 + 600) so
+    the concurrent requests finish at about the same time.
+    """
+    paragraphs = [paragraph.strip() for paragraph in text.split("\n") if paragraph.strip()]
+    total = count_tokens(text, model)
+    if total <= chunk_tokens:
+        return [(text.strip(), total)]
+
+    units = []
+    for paragraph in paragraphs:
+        tokens = count_tokens(paragraph, model)
+        if tokens > chunk_tokens:
+            units.extend((piece, count_tokens(piece, model)) for piece in split_oversized(paragraph, chunk_tokens, model))
+        else:
+            units.append((paragraph, tokens))
+
+    target = total / math.ceil(total / chunk_tokens)
+    chunks, current, current_tokens = [], [], 0
+    for paragraph, tokens in units:
+        if current and (current_tokens + 1 + tokens > chunk_tokens or current_tokens >= target):
+            chunks.append(("\n".join(current), current_tokens))
+            current, current_tokens = [], 0
+        current_tokens += tokens + (1 if current else 0)  # one token allowed for the joining newline
+        current.append(paragraph)
+    if current:
+        chunks.append(("\n".join(current), current_tokens))
+    return chunks
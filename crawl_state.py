@@ -0,0 +1,92 @@
+import os
+from datetime import timezone
+from psycopg2.extras import execute_values
+from database import db_connection
+
+# Failed items are retried with exponential backoff until they run out of attempts
+MAX_ATTEMPTS = int(os.getenv("CRAWL_MAX_ATTEMPTS", "3"))
+RETRY_BACKOFF_SECONDS = int(os.getenv("CRAWL_RETRY_BACKOFF_SECONDS", "300"))
+
+def utc_naive(value):
+    """Converts an aware datetime to naive UTC for the timestamp columns; naive values pass through."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def new_items(items, cache):
+    """Returns feed items newer than the feed's stored cursor.
+
+    Dated items are compared with the newest pubDate seen; undated feeds are assumed to list
+    newest first and are read up to the last seen GUID.
+    """
+    last_guid = cache and cache.get("last_guid")
+    last_published_at = cache and cache.get("last_published_at")
+    fresh = []
+    for item in items:
+        if last_published_at and item["published_at"]:
+            if utc_naive(item["published_at"]) <= last_published_at:
+                continue
+        elif last_guid and item["guid"] == last_guid:
+            break
+        fresh.append(item)
+    return fresh
+
+def feed_cursor(items):
+    """Returns the (guid, published_at) of the newest item in a parsed feed."""
+    dated = [item for item in items if item["published_at"]]
+    if dated:
+        newest = max(dated, key=lambda item: item["published_at"])
+        return newest["guid"], utc_naive(newest["published_at"])
+    return (items[0]["guid"], None) if items else (None, None)
+
+def record_items(feed, items):
+    """Checkpoints new feed items as 'pending' crawl items; URLs already tracked are left alone."""
+    if not items:
+        return
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            INSERT INTO crawl_items (url, feed_url, guid, title, author, published_at)
+            VALUES %s
+            ON CONFLICT (url) DO NOTHING
+        """, [(item["link"], feed["url"], item["guid"], item["title"], item["author"], utc_naive(item["published_at"])) for item in items])
+        cursor.close()
+
+def due_items(feed_url, limit):
+    """Returns the feed's pending items and failed items whose retry is due, newest first."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT url, guid, title, author, published_at FROM crawl_items
+            WHERE feed_url = %s AND status IN ('pending', 'failed') AND attempts < %s AND next_attempt_at <= now()
+            ORDER BY published_at DESC NULLS LAST, created_at DESC
+            LIMIT %s
+        """, (feed_url, MAX_ATTEMPTS, limit))
+        rows = cursor.fetchall()
+        cursor.close()
+    return [{"link": url, "guid": guid, "title": title, "author": author, "published_at": published_at}
+            for url, guid, title, author, published_at in rows]
+
+def mark_fetched(urls):
+    """Marks crawl items as fetched and stored."""
+    if not urls:
+        return
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE crawl_items SET status = 'fetched', last_error = NULL, updated_at = now()
+            WHERE url = ANY(%s)
+        """, (list(urls),))
+        cursor.close()
+
+def mark_failed(url, error):
+    """Records a failed attempt and schedules the next one with exponential backoff."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE crawl_items
+            SET status = 'failed', attempts = attempts + 1, last_error = %s, updated_at = now(),
+                next_attempt_at = now() + make_interval(secs => %s * power(2, attempts))
+            WHERE url = %s
+        """, (str(error)[:1000], RETRY_BACKOFF_SECONDS, url))
+        cursor.close()
@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine, MetaData
+from contextlib import contextmanager
+from sqlalchemy import URL, create_engine, event, make_url, MetaData
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
@@ -6,16 +8,72 @@ from dotenv import load_dotenv
 # Load database credentials from .env file
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+# DATABASE_URL wins; otherwise build it from the DB_* variables the older scripts used
+DATABASE_URL = os.getenv("DATABASE_URL") or URL.create(
+    "postgresql+psycopg2",
+    username=os.getenv("DB_USER", "news_admin"),
+    password=os.getenv("DB_PASSWORD"),
+    host=os.getenv("DB_HOST", "localhost"),
+    database=os.getenv("DB_NAME", "news_platform"),
+)
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
 
-# Create database engine
-engine = create_engine(DATABASE_URL)
+# Pool settings shared by the API, scraper and rewrite workers
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
 
-# Create a session factory
+pool_options = dict(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT,
+                    pool_recycle=POOL_RECYCLE, pool_pre_ping=True)
+
+# Create database engines (sync for scripts and workers, async for the FastAPI app)
+engine = create_engine(DATABASE_URL, connect_args={"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"}, **pool_options)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, connect_args={"server_settings": {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}}, **pool_options)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
 
 # ✅ Add this to define Base
 Base = declarative_base()
 
 # Metadata object to manage table creation
-metadata = MetaData()
\ No newline at end of file
+metadata = MetaData()
+
+statement_timeouts = 0
+
+def _count_statement_timeouts(context):
+    global statement_timeouts
+    # 57014 = query_canceled, raised when statement_timeout fires
+    if getattr(context.original_exception, "pgcode", None) == "57014" or getattr(context.original_exception, "sqlstate", None) == "57014":
+        statement_timeouts += 1
+
+event.listen(engine, "handle_error", _count_statement_timeouts)
+event.listen(async_engine.sync_engine, "handle_error", _count_statement_timeouts)
+
+@contextmanager
+def db_connection():
+    """Yields a pooled DBAPI connection; commits on success and rolls back on error."""
+    conn = engine.raw_connection()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()  # returns the connection to the pool
+
+def pool_stats():
+    """Returns current pool usage for both engines plus statement-timeout counts."""
+    def describe(pool):
+        return {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow(), "checked_in": pool.checkedin()}
+    return {
+        "sync": describe(engine.pool),
+        "async": describe(async_engine.pool),
+        "max_overflow": MAX_OVERFLOW,
+        "statement_timeout_ms": STATEMENT_TIMEOUT_MS,
+        "statement_timeouts": statement_timeouts,
+    }
@@ -1,6 +1,6 @@
-from database import engine
-from models import Base
-
-# Create tables in the database
-Base.metadata.create_all(bind=engine)
+import os
+from alembic import command
+from alembic.config import Config
 
+# Create or upgrade the tables in the database through the Alembic migrations
+command.upgrade(Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")), "head")
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import asyncpg
+from database import ASYNC_DATABASE_URL
+
+# Channel written by the notify_article_status trigger (see migration 9b41e7d2c015)
+CHANNEL = "article_status"
+# Content changes that leave the status alone (new rewrites, archiving); payload is a JSON id list
+CHANGE_CHANNEL = "article_changed"
+NOTIFY_IDS_PER_MESSAGE = 500  # keeps payloads well under Postgres' 8000-byte limit
+CLIENT_QUEUE_SIZE = int(os.getenv("SSE_CLIENT_QUEUE_SIZE", "100"))
+RECONNECT_SECONDS = 2.0
+
+def listener_dsn():
+    """Plain asyncpg DSN for the dedicated LISTEN connection."""
+    return ASYNC_DATABASE_URL.set(drivername="postgresql").render_as_string(hide_password=False)
+
+class ArticleEvents:
+    """Fans article status notifications from one LISTEN connection out to bounded per-client queues.
+
+    A client that falls CLIENT_QUEUE_SIZE events behind has its backlog replaced by a single
+    "resync" event, so a stalled browser can't make the API buffer without limit.
+    """
+
+    def __init__(self, dsn=None, queue_size=CLIENT_QUEUE_SIZE):
+        self.dsn = dsn
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.change_listeners = []
+        self.connection = None
+        self.task = None
+        self.sequence = 0
+        self.stats = {"notifications": 0, "delivered": 0, "resyncs": 0}
+
+    async def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._listen())
+
+    @property
+    def listening(self):
+        """True while the LISTEN connection is up, i.e. while change notifications are being received."""
+        return (self.task is not None and not self.task.done()
+                and self.connection is not None and not self.connection.is_closed())
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.connection is not None and not self.connection.is_closed():
+            await self.connection.close()
+        self.connection = None
+
+    async def _listen(self):
+        """Keeps a LISTEN connection open, reconnecting (and telling clients to resync) when it drops."""
+        connected = False
+        while True:
+            lost = asyncio.Event()
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn or listener_dsn())
+                connection.add_termination_listener(lambda connection: lost.set())
+                await connection.add_listener(CHANNEL, self._on_notify)
+                await connection.add_listener(CHANGE_CHANNEL, self._on_change)
+                # Only a connection with both listeners in place counts as listening
+                self.connection = connection
+                if connected:
+                    self.broadcast("resync", {})  # changes made while disconnected were missed
+                    self._changed(None)
+                connected = True
+                await lost.wait()
+            except Exception as e:  # any failure (including asyncpg.InterfaceError) must end in a reconnect
+                print(f"⚠️ Article event listener failed: {e}")
+                connected = True  # whatever was received before the failure may be stale now
+            finally:
+                self.connection = None
+                if connection is not None and not connection.is_closed():
+                    connection.terminate()
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.stats["notifications"] += 1
+        change = json.loads(payload)
+        self._changed([change["id"]])
+        self.broadcast("status", change)
+
+    def _on_change(self, connection, pid, channel, payload):
+        self._changed(json.loads(payload))
+
+    def on_change(self, callback):
+        """Registers callback(ids) for changed articles; ids is None when changes may have been missed."""
+        self.change_listeners.append(callback)
+
+    def _changed(self, ids):
+        for callback in self.change_listeners:
+            callback(ids)
+
+    def broadcast(self, event, data):
+        self.sequence += 1
+        message = (self.sequence, event, data)
+        for queue in self.subscribers:
+            if queue.full():
+                self.stats["resyncs"] += 1
+                while not queue.empty():
+                    queue.get_nowait()
+                message_for_client = (self.sequence, "resync", {})
+            else:
+                message_for_client = message
+            queue.put_nowait(message_for_client)
+            self.stats["delivered"] += 1
+
+    async def subscribe(self):
+        await self.start()
+        queue = asyncio.Queue(self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+def notify_changed(cursor, ids):
+    """Announces changed articles to API processes once the caller's transaction commits."""
+    ids = list(ids)
+    for start in range(0, len(ids), NOTIFY_IDS_PER_MESSAGE):
+        cursor.execute("SELECT pg_notify(%s, %s)", (CHANGE_CHANNEL, json.dumps(ids[start:start + NOTIFY_IDS_PER_MESSAGE])))
+
+def format_event(sequence, event, data):
+    """Renders one Server-Sent Events message."""
+    return f"id: {sequence}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
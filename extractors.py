@@ -0,0 +1,203 @@
+import codecs
+import os
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional; the BeautifulSoup backend needs only bs4
+    etree = None
+
+# Article containers in order of preference, and where the publication date lives
+ARTICLE_SELECTORS = ["div.article-body", "div.hs-article-content", "article"]
+DATE_SELECTOR = "meta[itemprop='datePublished']"
+
+CHUNK_SIZE = 16 * 1024
+
+# The charset a page declares in <meta charset> or <meta http-equiv="Content-Type">, looked for near the top
+META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+SNIFF_BYTES = 4096
+BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+SELECTOR_RE = re.compile(r"^(?P<tag>[\w-]+)(?:\.(?P<cls>[\w-]+))?(?:\[(?P<attr>[\w-]+)='(?P<value>[^']*)'\])?$")
+
+def parse_selector(selector):
+    """Parses a simple `tag`, `tag.class` or `tag[attr='value']` selector into a match tuple."""
+    match = SELECTOR_RE.match(selector)
+    if not match:
+        raise ValueError(f"Unsupported selector: {selector}")
+    return match["tag"], match["cls"], match["attr"], match["value"]
+
+def element_strings(element):
+    """Yields an lxml element's text nodes, skipping comments and script/style bodies."""
+    if element.tag not in ("script", "style") and element.text:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str):
+            yield from element_strings(child)
+        if child.tail:
+            yield child.tail
+
+def sniff_encoding(data):
+    """Encoding for page bytes that came without a charset header.
+
+    Returns None for a byte-order mark (the parser detects those itself), the charset
+    declared in a meta tag when Python knows it, and UTF-8 otherwise.
+    """
+    if data.startswith(BOMS):
+        return None
+    match = META_CHARSET_RE.search(data[:SNIFF_BYTES])
+    if match:
+        label = match[1].decode("ascii")
+        try:
+            codecs.lookup(label)
+            return label
+        except LookupError:
+            pass
+    return "utf-8"
+
+def strip_join(strings):
+    """Joins text pieces the way BeautifulSoup's get_text(strip=True) does."""
+    return "".join(s.strip() for s in strings if s and s.strip())
+
+class SoupExtractor:
+    """Builds a full BeautifulSoup tree and selects the article container from it."""
+
+    name = "bs4"
+
+    def __init__(self, selectors=ARTICLE_SELECTORS, date_selector=DATE_SELECTOR):
+        self.selectors = selectors
+        self.date_selector = date_selector
+
+    def extract(self, data, encoding=None):
+        """Returns (content, published_at) from raw page bytes."""
+        soup = BeautifulSoup(data, "html.parser", from_encoding=encoding)
+        date_element = soup.select_one(self.date_selector)
+        published_at = date_element.get("content") if date_element else None
+
+        for selector in self.selectors:
+            article_body = soup.select_one(selector)
+            if article_body:
+                paragraphs = article_body.find_all("p")
+                content = "\n".join([p.get_text(strip=True) for p in paragraphs]) if paragraphs else article_body.get_text(strip=True)
+                return content, published_at
+        return None, published_at
+
+class LxmlStreamExtractor:
+    """Feeds page bytes to an lxml pull parser and stops once the preferred container closes."""
+
+    name = "lxml"
+
+    def __init__(self, selectors=ARTICLE_SELECTORS, date_selector=DATE_SELECTOR):
+        if etree is None:
+            raise RuntimeError("The lxml extractor requires the lxml package")
+        self.containers = [parse_selector(selector) for selector in selectors]
+        self.date_rule = parse_selector(date_selector)
+
+    @staticmethod
+    def _matches(element, rule):
+        tag, cls, attr, value = rule
+        if element.tag != tag:
+            return False
+        if cls and cls not in (element.get("class") or "").split():
+            return False
+        return not attr or element.get(attr) == value
+
+    def _rank(self, element):
+        for rank, rule in enumerate(self.containers):
+            if self._matches(element, rule):
+                return rank
+        return None
+
+    def extract(self, data, encoding=None):
+        """Returns (content, published_at) from raw page bytes without building the whole tree."""
+        parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding or sniff_encoding(data))
+        published_at = None
+        found = {}
+        keep = set()
+        open_containers = 0
+        done = False
+
+        for offset in range(0, len(data), CHUNK_SIZE):
+            parser.feed(data[offset:offset + CHUNK_SIZE])
+            for event, element in parser.read_events():
+                if not isinstance(element.tag, str):
+                    continue
+                rank = self._rank(element)
+                if event == "start":
+                    if published_at is None and self._matches(element, self.date_rule):
+                        published_at = element.get("content")
+                    if rank is not None:
+                        if rank not in found:
+                            found[rank] = element
+                            keep.update(element.iterancestors())
+                        open_containers += 1
+                    continue
+
+                if rank is not None:
+                    open_containers -= 1
+                    if rank == 0 and found[0] is element:
+                        done = True
+                        break
+                elif open_containers == 0 and element not in keep:
+                    # Outside any candidate container: drop finished subtrees to keep memory flat
+                    element.clear()
+                    while element.getprevious() is not None:
+                        element.getparent().remove(element.getprevious())
+            if done:
+                break
+
+        if not found:
+            return None, published_at
+        article_body = found[min(found)]
+        paragraphs = list(article_body.iter("p"))
+        if paragraphs:
+            content = "\n".join(strip_join(element_strings(p)) for p in paragraphs)
+        else:
+            content = strip_join(element_strings(article_body))
+        return content, published_at
+
+EXTRACTORS = {SoupExtractor.name: SoupExtractor, LxmlStreamExtractor.name: LxmlStreamExtractor}
+
+def get_extractor(name=None, **rules):
+    """Returns the configured extractor backend (ARTICLE_EXTRACTOR), preferring lxml when installed."""
+    name = name or os.getenv("ARTICLE_EXTRACTOR") or ("lxml" if etree is not None else "bs4")
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown article extractor: {name}")
+    return EXTRACTORS[name](**rules)
+
+_extractors = {}
+
+def parse_article(data, encoding=None, rules=None):
+    """Extracts (content, published_at) from article bytes; safe to run in worker processes.
+
+    `rules` is a source's extractor config ({"selectors": [...], "date_selector": ...});
+    one extractor is built per distinct rule set and reused.
+    """
+    key = (tuple(rules["selectors"]), rules["date_selector"]) if rules else None
+    if key not in _extractors:
+        _extractors[key] = get_extractor(selectors=list(key[0]), date_selector=key[1]) if key else get_extractor()
+    return _extractors[key].extract(data, encoding)
+
+def parse_feed(content):
+    """Parses RSS bytes into a list of item dicts; missing titles become "" and missing guids fall back to the link."""
+    root = ET.fromstring(content)
+    items = []
+    for item in root.findall(".//item"):
+        published_at = item.findtext("pubDate")
+        if published_at:
+            try:
+                published_at = datetime.strptime(published_at, "%a, %d %b %Y %H:%M:%S %z")
+            except ValueError:
+                published_at = None
+        link = (item.findtext("link") or "").strip() or None
+        items.append({
+            "title": (item.findtext("title") or "").strip(),
+            "link": link,
+            "guid": (item.findtext("guid") or "").strip() or link,
+            "published_at": published_at,
+            "author": item.findtext("{http://purl.org/dc/elements/1.1/}creator") or "Tuntematon",
+        })
+    return items
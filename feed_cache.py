@@ -0,0 +1,50 @@
+import hashlib
+from datetime import datetime
+from database import SessionLocal
+from models import FeedCache
+
+def body_hash(content):
+    """Returns the SHA-256 hex digest of a feed body."""
+    return hashlib.sha256(content).hexdigest()
+
+def load_feed_cache(feed_url):
+    """Returns the stored validators for a feed as a dict, or None if the feed was never fetched."""
+    db = SessionLocal()
+    entry = db.get(FeedCache, feed_url)
+    db.close()
+    if entry is None:
+        return None
+    return {"etag": entry.etag, "last_modified": entry.last_modified, "body_hash": entry.body_hash,
+            "last_guid": entry.last_guid, "last_published_at": entry.last_published_at}
+
+def conditional_headers(cache):
+    """Builds If-None-Match / If-Modified-Since headers from a stored cache entry."""
+    headers = {}
+    if cache and cache["etag"]:
+        headers["If-None-Match"] = cache["etag"]
+    if cache and cache["last_modified"]:
+        headers["If-Modified-Since"] = cache["last_modified"]
+    return headers
+
+def store_feed_cache(feed_url, response, digest=None, cursor=None):
+    """Persists the validators from a feed response; `digest` is set when the body changed.
+
+    `cursor` is the (guid, published_at) of the newest item once the feed's new items are checkpointed.
+    """
+    db = SessionLocal()
+    entry = db.get(FeedCache, feed_url)
+    if entry is None:
+        entry = FeedCache(feed_url=feed_url)
+        db.add(entry)
+    now = datetime.utcnow()
+    entry.etag = response.headers.get("ETag", entry.etag)
+    entry.last_modified = response.headers.get("Last-Modified", entry.last_modified)
+    entry.checked_at = now
+    if digest and digest != entry.body_hash:
+        entry.body_hash = digest
+        entry.changed_at = now
+    if cursor and cursor[0]:
+        entry.last_guid = cursor[0]
+        entry.last_published_at = max(filter(None, (cursor[1], entry.last_published_at)), default=None)
+    db.commit()
+    db.close()
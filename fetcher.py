@@ -0,0 +1,101 @@
+import asyncio
+import random
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Spec 2.1: failed requests are retried up to 3 times
+MAX_RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Async token bucket: allows `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Fetcher:
+    """Shared pooled HTTP client with per-host concurrency limits, rate limiting and retries."""
+
+    def __init__(self, max_connections=20, per_host=4, rate=2.0, burst=4, retries=MAX_RETRIES,
+                 backoff=0.5, timeout=15.0, headers=None, keepalive_expiry=5.0):
+        self.per_host = per_host
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT, **(headers or {})},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                keepalive_expiry=keepalive_expiry),
+            timeout=timeout,
+            follow_redirects=True,
+        )
+        self.host_slots = {}
+        self.host_buckets = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.client.aclose()
+
+    def _host_limits(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.host_slots:
+            self.host_slots[host] = asyncio.Semaphore(self.per_host)
+            self.host_buckets[host] = TokenBucket(self.rate, self.burst)
+        return self.host_slots[host], self.host_buckets[host]
+
+    async def get(self, url, headers=None):
+        """GETs a URL, retrying connection errors and 429/5xx with exponential backoff. Returns None on failure."""
+        slots, bucket = self._host_limits(url)
+        for attempt in range(self.retries + 1):
+            delay = None
+            async with slots:
+                await bucket.acquire()
+                try:
+                    response = await self.client.get(url, headers=headers)
+                    if response.status_code not in RETRY_STATUSES:
+                        return response
+                    retry_after = response.headers.get("Retry-After")
+                    if retry_after and retry_after.isdigit():
+                        delay = float(retry_after)
+                    error = f"HTTP {response.status_code}"
+                except httpx.HTTPError as e:
+                    error = f"{type(e).__name__}: {e}"
+            if attempt == self.retries:
+                break
+            if delay is None:
+                delay = self.backoff * (2 ** attempt) * (1 + random.random())
+            print(f"🔁 Retry {attempt + 1}/{self.retries} for {url} in {delay:.1f}s ({error})")
+            await asyncio.sleep(delay)
+        print(f"⚠️ Giving up on {url} after {self.retries} retries ({error})")
+        return None
+
+    async def get_many(self, urls, headers=None):
+        """Fetches all URLs concurrently, returning responses (or None) in input order."""
+        return await asyncio.gather(*(self.get(url, headers=headers) for url in urls))
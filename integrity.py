@@ -0,0 +1,316 @@
+import argparse
+import fcntl
+import hashlib
+import importlib
+import json
+import os
+import unicodedata
+from datetime import datetime, timezone
+from psycopg2.extras import execute_values
+from archive import decompress
+from database import db_connection
+from metrics import count, timed
+
+# Published articles and their rewrites are sealed in batches of up to INTEGRITY_BATCH_SIZE
+# leaves; one Merkle root per batch is what gets anchored externally.
+INTEGRITY_BATCH_SIZE = int(os.getenv("INTEGRITY_BATCH_SIZE", "5000"))
+# "file", "none", or "package.module:Class" for a custom backend
+ANCHOR_BACKEND = os.getenv("INTEGRITY_ANCHOR", "file")
+ANCHOR_FILE = os.getenv("INTEGRITY_ANCHOR_FILE", "integrity_anchors.jsonl")
+# Bump when the canonical form changes; stored hashes are only comparable within one version
+CANONICAL_VERSION = 1
+KINDS = ("article", "rewrite")
+
+# RFC 6962 domain separation: a leaf can never be passed off as an inner node
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+def canonical_text(value):
+    """NFC-normalized text with Unix line endings and no surrounding whitespace."""
+    if value is None:
+        return None
+    return unicodedata.normalize("NFC", value).replace("\r\n", "\n").replace("\r", "\n").strip()
+
+def canonical_bytes(kind, fields):
+    """Stable serialization of an item: sorted-key compact JSON of its normalized fields."""
+    record = {"v": CANONICAL_VERSION, "kind": kind}
+    for name, value in fields.items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, str):
+            value = canonical_text(value)
+        record[name] = value
+    return json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+def article_hash(article_id, source_url, title, author, published_at, content):
+    return hashlib.sha256(canonical_bytes("article", {
+        "id": article_id, "source_url": source_url, "title": title, "author": author,
+        "published_at": published_at, "content": content,
+    })).hexdigest()
+
+def rewrite_hash(article_id, content, model):
+    return hashlib.sha256(canonical_bytes("rewrite", {"article_id": article_id, "content": content, "model": model})).hexdigest()
+
+def leaf_node(content_hash):
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(content_hash)).digest()
+
+def inner_node(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def split_point(size):
+    """Largest power of two below `size`: the left subtree of an RFC 6962 tree."""
+    return 1 << (size - 1).bit_length() - 1
+
+def merkle_tree(nodes):
+    """Returns (root, proofs) for a list of leaf nodes; proofs[i] lists sibling hashes from the leaf up."""
+    if len(nodes) == 1:
+        return nodes[0], [[]]
+    k = split_point(len(nodes))
+    left, left_proofs = merkle_tree(nodes[:k])
+    right, right_proofs = merkle_tree(nodes[k:])
+    return inner_node(left, right), [proof + [right] for proof in left_proofs] + [proof + [left] for proof in right_proofs]
+
+def verify_inclusion(content_hash, index, size, proof, root):
+    """Checks an inclusion proof in O(log n) hashes (RFC 9162, section 2.1.3.2)."""
+    if index >= size:
+        return False
+    node = leaf_node(content_hash)
+    fn, sn = index, size - 1
+    for sibling in proof:
+        sibling = bytes.fromhex(sibling)
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            node = inner_node(sibling, node)
+            while fn and not fn & 1:
+                fn >>= 1
+                sn >>= 1
+        else:
+            node = inner_node(node, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and node.hex() == root
+
+class FileAnchor:
+    """Local stand-in for an external anchor: appends batch roots to a JSON-lines file.
+
+    The reference is "<byte offset>:<sha256 of the line>", so verifying a root reads one line.
+    Keep the file somewhere the database cannot write to, or it proves nothing.
+    """
+
+    def __init__(self, path=ANCHOR_FILE):
+        self.path = path
+
+    def anchor(self, batch_id, root, leaf_count):
+        line = json.dumps({"batch": batch_id, "root": root, "leaves": leaf_count,
+                           "anchored_at": datetime.now(timezone.utc).isoformat()}, sort_keys=True).encode("utf-8") + b"\n"
+        with open(self.path, "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)  # several sealers may append to one file
+            try:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return f"{offset}:{hashlib.sha256(line).hexdigest()}"
+
+    def verify(self, ref, root):
+        offset, _, digest = ref.partition(":")
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(int(offset))
+                line = f.readline()
+        except (OSError, ValueError):
+            return False
+        return hashlib.sha256(line).hexdigest() == digest and json.loads(line)["root"] == root
+
+ANCHOR_BACKENDS = {"file": FileAnchor}
+
+def anchor_backend(name=ANCHOR_BACKEND):
+    """Builds an anchor backend by name; None for "none". Custom backends are "module:Class"
+    with the same anchor(batch_id, root, leaf_count) -> ref and verify(ref, root) -> bool methods."""
+    if not name or name == "none":
+        return None
+    if name in ANCHOR_BACKENDS:
+        return ANCHOR_BACKENDS[name]()
+    module, _, cls = name.partition(":")
+    return getattr(importlib.import_module(module), cls)()
+
+def unsealed_items(cursor, limit):
+    """Returns [(kind, article id, item created_at, content hash)] for up to `limit` items without a current leaf.
+
+    Completed articles are sealed once; a rewrite is sealed again whenever it is replaced,
+    since a replaced rewrite gets a new created_at. Earlier leaves stay as the history.
+    """
+    cursor.execute("""
+        SELECT a.id, u.source_url, a.title, a.author, a.published_at, a.content, a.created_at
+        FROM articles a JOIN article_urls u USING (id)
+        WHERE a.rewrite_status = 'completed'
+          AND NOT EXISTS (SELECT 1 FROM integrity_leaves l WHERE l.kind = 'article' AND l.article_id = a.id)
+        ORDER BY a.id
+        LIMIT %s
+    """, (limit,))
+    items = [("article", article_id, created_at, article_hash(article_id, source_url, title, author, published_at, content))
+             for article_id, source_url, title, author, published_at, content, created_at in cursor.fetchall()]
+    cursor.execute("""
+        SELECT r.original_article_id, r.rewritten_content, r.model, r.created_at
+        FROM rewritten_articles r
+        WHERE NOT EXISTS (SELECT 1 FROM integrity_leaves l WHERE l.kind = 'rewrite' AND l.article_id = r.original_article_id
+                                                             AND l.item_created_at IS NOT DISTINCT FROM r.created_at)
+        ORDER BY r.original_article_id
+        LIMIT %s
+    """, (limit - len(items),))
+    items.extend(("rewrite", article_id, created_at, rewrite_hash(article_id, content, model))
+                 for article_id, content, model, created_at in cursor.fetchall())
+    return items
+
+def seal_batch(conn, limit=INTEGRITY_BATCH_SIZE):
+    """Hashes up to `limit` unsealed items into a new batch; returns (batch id, root, leaf count) or None.
+
+    Batches and leaves are append-only (enforced by triggers), and sealing takes a table lock
+    so two sealers never put the same item into two batches.
+    """
+    cursor = conn.cursor()
+    cursor.execute("LOCK TABLE integrity_batches IN SHARE ROW EXCLUSIVE MODE")
+    with timed("integrity_hash"):
+        items = unsealed_items(cursor, limit)
+        if not items:
+            cursor.close()
+            return None
+        root, proofs = merkle_tree([leaf_node(content_hash) for _, _, _, content_hash in items])
+    cursor.execute("INSERT INTO integrity_batches (root, leaf_count) VALUES (%s, %s) RETURNING id", (root.hex(), len(items)))
+    batch_id = cursor.fetchone()[0]
+    execute_values(cursor, """
+        INSERT INTO integrity_leaves (batch_id, leaf_index, kind, article_id, item_created_at, content_hash, proof)
+        VALUES %s
+    """, [(batch_id, index, kind, article_id, created_at, content_hash, [sibling.hex() for sibling in proof])
+          for index, ((kind, article_id, created_at, content_hash), proof) in enumerate(zip(items, proofs))])
+    cursor.close()
+    count("integrity_seal", "sealed", len(items))
+    return batch_id, root.hex(), len(items)
+
+def anchor_pending(conn, backend, backend_name=ANCHOR_BACKEND):
+    """Anchors every batch not anchored yet; returns their ids."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, root, leaf_count FROM integrity_batches WHERE anchor_ref IS NULL ORDER BY id FOR UPDATE SKIP LOCKED")
+    anchored = []
+    for batch_id, root, leaf_count in cursor.fetchall():
+        ref = backend.anchor(batch_id, root, leaf_count)
+        cursor.execute("UPDATE integrity_batches SET anchor_backend = %s, anchor_ref = %s, anchored_at = now() WHERE id = %s",
+                       (backend_name, ref, batch_id))
+        anchored.append(batch_id)
+    cursor.close()
+    return anchored
+
+def seal(batch_size=INTEGRITY_BATCH_SIZE, backend_name=ANCHOR_BACKEND):
+    """Seals every unsealed item, one batch per transaction, then anchors the new roots."""
+    sealed = []
+    while True:
+        with db_connection() as conn:
+            batch = seal_batch(conn, batch_size)
+        if batch is None:
+            break
+        sealed.append(batch)
+        print(f"🔏 Sealed batch {batch[0]}: {batch[2]} items, root {batch[1]}")
+    backend = anchor_backend(backend_name)
+    if backend is not None:
+        with db_connection() as conn:
+            anchored = anchor_pending(conn, backend, backend_name)
+        if anchored:
+            print(f"⚓ Anchored batches {', '.join(map(str, anchored))} with {backend_name}")
+    return sealed
+
+def current_hash(cursor, kind, article_id):
+    """Recomputes an item's hash from what is stored now (hot partition or archive).
+
+    Returns (hash, version): a rewrite's version is its created_at, which changes when it is
+    replaced; articles have a single version (None). Returns (None, None) if the item is gone.
+    """
+    if kind == "rewrite":
+        cursor.execute("SELECT rewritten_content, model, created_at FROM rewritten_articles WHERE original_article_id = %s", (article_id,))
+        row = cursor.fetchone()
+        return (rewrite_hash(article_id, row[0], row[1]), row[2]) if row else (None, None)
+    cursor.execute("""
+        SELECT u.source_url, a.title, a.author, a.published_at, a.content
+        FROM article_urls u JOIN articles a ON a.id = u.id AND a.created_at = u.created_at
+        WHERE u.id = %s
+    """, (article_id,))
+    row = cursor.fetchone()
+    if row:
+        return article_hash(article_id, *row), None
+    cursor.execute("""
+        SELECT u.source_url, a.title, a.author, a.published_at, a.codec, a.content
+        FROM article_archive a JOIN article_urls u USING (id)
+        WHERE a.id = %s
+    """, (article_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None, None
+    source_url, title, author, published_at, codec, blob = row
+    return article_hash(article_id, source_url, title, author, published_at, decompress(codec, blob)), None
+
+def verify_item(cursor, kind, article_id):
+    """Checks one item against the leaf sealed for its current version: the stored content still
+    hashes to the leaf, the leaf's proof leads to the batch root, and the root matches its anchor.
+
+    None if the item was never sealed. A rewrite replaced since its last seal is reported as
+    not yet sealed ("verified": None) rather than as tampered.
+    """
+    stored, version = current_hash(cursor, kind, article_id)
+    version_filter = "AND l.item_created_at = %s" if version is not None else ""
+    cursor.execute(f"""
+        SELECT l.batch_id, l.leaf_index, l.content_hash, l.proof, b.root, b.leaf_count, b.anchor_backend, b.anchor_ref
+        FROM integrity_leaves l JOIN integrity_batches b ON b.id = l.batch_id
+        WHERE l.kind = %s AND l.article_id = %s {version_filter}
+        ORDER BY l.batch_id DESC
+        LIMIT 1
+    """, (kind, article_id) + ((version,) if version is not None else ()))
+    row = cursor.fetchone()
+    if row is None:
+        if version is None:
+            return None
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM integrity_leaves WHERE kind = %s AND article_id = %s)", (kind, article_id))
+        if not cursor.fetchone()[0]:
+            return None
+        return {"sealed": False, "current_hash": stored, "verified": None}
+    batch_id, index, content_hash, proof, root, leaf_count, backend_name, ref = row
+    anchor = {"backend": backend_name, "ref": ref, "valid": None}
+    if ref is not None:
+        backend = anchor_backend(backend_name)
+        anchor["valid"] = backend.verify(ref, root) if backend is not None else None
+    result = {
+        "sealed": True, "hash": content_hash, "current_hash": stored, "content_matches": stored == content_hash,
+        "batch": batch_id, "leaf_index": index, "leaf_count": leaf_count, "root": root, "proof": proof,
+        "proof_valid": verify_inclusion(content_hash, index, leaf_count, proof, root), "anchor": anchor,
+    }
+    result["verified"] = result["content_matches"] and result["proof_valid"] and anchor["valid"] is not False
+    return result
+
+def verify(article_id):
+    """Verifies an article and its rewrite; returns None when neither has been sealed.
+
+    "verified" covers the sealed items; one that awaits its next seal does not count either way.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        items = {kind: verify_item(cursor, kind, article_id) for kind in KINDS}
+        cursor.close()
+    items = {kind: item for kind, item in items.items() if item is not None}
+    if not items:
+        return None
+    checked = [item["verified"] for item in items.values() if item["sealed"]]
+    return {"id": article_id, "verified": all(checked) if checked else None, **items}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seal published articles into Merkle batches and verify them.")
+    parser.add_argument("--batch-size", type=int, default=INTEGRITY_BATCH_SIZE)
+    parser.add_argument("--verify", type=int, metavar="ARTICLE_ID", help="verify one article and its rewrite, then exit")
+    args = parser.parse_args()
+
+    if args.verify is not None:
+        report = verify(args.verify)
+        print(json.dumps(report, indent=2) if report else f"⚠️ Article {args.verify} has not been sealed")
+    else:
+        batches = seal(args.batch_size)
+        print(f"✅ Sealed {sum(batch[2] for batch in batches)} items in {len(batches)} batches")
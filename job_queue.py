@@ -0,0 +1,103 @@
+import os
+
+# Queue settings
+LEASE_SECONDS = int(os.getenv("REWRITE_LEASE_SECONDS", "600"))
+RETRY_BACKOFF_SECONDS = int(os.getenv("REWRITE_RETRY_BACKOFF_SECONDS", "60"))
+
+MAX_ATTEMPTS = 3
+
+# The requeue rule for an article that already has a job, shared by every path that queues rewrites:
+# a finished job (re-selected after a reset) starts over; queued, running and dead-lettered jobs are left alone
+REQUEUE_ON_CONFLICT = """
+    ON CONFLICT (article_id) DO UPDATE
+    SET status = 'queued', attempts = 0, max_attempts = EXCLUDED.max_attempts, run_after = now(),
+        last_error = NULL, locked_by = NULL, lease_expires_at = NULL, updated_at = now()
+    WHERE rewrite_jobs.status = 'done'
+"""
+
+def enqueue(conn, article_ids, max_attempts=MAX_ATTEMPTS):
+    """Queues rewrite jobs for the given articles, following REQUEUE_ON_CONFLICT for existing ones."""
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        INSERT INTO rewrite_jobs (article_id, status, attempts, max_attempts)
+        SELECT article_id, 'queued', 0, %s FROM unnest(%s::int[]) AS article_id
+        {REQUEUE_ON_CONFLICT}
+        RETURNING article_id
+    """, (max_attempts, list(article_ids)))
+    queued = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return queued
+
+def reap_expired(conn):
+    """Returns jobs whose lease ran out to the queue, or dead-letters them when out of attempts."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE rewrite_jobs
+        SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'queued' END,
+            last_error = 'lease expired', locked_by = NULL, lease_expires_at = NULL, updated_at = now()
+        WHERE status = 'running' AND lease_expires_at < now()
+    """)
+    reaped = cursor.rowcount
+    cursor.close()
+    return reaped
+
+def claim(conn, worker_id, limit=1, lease_seconds=LEASE_SECONDS):
+    """Leases up to `limit` queued jobs to this worker; concurrent workers skip each other's rows.
+
+    Returns (job_id, article_id, attempts, content) tuples. The caller must commit right
+    away so the lease is visible to other workers.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        WITH picked AS (
+            SELECT id FROM rewrite_jobs
+            WHERE status = 'queued' AND run_after <= now()
+            ORDER BY run_after, id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE rewrite_jobs j
+        SET status = 'running', attempts = j.attempts + 1, locked_by = %s,
+            lease_expires_at = now() + make_interval(secs => %s), updated_at = now()
+        FROM picked, articles a
+        WHERE j.id = picked.id AND a.id = j.article_id
+        RETURNING j.id, j.article_id, j.attempts, a.content
+    """, (limit, worker_id, lease_seconds))
+    jobs = cursor.fetchall()
+    cursor.close()
+    return jobs
+
+def complete(conn, job_ids):
+    """Marks jobs as done."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE rewrite_jobs SET status = 'done', lease_expires_at = NULL, last_error = NULL, updated_at = now()
+        WHERE id = ANY(%s)
+    """, (list(job_ids),))
+    cursor.close()
+
+def fail(conn, job_id, error):
+    """Schedules a retry with exponential backoff, or dead-letters the job after max_attempts."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE rewrite_jobs
+        SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'queued' END,
+            run_after = now() + make_interval(secs => %s * power(2, attempts - 1)),
+            last_error = %s, locked_by = NULL, lease_expires_at = NULL, updated_at = now()
+        WHERE id = %s
+        RETURNING status
+    """, (RETRY_BACKOFF_SECONDS, str(error), job_id))
+    status = cursor.fetchone()[0]
+    cursor.close()
+    return status
+
+def requeue_dead(conn):
+    """Moves dead-lettered jobs back to the queue with a fresh attempt budget."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE rewrite_jobs SET status = 'queued', attempts = 0, run_after = now(), updated_at = now()
+        WHERE status = 'dead'
+    """)
+    requeued = cursor.rowcount
+    cursor.close()
+    return requeued
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import random
+import time
+import openai
+from metrics import MODEL_TOKENS, count, timed
+
+# Model client settings; OPENAI_BASE_URL can point at a local fake server for benchmarks
+MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+REQUEST_TIMEOUT = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "1"))
+MAX_BACKOFF_SECONDS = 60.0
+
+
+class Completion:
+    """One model response with the accounting recorded for it."""
+
+    def __init__(self, text, model, prompt_tokens, completion_tokens, latency_ms, finish_reason, attempts, cached=False):
+        self.text = text
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.latency_ms = latency_ms
+        self.finish_reason = finish_reason
+        self.attempts = attempts
+        self.cached = cached
+
+
+class LLMClient:
+    """Shared async chat-completions client with a concurrency cap, per-request timeouts and adaptive backoff.
+
+    A 429 or 5xx pauses every request on this client (not just the failing one) for the
+    Retry-After period or an exponentially growing delay, so a rate-limited burst backs off
+    together instead of hammering the API.
+    """
+
+    def __init__(self, model=MODEL, concurrency=CONCURRENCY, timeout=REQUEST_TIMEOUT, max_retries=MAX_RETRIES,
+                 api_key=None, base_url=None):
+        self.model = model
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.client = openai.AsyncOpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=base_url or os.getenv("OPENAI_BASE_URL"),
+            max_retries=0,  # retries are handled here so the backoff is shared
+        )
+        self.slots = asyncio.Semaphore(concurrency)
+        self.paused_until = 0.0
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "failures": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.client.close()
+
+    def _retry_delay(self, error, attempt):
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_BACKOFF_SECONDS)
+            except ValueError:
+                pass
+        return min(BACKOFF_SECONDS * (2 ** attempt), MAX_BACKOFF_SECONDS) * (1 + random.random() / 2)
+
+    async def complete(self, messages, max_tokens, temperature):
+        """Runs one chat completion, retrying 429/5xx/timeouts; raises the last error when retries run out."""
+        for attempt in range(self.max_retries + 1):
+            async with self.slots:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                started = time.perf_counter()
+                self.stats["requests"] += 1
+                try:
+                    with timed("model_call"):
+                        response = await self.client.chat.completions.create(
+                            model=self.model,
+                            messages=messages,
+                            max_tokens=max_tokens,
+                            temperature=temperature,
+                            timeout=self.timeout,
+                        )
+                except (openai.RateLimitError, openai.InternalServerError, openai.APITimeoutError, openai.APIConnectionError) as e:
+                    count("model_call", type(e).__name__)
+                    error = e
+                else:
+                    latency_ms = (time.perf_counter() - started) * 1000
+                    usage = response.usage
+                    prompt_tokens = usage.prompt_tokens if usage else 0
+                    completion_tokens = usage.completion_tokens if usage else 0
+                    self.stats["prompt_tokens"] += prompt_tokens
+                    self.stats["completion_tokens"] += completion_tokens
+                    count("model_call", "ok")
+                    MODEL_TOKENS.labels("prompt").inc(prompt_tokens)
+                    MODEL_TOKENS.labels("completion").inc(completion_tokens)
+                    choice = response.choices[0]
+                    return Completion((choice.message.content or "").strip(), response.model, prompt_tokens,
+                                      completion_tokens, latency_ms, choice.finish_reason, attempt + 1)
+
+            if attempt == self.max_retries:
+                break
+            delay = self._retry_delay(error, attempt)
+            if isinstance(error, (openai.RateLimitError, openai.InternalServerError)):
+                self.stats["throttled"] += 1
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            self.stats["retries"] += 1
+            print(f"🔁 Model request failed ({type(error).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        self.stats["failures"] += 1
+        raise error
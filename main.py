@@ -1,9 +1,31 @@
-from fastapi import FastAPI, Depends
-from sqlalchemy.orm import Session
-from database import SessionLocal
-from models import Article
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import ARRAY, Integer, any_, bindparam, func, select, text, tuple_, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from cache import ByteLRU, Encoded
+from database import AsyncSessionLocal, pool_stats
+from events import ArticleEvents, format_event
+import metrics
+from models import SEARCH_CONFIG, ArchivedArticle, Article, ArticleUrl, RewrittenArticle
+import archive
+import integrity
+import job_queue
+from datetime import datetime
+import asyncio
+import base64
+import hashlib
+import json
+import os
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    """Closes the shared article event listener on shutdown."""
+    yield
+    await article_events.close()
+
+app = FastAPI(lifespan=lifespan)
 from fastapi.middleware.cors import CORSMiddleware
 
 app.add_middleware(
@@ -14,47 +36,380 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+article_events = ArticleEvents()
+article_cache = ByteLRU()
+# Missed notifications (listener reconnect) may hide changes, so the whole cache goes
+article_events.on_change(lambda ids: article_cache.clear() if ids is None else article_cache.invalidate(ids))
+SSE_HEARTBEAT_SECONDS = 15
+
 @app.get("/")
 def read_root():
     return {"message": "FastAPI is running successfully!"}
 
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+@app.get("/health/db")
+def database_health():
+    """Reports connection pool usage and statement-timeout counts."""
+    return pool_stats()
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint for this API process."""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/health/cache")
+def cache_health():
+    """Reports article detail cache usage."""
+    return article_cache.describe()
+
+@app.get("/health/events")
+def events_health():
+    """Reports connected event stream clients and relayed notification counts."""
+    return {"clients": len(article_events.subscribers), "listening": article_events.listening, **article_events.stats}
+
+def encode_cursor(created_at, article_id):
+    """Encodes a keyset position as an opaque cursor string."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{article_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    """Decodes a cursor back into (created_at, id)."""
+    try:
+        created_at, article_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(article_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @app.get("/articles/")
-def get_articles(db: Session = Depends(get_db)):
-    articles = db.query(Article).all()
-    return {"articles": [{"id": article.id, "title": article.title, "rewrite_status": article.rewrite_status} for article in articles]}
+async def get_articles(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    rewrite_status: str | None = None,
+    source: str | None = None,
+    include_duplicates: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    """Lists articles newest first, one keyset page at a time, without loading article content.
+
+    Near-duplicates are folded into their first copy (reported as `duplicates`) unless
+    include_duplicates is set.
+    """
+    query = select(Article.id, Article.title, Article.rewrite_status, Article.source, Article.created_at, Article.duplicate_of)
+    if not include_duplicates:
+        query = query.where(Article.duplicate_of.is_(None))
+    if rewrite_status:
+        query = query.where(Article.rewrite_status == rewrite_status)
+    if source:
+        query = query.where(Article.source == source)
+    if cursor:
+        query = query.where(tuple_(Article.created_at, Article.id) < tuple_(*decode_cursor(cursor)))
+    rows = (await db.execute(query.order_by(Article.created_at.desc(), Article.id.desc()).limit(limit + 1))).all()
+
+    page = rows[:limit]
+    duplicates = {}
+    if page:
+        counts = await db.execute(
+            select(Article.duplicate_of, func.count()).where(Article.duplicate_of.in_([row.id for row in page])).group_by(Article.duplicate_of)
+        )
+        duplicates = dict(counts.all())
+    body = {
+        "articles": [{"id": row.id, "title": row.title, "rewrite_status": row.rewrite_status, "source": row.source,
+                      "duplicate_of": row.duplicate_of, "duplicates": duplicates.get(row.id, 0)} for row in page],
+        "next_cursor": encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None,
+    }
+    payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+    # no-cache makes browsers revalidate every poll with If-None-Match
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "5000"))
+# Rows walked newest first before sparse matches are looked up through the GIN index instead
+SEARCH_SCAN_ROWS = int(os.getenv("SEARCH_SCAN_ROWS", str(4 * SEARCH_RANK_WINDOW)))
+
+def newest_matches(query, source=None):
+    """Selects (id, created_at) of the newest SEARCH_RANK_WINDOW articles matching a tsquery.
+
+    Broad terms fill the window within the newest SEARCH_SCAN_ROWS rows, so those are walked on
+    the created_at index first. When they hold fewer matches, the newest are taken from every
+    match found through the GIN index; walking on would scan most of the table for a rare phrase.
+    """
+    def by_source(statement):
+        return statement.where(Article.source == source) if source else statement
+
+    newest_rows = by_source(select(Article.id, Article.created_at, Article.search_vector)) \
+        .order_by(Article.created_at.desc(), Article.id.desc()).limit(SEARCH_SCAN_ROWS).subquery("newest_rows")
+    recent = select(newest_rows.c.id, newest_rows.c.created_at).where(newest_rows.c.search_vector.op("@@")(query)) \
+        .order_by(newest_rows.c.created_at.desc(), newest_rows.c.id.desc()).limit(SEARCH_RANK_WINDOW) \
+        .cte("recent").prefix_with("MATERIALIZED")
+    # Materialized so the planner cannot turn it back into a created_at walk; only scanned when needed
+    matching = by_source(select(Article.id, Article.created_at).where(Article.search_vector.op("@@")(query))) \
+        .cte("matching").prefix_with("MATERIALIZED")
+    recent_count = select(func.count()).select_from(recent).scalar_subquery()
+    return union_all(
+        select(recent.c.id, recent.c.created_at).where(recent_count == SEARCH_RANK_WINDOW),
+        select(matching.c.id, matching.c.created_at).where(recent_count < SEARCH_RANK_WINDOW)
+        .order_by(matching.c.created_at.desc(), matching.c.id.desc()).limit(SEARCH_RANK_WINDOW),
+    )
+
+def encode_rank_cursor(rank, article_id):
+    """Encodes a (rank, id) search position as an opaque cursor string."""
+    return base64.urlsafe_b64encode(f"{rank!r}|{article_id}".encode()).decode()
+
+def decode_rank_cursor(cursor):
+    try:
+        rank, article_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return float(rank), int(article_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/articles/search")
+async def search_articles(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    order: str = Query("rank", pattern="^(rank|recent)$"),
+    source: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Full-text search over titles and content (web-search syntax: "phrases", or, -exclusions).
+
+    Results are ranked by relevance among the newest SEARCH_RANK_WINDOW matches (or listed
+    newest first with order=recent) and paged by keyset cursor; snippets are only built for
+    the rows on the returned page.
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    candidates = select(Article.id, Article.title, Article.rewrite_status, Article.source, Article.created_at, Article.search_vector).where(Article.search_vector.op("@@")(query))
+    if source:
+        candidates = candidates.where(Article.source == source)
+    if order == "rank":
+        # Ranking reads every candidate's tsvector, so broad terms only rank the newest matches
+        newest = newest_matches(query, source).subquery("newest")
+        candidates = select(Article.id, Article.title, Article.rewrite_status, Article.source, Article.created_at, Article.search_vector) \
+            .join(newest, (Article.id == newest.c.id) & (Article.created_at == newest.c.created_at)).subquery()
+        rank = func.ts_rank(candidates.c.search_vector, query, 1).label("rank")  # 1 = normalize by document length
+        matches = select(candidates.c.id, candidates.c.title, candidates.c.rewrite_status, candidates.c.source, candidates.c.created_at, rank)
+        if cursor:
+            matches = matches.where(tuple_(rank, candidates.c.id) < tuple_(*decode_rank_cursor(cursor)))
+        matches = matches.order_by(rank.desc(), candidates.c.id.desc())
+    else:
+        matches = candidates.with_only_columns(Article.id, Article.title, Article.rewrite_status, Article.source, Article.created_at, func.ts_rank(Article.search_vector, query, 1).label("rank"))
+        if cursor:
+            matches = matches.where(tuple_(Article.created_at, Article.id) < tuple_(*decode_cursor(cursor)))
+        matches = matches.order_by(Article.created_at.desc(), Article.id.desc())
+    page = matches.limit(limit + 1).subquery()
+
+    snippet = func.ts_headline(SEARCH_CONFIG, Article.content, query, "MaxFragments=2, MaxWords=20, MinWords=8")
+    rows = (await db.execute(
+        select(page, snippet.label("snippet")).join(Article, Article.id == page.c.id)
+        .order_by(*((page.c.rank.desc(),) if order == "rank" else (page.c.created_at.desc(),)), page.c.id.desc())
+    )).all()
+
+    results = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = results[-1]
+        next_cursor = encode_rank_cursor(last.rank, last.id) if order == "rank" else encode_cursor(last.created_at, last.id)
+    return {
+        "articles": [{"id": row.id, "title": row.title, "rewrite_status": row.rewrite_status, "source": row.source,
+                      "rank": row.rank, "snippet": row.snippet} for row in results],
+        "next_cursor": next_cursor,
+    }
+
+@app.get("/articles/events")
+async def stream_article_events(request: Request):
+    """Streams rewrite_status changes as Server-Sent Events ("status" deltas, or "resync" to refetch)."""
+    queue = await article_events.subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # keeps proxies from closing an idle stream
+                    continue
+                yield format_event(*message)
+        finally:
+            article_events.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Allowed rewrite_status transitions: target -> the only status it may be reached from
+TRANSITIONS = {"pending": "not_selected", "completed": "pending"}
+MAX_BULK_ARTICLES = 1000
+
+class ArticleFilter(BaseModel):
+    source: str | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+    limit: int = Field(100, ge=1, le=MAX_BULK_ARTICLES)
+
+class BulkTransition(BaseModel):
+    """Either explicit article ids or a filter selecting the newest matching articles."""
+    ids: list[int] | None = Field(None, max_length=MAX_BULK_ARTICLES)
+    filter: ArticleFilter | None = None
+
+async def transition_articles(db, target, ids=None, article_filter=None):
+    """Moves matching articles to `target` in one UPDATE ... RETURNING, skipping rows not in the allowed prior status.
+
+    Selecting (-> pending) also queues rewrite jobs in the same transaction. Returns
+    (updated ids, {skipped id: current status, "duplicate", or None when missing}); the caller commits.
+    Near-duplicates are never selected for rewriting.
+    """
+    allowed = Article.rewrite_status == TRANSITIONS[target]
+    if target == "pending":
+        allowed = allowed & Article.duplicate_of.is_(None)
+    if ids is not None:
+        matches = Article.id == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+    else:
+        candidates = select(Article.id).where(allowed)
+        if article_filter.source:
+            candidates = candidates.where(Article.source == article_filter.source)
+        if article_filter.created_after:
+            candidates = candidates.where(Article.created_at >= article_filter.created_after)
+        if article_filter.created_before:
+            candidates = candidates.where(Article.created_at < article_filter.created_before)
+        matches = Article.id.in_(candidates.order_by(Article.created_at.desc()).limit(article_filter.limit))
+
+    values = {"rewrite_status": target}
+    if target == "pending":
+        values["selected_for_rewrite"] = True
+    updated = list((await db.execute(update(Article).where(matches, allowed).values(**values).returning(Article.id))).scalars())
+
+    if target == "pending" and updated:
+        # Queue the rewrites in the same transaction; the rewrite workers pick them up
+        await db.execute(text(f"""
+            INSERT INTO rewrite_jobs (article_id, status, attempts, max_attempts)
+            SELECT article_id, 'queued', 0, :max_attempts FROM unnest(CAST(:ids AS int[])) AS article_id
+            {job_queue.REQUEUE_ON_CONFLICT}
+        """), {"ids": updated, "max_attempts": job_queue.MAX_ATTEMPTS})
+
+    skipped = {}
+    missing = sorted(set(ids or []) - set(updated))
+    if missing:
+        rows = await db.execute(select(Article.id, Article.rewrite_status, Article.duplicate_of).where(Article.id == any_(bindparam("missing", missing, type_=ARRAY(Integer)))))
+        current = {row.id: "duplicate" if row.duplicate_of else row.rewrite_status for row in rows}
+        skipped = {article_id: current.get(article_id) for article_id in missing}
+    return updated, skipped
+
+async def bulk_transition(target, body, db):
+    if (body.ids is None) == (body.filter is None):
+        raise HTTPException(status_code=400, detail="Pass either ids or filter")
+    updated, skipped = await transition_articles(db, target, body.ids, body.filter)
+    await db.commit()
+    article_cache.invalidate(updated)
+    return {"updated": updated, "skipped": skipped, "expected_status": TRANSITIONS[target]}
+
+@app.post("/articles/select")
+async def select_articles_bulk(body: BulkTransition, db: AsyncSession = Depends(get_db)):
+    """Selects many articles for rewriting (not_selected -> pending) and queues their jobs in one round-trip."""
+    return await bulk_transition("pending", body, db)
+
+@app.post("/articles/complete")
+async def complete_articles_bulk(body: BulkTransition, db: AsyncSession = Depends(get_db)):
+    """Marks many pending articles as completed."""
+    return await bulk_transition("completed", body, db)
+
+def by_id(article_id):
+    """Filters articles by id within the partition its article_urls row points at (runtime partition pruning)."""
+    return (Article.id == article_id) & (Article.created_at == select(ArticleUrl.created_at).where(ArticleUrl.id == article_id).scalar_subquery())
+
+def isoformat(value):
+    return value.isoformat() if value else None
+
+async def load_article_detail(db, article_id):
+    """Reads one article with its rewrite from the hot partitions, falling back to the archive; None when missing."""
+    columns = (Article.title, Article.source, Article.author, Article.published_at, Article.created_at,
+               Article.rewrite_status, Article.duplicate_of)
+    row = (await db.execute(select(*columns, Article.content, ArticleUrl.source_url)
+                            .join(ArticleUrl, ArticleUrl.id == Article.id).where(by_id(article_id)))).first()
+    archived = row is None
+    if archived:
+        row = (await db.execute(select(ArchivedArticle, ArticleUrl.source_url)
+                                .join(ArticleUrl, ArticleUrl.id == ArchivedArticle.id).where(ArchivedArticle.id == article_id))).first()
+        if row is None:
+            return None
+        source_url, row = row.source_url, row.ArchivedArticle
+        content = await asyncio.to_thread(archive.decompress, row.codec, row.content)
+    else:
+        source_url, content = row.source_url, row.content
+    rewrite = (await db.execute(select(RewrittenArticle.rewritten_content, RewrittenArticle.model, RewrittenArticle.editor_approved,
+                                       RewrittenArticle.created_at).where(RewrittenArticle.original_article_id == article_id))).first()
+    return {
+        "id": article_id, "title": row.title, "source": row.source, "source_url": source_url, "author": row.author,
+        "published_at": isoformat(row.published_at), "created_at": isoformat(row.created_at),
+        "rewrite_status": row.rewrite_status, "duplicate_of": row.duplicate_of, "archived": archived, "content": content,
+        "rewritten": {"content": rewrite.rewritten_content, "model": rewrite.model, "editor_approved": rewrite.editor_approved,
+                      "created_at": isoformat(rewrite.created_at)} if rewrite else None,
+    }
 
 @app.get("/articles/{article_id}")
-def get_article(article_id: int, db: Session = Depends(get_db)):
-    article = db.query(Article).filter(Article.id == article_id).first()
-    if not article:
+async def get_article(article_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """Returns one article with its original and rewritten text.
+
+    Encoded bodies are kept in a bytes-capped LRU while the change listener is connected;
+    status transitions here and rewrite/archive notifications from other processes evict them.
+    """
+    await article_events.start()
+    # Without a live listener invalidations from other processes are missed, so bypass the cache
+    caching = article_events.listening
+    encoded = article_cache.get(article_id) if caching else None
+    if encoded is None:
+        token = article_cache.token()
+        detail = await load_article_detail(db, article_id)
+        if detail is None:
+            return {"error": "Article not found"}
+        encoded = Encoded(json.dumps(detail, ensure_ascii=False).encode("utf-8"))
+        if caching and article_events.listening:
+            article_cache.put(article_id, encoded, token)
+
+    headers = {"ETag": encoded.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == encoded.etag:
+        return Response(status_code=304, headers=headers)
+    encoding, body = encoded.body_for(request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/articles/{article_id}/integrity")
+async def verify_article(article_id: int):
+    """Checks an article and its rewrite against their sealed Merkle batch: content hash, inclusion proof and anchor."""
+    report = await asyncio.to_thread(integrity.verify, article_id)
+    if report is None:
+        return {"error": f"Article {article_id} has not been sealed"}
+    return report
+
+def transition_error(article_id, target, skipped):
+    if skipped[article_id] is None:
         return {"error": "Article not found"}
-    
-    return {"id": article.id, "title": article.title, "rewrite_status": article.rewrite_status}
+    if skipped[article_id] == "duplicate":
+        return {"error": f"Article {article_id} is a near-duplicate and is not rewritten"}
+    return {"error": f"Article {article_id} is '{skipped[article_id]}'; only '{TRANSITIONS[target]}' articles can become '{target}'"}
 
 @app.post("/articles/select/{article_id}")
-def select_article(article_id: int, db: Session = Depends(get_db)):
-    article = db.query(Article).filter(Article.id == article_id).first()
-    if not article:
-        return {"error": "Article not found"}
-    
-    article.rewrite_status = "selected_for_rewriting"  # Update status to 'selected_for_rewriting'
-    db.commit()
+async def select_article(article_id: int, db: AsyncSession = Depends(get_db)):
+    updated, skipped = await transition_articles(db, "pending", [article_id])  # not_selected -> pending, plus its rewrite job
+    if not updated:
+        return transition_error(article_id, "pending", skipped)
+    await db.commit()
+    article_cache.invalidate(updated)
     return {"message": f"✅ Article {article_id} selected for rewriting"}
 
 @app.post("/articles/rewrite/{article_id}")
-def rewrite_article(article_id: int, db: Session = Depends(get_db)):
-    article = db.query(Article).filter(Article.id == article_id).first()
-    if not article:
-        return {"error": "Article not found"}
-    
-    article.rewrite_status = "rewritten"  # Update status to 'rewritten'
-    db.commit()
-    return {"message": f"✅ Article {article_id} marked as rewritten"}
\ No newline at end of file
+async def rewrite_article(article_id: int, db: AsyncSession = Depends(get_db)):
+    updated, skipped = await transition_articles(db, "completed", [article_id])  # pending -> completed
+    if not updated:
+        return transition_error(article_id, "completed", skipped)
+    await db.commit()
+    article_cache.invalidate(updated)
+    return {"message": f"✅ Article {article_id} marked as rewritten"}
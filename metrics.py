@@ -0,0 +1,69 @@
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest, start_http_server
+except ImportError:  # prometheus_client is optional; without it every metric is a no-op
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    Counter = Histogram = None
+
+# Each resident entry point scrapes on its own port (9100 is left to node_exporter);
+# worker processes use WORKER_METRICS_PORT + process index
+SCHEDULER_METRICS_PORT = int(os.getenv("SCHEDULER_METRICS_PORT", "9310"))
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9320"))
+
+# Stage latencies span sub-millisecond parses to multi-second model calls
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+class _NoOp:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+if Histogram is not None:
+    STAGE_SECONDS = Histogram("news_stage_seconds", "Time spent in each pipeline stage", ["stage"], buckets=STAGE_BUCKETS)
+    STAGE_ITEMS = Counter("news_stage_items_total", "Items leaving each pipeline stage, by outcome", ["stage", "outcome"])
+    MODEL_TOKENS = Counter("news_model_tokens_total", "Tokens used by model calls", ["kind"])
+    REWRITE_CACHE = Counter("news_rewrite_cache_total", "Rewrite cache lookups", ["result"])
+else:
+    STAGE_SECONDS = STAGE_ITEMS = MODEL_TOKENS = REWRITE_CACHE = _NoOp()
+
+@contextmanager
+def timed(stage):
+    """Records the wrapped block's wall time in news_stage_seconds{stage=...}."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+def count(stage, outcome, amount=1):
+    STAGE_ITEMS.labels(stage, outcome).inc(amount)
+
+def render():
+    """Returns (body, content type) for a /metrics response."""
+    if Histogram is None:
+        return b"# prometheus_client is not installed\n", CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def serve(port):
+    """Serves this process's metrics on a background HTTP port; returns False if that is not possible.
+
+    A port that is already taken disables metrics for this process instead of crashing it.
+    """
+    if Histogram is None:
+        print("⚠️ prometheus_client is not installed; metrics are disabled")
+        return False
+    try:
+        start_http_server(port)
+    except OSError as e:
+        print(f"⚠️ Cannot serve metrics on :{port} ({e}); metrics are disabled for this process")
+        return False
+    print(f"📊 Serving metrics on :{port}/metrics")
+    return True
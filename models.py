@@ -1,17 +1,207 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import BigInteger, Column, Computed, Integer, LargeBinary, SmallInteger, String, Text, DateTime, Boolean, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 from database import Base
 from datetime import datetime
 
+SEARCH_CONFIG = "finnish"
+SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'B')"
+)
+
+class ArticleUrl(Base):
+    """Article ids and URL uniqueness; outlives the article row when it moves to the archive."""
+    __tablename__ = "article_urls"
+
+    id = Column(Integer, primary_key=True)
+    source_url = Column(String, unique=True, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=text("now()"))
+
+
 class Article(Base):
+    """Hot article storage, range-partitioned by created_at month (see archive.py)."""
     __tablename__ = "articles"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Inserts without an id get one from article_urls (trigger articles_register_url)
+    id = Column(Integer, ForeignKey("article_urls.id", ondelete="CASCADE"), primary_key=True, autoincrement=False)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
-    source_url = Column(String, unique=True, nullable=False)
+    source_url = Column(String, nullable=False)
     source = Column(String, nullable=False)
     author = Column(String, nullable=True)
     published_at = Column(DateTime, nullable=True)
     rewrite_status = Column(String, default='not_selected')
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow, server_default=text("now()"))
+    selected_for_rewrite = Column(Boolean, default=False)
+    # Finnish full-text document for /articles/search; title matches weigh more than body matches
+    search_vector = Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True))
+    # Near-duplicate detection (near_dup.py): MinHash signature, and the cluster root this article repeats
+    minhash = Column(ARRAY(BigInteger), nullable=True)
+    duplicate_of = Column(Integer, ForeignKey("article_urls.id", ondelete="SET NULL"), nullable=True)
+
+    __table_args__ = (
+        # Keyset pagination on /articles/, optionally filtered by status or source
+        Index("ix_articles_created_at_id", "created_at", "id"),
+        Index("ix_articles_rewrite_status_created_at_id", "rewrite_status", "created_at", "id"),
+        Index("ix_articles_source_created_at_id", "source", "created_at", "id"),
+        # select_articles.list_articles: unselected articles, newest first
+        Index("ix_articles_unselected_created_at", text("created_at DESC"), postgresql_where=text("selected_for_rewrite = false")),
+        Index("ix_articles_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_articles_duplicate_of", "duplicate_of", postgresql_where=text("duplicate_of IS NOT NULL")),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class ArchivedArticle(Base):
+    """A cold article: metadata as columns, content compressed with `codec` (archive.py)."""
+    __tablename__ = "article_archive"
+
+    id = Column(Integer, ForeignKey("article_urls.id", ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    title = Column(String, nullable=False)
+    source = Column(String, nullable=False)
+    author = Column(String, nullable=True)
+    published_at = Column(DateTime, nullable=True)
+    rewrite_status = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    duplicate_of = Column(Integer, nullable=True)
+    codec = Column(String, nullable=False)
+    content = Column(LargeBinary, nullable=False)
+    content_bytes = Column(Integer, nullable=False)  # uncompressed UTF-8 size
+    archived_at = Column(DateTime, nullable=False, server_default=text("now()"))
+
+
+class ArticleLshBucket(Base):
+    __tablename__ = "article_lsh_buckets"
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    article_id = Column(Integer, ForeignKey("article_urls.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_article_lsh_buckets_article_id", "article_id"),
+    )
+
+
+class RewrittenArticle(Base):
+    __tablename__ = "rewritten_articles"
+
+    id = Column(Integer, primary_key=True)
+    original_article_id = Column(Integer, ForeignKey("article_urls.id", ondelete="CASCADE"), nullable=False)
+    rewritten_content = Column(Text, nullable=False)
+    editor_approved = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    selected_for_rewrite = Column(Boolean, default=False)
\ No newline at end of file
+    # Model accounting for the request that produced this rewrite
+    model = Column(String, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    latency_ms = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index("ux_rewritten_articles_original_article_id", "original_article_id", unique=True),
+    )
+
+
+class RewriteJob(Base):
+    __tablename__ = "rewrite_jobs"
+
+    id = Column(Integer, primary_key=True)
+    article_id = Column(Integer, ForeignKey("article_urls.id", ondelete="CASCADE"), nullable=False, unique=True)
+    status = Column(String, nullable=False, default="queued")  # queued -> running -> done | dead
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, server_default=text("now()"))
+    lease_expires_at = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, server_default=text("now()"))
+    updated_at = Column(DateTime, nullable=False, server_default=text("now()"))
+
+    __table_args__ = (
+        Index("ix_rewrite_jobs_queued", "run_after", "id", postgresql_where=text("status = 'queued'")),
+        Index("ix_rewrite_jobs_running_lease", "lease_expires_at", postgresql_where=text("status = 'running'")),
+    )
+
+
+class RewriteCacheEntry(Base):
+    __tablename__ = "rewrite_cache"
+
+    # SHA-256 of (normalized content, prompt, model, temperature, max_tokens); see rewrite_cache.cache_key
+    cache_key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    rewritten_content = Column(Text, nullable=False)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    size_bytes = Column(Integer, nullable=False)
+    hits = Column(Integer, nullable=False, server_default=text("0"))
+    created_at = Column(DateTime, nullable=False, server_default=text("now()"))
+    last_used_at = Column(DateTime, nullable=False, server_default=text("now()"))
+
+    __table_args__ = (
+        Index("ix_rewrite_cache_last_used_at", "last_used_at"),
+        Index("ix_rewrite_cache_created_at", "created_at"),
+    )
+
+
+class FeedCache(Base):
+    __tablename__ = "feed_cache"
+
+    feed_url = Column(String, primary_key=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    body_hash = Column(String(64), nullable=True)
+    checked_at = Column(DateTime, default=datetime.utcnow)
+    changed_at = Column(DateTime, default=datetime.utcnow)
+    # Crawl cursor: newest item seen in the feed (see crawl_state.new_items)
+    last_guid = Column(String, nullable=True)
+    last_published_at = Column(DateTime, nullable=True)
+
+
+class CrawlItem(Base):
+    __tablename__ = "crawl_items"
+
+    url = Column(String, primary_key=True)
+    feed_url = Column(String, nullable=False)
+    guid = Column(String, nullable=True)
+    title = Column(String, nullable=True)
+    author = Column(String, nullable=True)
+    published_at = Column(DateTime, nullable=True)
+    status = Column(String, nullable=False, server_default=text("'pending'"))  # pending -> fetched | failed
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, nullable=False, server_default=text("now()"))
+    created_at = Column(DateTime, nullable=False, server_default=text("now()"))
+    updated_at = Column(DateTime, nullable=False, server_default=text("now()"))
+
+    __table_args__ = (
+        Index("ix_crawl_items_due", "feed_url", "next_attempt_at", postgresql_where=text("status IN ('pending', 'failed')")),
+    )
+
+
+class IntegrityBatch(Base):
+    __tablename__ = "integrity_batches"
+
+    # One Merkle tree over the canonical hashes of its leaves (see integrity.py); append-only
+    id = Column(Integer, primary_key=True)
+    root = Column(String(64), nullable=False)
+    leaf_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=text("now()"))
+    anchor_backend = Column(String, nullable=True)
+    anchor_ref = Column(String, nullable=True)
+    anchored_at = Column(DateTime, nullable=True)
+
+
+class IntegrityLeaf(Base):
+    __tablename__ = "integrity_leaves"
+
+    batch_id = Column(Integer, ForeignKey("integrity_batches.id"), primary_key=True)
+    leaf_index = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # article | rewrite
+    # No foreign key: the record of what was published outlives the article row
+    article_id = Column(Integer, nullable=False)
+    item_created_at = Column(DateTime, nullable=True)  # a replaced rewrite gets a new created_at and a new leaf
+    content_hash = Column(String(64), nullable=False)
+    proof = Column(ARRAY(String(64)), nullable=False)  # sibling hashes from the leaf up to the root
+
+    __table_args__ = (
+        Index("ix_integrity_leaves_item", "kind", "article_id", "batch_id"),
+    )
@@ -0,0 +1,126 @@
+import argparse
+import hashlib
+import os
+import random
+import re
+
+# MinHash/LSH settings: 16 bands x 8 rows puts the LSH candidate threshold near Jaccard 0.7;
+# candidates are then confirmed against DUPLICATE_THRESHOLD on the full signature.
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+
+MERSENNE_PRIME = (1 << 61) - 1
+# Fixed seed: signatures stored in the database must stay comparable across processes and releases
+_rng = random.Random(20250318)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+WORD_RE = re.compile(r"\w+")
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+def shingles(text):
+    """Returns the set of hashed word 3-grams of a lowercased text (single words for very short texts)."""
+    words = WORD_RE.findall((text or "").lower())
+    if len(words) < SHINGLE_WORDS:
+        return {_hash64(word.encode("utf-8")) for word in words}
+    return {_hash64(" ".join(words[i:i + SHINGLE_WORDS]).encode("utf-8")) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+def minhash(text):
+    """Returns the NUM_PERM-value MinHash signature of a text, or None when it has no words."""
+    hashed = shingles(text)
+    if not hashed:
+        return None
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashed) for a, b in PERMUTATIONS]
+
+def lsh_buckets(signature):
+    """Returns (band, bucket) pairs for a signature; bucket ids are signed 64-bit so they fit a bigint."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        bucket = _hash64(b"".join(value.to_bytes(8, "big") for value in rows))
+        buckets.append((band, bucket - (1 << 63)))
+    return buckets
+
+def similarity(first, second):
+    """Estimates the Jaccard similarity of two texts from their signatures."""
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_PERM
+
+def find_duplicates(conn, signatures):
+    """Looks up stored near-duplicates for a batch of signatures in one bucket query.
+
+    `signatures` maps a batch key to its signature; returns {key: (article_id, similarity)} with
+    article_id being the root of the matched cluster.
+    """
+    keys, bands, buckets = [], [], []
+    for key, signature in signatures.items():
+        for band, bucket in lsh_buckets(signature):
+            keys.append(key)
+            bands.append(band)
+            buckets.append(bucket)
+    if not keys:
+        return {}
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT DISTINCT q.ord, a.id, coalesce(a.duplicate_of, a.id), a.minhash
+        FROM unnest(%s::smallint[], %s::bigint[]) WITH ORDINALITY AS q(band, bucket, ord)
+        JOIN article_lsh_buckets b ON b.band = q.band AND b.bucket = q.bucket
+        JOIN articles a ON a.id = b.article_id
+    """, (bands, buckets))
+    matches = {}
+    for ordinal, article_id, root_id, candidate in cursor.fetchall():
+        key = keys[ordinal - 1]
+        score = similarity(signatures[key], candidate)
+        if score >= DUPLICATE_THRESHOLD and score > matches.get(key, (None, 0))[1]:
+            matches[key] = (root_id, score)
+    cursor.close()
+    return matches
+
+def index_signatures(conn, signatures):
+    """Adds articles' signatures to the LSH bucket table; `signatures` maps article id to signature."""
+    rows = [(band, bucket, article_id) for article_id, signature in signatures.items() for band, bucket in lsh_buckets(signature)]
+    if not rows:
+        return
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO article_lsh_buckets (band, bucket, article_id)
+        SELECT * FROM unnest(%s::smallint[], %s::bigint[], %s::int[])
+        ON CONFLICT DO NOTHING
+    """, ([row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows]))
+    cursor.close()
+
+def backfill(batch_size=500):
+    """Signs and indexes stored articles that have no signature yet, oldest first, so earlier copies become cluster roots."""
+    from database import db_connection
+
+    total = duplicates = 0
+    while True:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, content FROM articles WHERE minhash IS NULL ORDER BY id LIMIT %s", (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for article_id, content in rows:
+                signature = minhash(content) or []
+                match = find_duplicates(conn, {article_id: signature}).get(article_id) if signature else None
+                cursor.execute("UPDATE articles SET minhash = %s, duplicate_of = %s WHERE id = %s",
+                               (signature, match[0] if match else None, article_id))
+                index_signatures(conn, {article_id: signature} if signature else {})
+                duplicates += match is not None
+            cursor.close()
+        total += len(rows)
+        print(f"🔹 Indexed {total} articles, {duplicates} near-duplicates so far")
+    print(f"✅ Backfill done: {total} articles, {duplicates} near-duplicates")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Near-duplicate index maintenance.")
+    parser.add_argument("--backfill", action="store_true", help="sign and index articles stored before the index existed")
+    args = parser.parse_args()
+    if args.backfill:
+        backfill()
+    else:
+        parser.print_help()
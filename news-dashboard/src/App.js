@@ -6,13 +6,16 @@ const apiUrl = process.env.REACT_APP_API_URL || "http://127.0.0.1:8000"; // Fall
 function App() {
   const [articles, setArticles] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
 
-  // Fetch articles from FastAPI
-  useEffect(() => {
-    axios.get(`${apiUrl}/articles/`)
+  // Fetch one page of articles from FastAPI (the API pages by cursor, newest first)
+  const fetchArticles = (cursor = null) => {
+    setLoading(true);
+    axios.get(`${apiUrl}/articles/`, { params: cursor ? { cursor } : {} })
       .then(response => {
         if (response.data && Array.isArray(response.data.articles)) {
-          setArticles(response.data.articles);
+          setArticles(prevArticles => cursor ? [...prevArticles, ...response.data.articles] : response.data.articles);
+          setNextCursor(response.data.next_cursor);
         } else {
           console.error("Unexpected API response structure:", response.data);
           setArticles([]);
@@ -20,7 +23,26 @@ function App() {
       })
       .catch(error => {
         console.error("Error fetching articles:", error);
-      });
+      })
+      .finally(() => setLoading(false));
+  };
+
+  useEffect(() => {
+    fetchArticles();
+  }, []);
+
+  // Apply rewrite status changes pushed by the API instead of refetching the list
+  useEffect(() => {
+    const events = new EventSource(`${apiUrl}/articles/events`);
+    events.addEventListener("status", (event) => {
+      const change = JSON.parse(event.data);
+      setArticles(prevArticles => prevArticles.map(article =>
+        article.id === change.id ? { ...article, rewrite_status: change.rewrite_status } : article
+      ));
+    });
+    // The server asks for a resync when this client fell behind or its listener reconnected
+    events.addEventListener("resync", () => fetchArticles());
+    return () => events.close();
   }, []);
 
   // Handle rewriting an article
@@ -54,6 +76,11 @@ function App() {
         {articles.map((article) => (
           <li key={article.id} style={{ marginBottom: "10px" }}>
             <strong>{article.title}</strong>
+            {article.duplicates > 0 && (
+              <span style={{ marginLeft: "8px", color: "#666" }}>
+                (+{article.duplicates} near-duplicate{article.duplicates > 1 ? "s" : ""})
+              </span>
+            )}
             <button 
               style={{ marginLeft: "10px", cursor: "pointer" }}
               onClick={() => handleRewrite(article.id)}
@@ -65,6 +92,11 @@ function App() {
           </li>
         ))}
       </ul>
+      {nextCursor && (
+        <button onClick={() => fetchArticles(nextCursor)} disabled={loading}>
+          {loading ? "Loading..." : "Load more"}
+        </button>
+      )}
     </div>
   );
 }
@@ -0,0 +1,228 @@
+import asyncio
+import os
+from article_store import known_links, save_articles
+from crawl_state import due_items, feed_cursor, mark_failed, mark_fetched, new_items, record_items
+from extractors import parse_article, parse_feed
+from metrics import count, timed
+from near_dup import minhash
+from feed_cache import body_hash, conditional_headers, load_feed_cache, store_feed_cache
+
+MAX_ARTICLES_PER_FEED = 10  # Limit articles scraped per feed (for testing)
+
+# Stage sizing: fetch tasks are cheap coroutines, parse workers are processes
+FETCH_WORKERS = int(os.getenv("SCRAPER_FETCH_WORKERS", "16"))
+PARSE_WORKERS = int(os.getenv("SCRAPER_PARSE_WORKERS", str(os.cpu_count() or 2)))
+QUEUE_SIZE = int(os.getenv("SCRAPER_QUEUE_SIZE", "64"))
+PERSIST_BATCH = int(os.getenv("SCRAPER_PERSIST_BATCH", "50"))
+PERSIST_FLUSH_SECONDS = 2.0
+
+STOP = object()
+
+async def run_all(coroutines):
+    """Runs coroutines concurrently; if one raises, the others are cancelled and awaited before it propagates.
+
+    A failed scrape must not leave stage workers blocked on their queues in a resident process.
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+class ScrapePipeline:
+    """Fetch -> parse/extract (process pool) -> persist, connected by bounded queues for backpressure."""
+
+    def __init__(self, fetcher, parse_pool, fetch_workers=FETCH_WORKERS, parse_workers=PARSE_WORKERS,
+                 queue_size=QUEUE_SIZE, persist_batch=PERSIST_BATCH, max_per_feed=MAX_ARTICLES_PER_FEED):
+        self.fetcher = fetcher
+        self.parse_pool = parse_pool
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.persist_batch = persist_batch
+        self.max_per_feed = max_per_feed
+        self.source_slots = {}
+        # Links recorded but not yet stored or given up on, across concurrent runs
+        self.queued_links = set()
+
+    async def run(self, feeds, new_items=None):
+        """Scrapes the given feeds and returns the articles that were stored.
+
+        If `new_items` is a dict it is filled with {feed url: new feed items recorded}, or None
+        for a feed that could not be read; the scheduler adapts poll intervals from it.
+        """
+        fetch_queue = asyncio.Queue(self.queue_size)
+        parse_queue = asyncio.Queue(self.queue_size)
+        persist_queue = asyncio.Queue(self.queue_size)
+        saved = []
+
+        async def discover():
+            await run_all(self._discover(feed, fetch_queue, new_items) for feed in feeds)
+            for _ in range(self.fetch_workers):
+                await fetch_queue.put(STOP)
+
+        async def fetch_stage():
+            await run_all(self._fetch_worker(fetch_queue, parse_queue) for _ in range(self.fetch_workers))
+            for _ in range(self.parse_workers):
+                await parse_queue.put(STOP)
+
+        async def parse_stage():
+            await run_all(self._parse_worker(parse_queue, persist_queue) for _ in range(self.parse_workers))
+            await persist_queue.put(STOP)
+
+        await run_all([discover(), fetch_stage(), parse_stage(), self._persist(persist_queue, saved)])
+        return saved
+
+    async def _discover(self, feed, fetch_queue, new_items=None):
+        """Checkpoints the feed's new items, then queues its pending and retry-due items for fetching.
+
+        Items left pending by an interrupted run are picked up here even when the feed itself
+        has not changed, so a run resumes where the last one stopped.
+        """
+        try:
+            recorded = await self._record_new_items(feed)
+        except Exception as e:
+            recorded = None
+            print(f"⚠️ Failed to read RSS feed {feed['url']}: {e}")
+        if new_items is not None:
+            new_items[feed["url"]] = recorded
+        try:
+            items = await asyncio.to_thread(due_items, feed["url"], self.max_per_feed)
+        except Exception as e:
+            print(f"⚠️ Failed to load crawl state for {feed['url']}: {e}")
+            return
+        for item in items:
+            await fetch_queue.put({**item, "source": feed["name"], "source_key": feed.get("source"),
+                                   "concurrency": feed.get("concurrency"), "extractor": feed.get("extractor")})
+
+    async def _record_new_items(self, feed):
+        """Polls one feed and records items newer than its crawl cursor as pending crawl items.
+
+        Returns how many items were recorded, or None when the feed could not be fetched.
+        """
+        cache = await asyncio.to_thread(load_feed_cache, feed["url"])
+        with timed("feed_fetch"):
+            response = await self.fetcher.get(feed["url"], headers=conditional_headers(cache))
+        if response is not None and response.status_code == 304:
+            count("feed_fetch", "not_modified")
+            print(f"⏸️ Feed not modified: {feed['url']}")
+            await asyncio.to_thread(store_feed_cache, feed["url"], response)
+            return 0
+        if response is None or response.status_code != 200:
+            count("feed_fetch", "failed")
+            print(f"⚠️ Failed to fetch RSS feed: {feed['url']}")
+            return None
+
+        digest = body_hash(response.content)
+        if cache and cache["body_hash"] == digest:
+            count("feed_fetch", "unchanged")
+            print(f"⏸️ Feed unchanged: {feed['url']}")
+            await asyncio.to_thread(store_feed_cache, feed["url"], response)
+            return 0
+
+        count("feed_fetch", "changed")
+        loop = asyncio.get_running_loop()
+        items = await loop.run_in_executor(self.parse_pool, parse_feed, response.content)
+        fresh = [item for item in new_items(items, cache) if item["link"]]
+        known = await asyncio.to_thread(known_links, [item["link"] for item in fresh])
+        pending = []
+        for item in fresh:
+            if item["link"] in known or item["link"] in self.queued_links:
+                print(f"⏩ Skipping duplicate article: {item['title']}")
+                continue
+            # The same story listed in another feed is fetched and flagged by MinHash in save_articles
+            pending.append(item)
+
+        # The pending rows are the checkpoint, so the cursor can move past these items right away.
+        # Links count as in flight only once recorded: if recording fails the next poll offers them again.
+        await asyncio.to_thread(record_items, feed, pending)
+        self.queued_links.update(item["link"] for item in pending)
+        await asyncio.to_thread(store_feed_cache, feed["url"], response, digest, feed_cursor(items))
+        print(f"🔹 {feed['url']}: {len(items)} items, {len(pending)} new")
+        return len(pending)
+
+    def _release(self, link):
+        """Forgets an in-flight item once it is stored or has failed."""
+        self.queued_links.discard(link)
+
+    def _source_slot(self, item):
+        """Returns the semaphore enforcing the item's source concurrency budget."""
+        key = item["source_key"] or item["source"]
+        if key not in self.source_slots:
+            self.source_slots[key] = asyncio.Semaphore(item["concurrency"] or self.fetch_workers)
+        return self.source_slots[key]
+
+    async def _fetch_worker(self, fetch_queue, parse_queue):
+        while (item := await fetch_queue.get()) is not STOP:
+            try:
+                async with self._source_slot(item):
+                    with timed("article_fetch"):
+                        response = await self.fetcher.get(item["link"])
+                if response is None:
+                    error = "request failed"
+                elif response.status_code != 200:
+                    error = f"HTTP {response.status_code}"
+                else:
+                    error = None
+            except Exception as e:  # e.g. a malformed link: fail the item, not the whole run
+                error = f"{type(e).__name__}: {e}"
+            if error:
+                count("article_fetch", "failed")
+                print(f"Failed to fetch article: {item['link']} ({error})")
+                self._release(item["link"])
+                await asyncio.to_thread(mark_failed, item["link"], error)
+                continue
+            count("article_fetch", "ok")
+            await parse_queue.put((item, response.content, response.charset_encoding))
+
+    async def _parse_worker(self, parse_queue, persist_queue):
+        loop = asyncio.get_running_loop()
+        while (job := await parse_queue.get()) is not STOP:
+            item, content, encoding = job
+            try:
+                with timed("parse"):
+                    full_content, published_at = await loop.run_in_executor(self.parse_pool, parse_article, content, encoding, item["extractor"])
+                # Signed here in the process pool; the near-duplicate check happens at save
+                signature = await loop.run_in_executor(self.parse_pool, minhash, full_content) if full_content else None
+            except Exception as e:
+                count("parse", "failed")
+                print(f"Error extracting article content from {item['link']}: {e}")
+                self._release(item["link"])
+                await asyncio.to_thread(mark_failed, item["link"], e)
+                continue
+            print(f"📅 Extracted published_at: {published_at} for {item['link']}")
+            if not full_content:
+                count("parse", "empty")
+                print(f"Could not find article content for: {item['link']}")
+                self._release(item["link"])
+                await asyncio.to_thread(mark_failed, item["link"], "no article content")
+                continue
+            count("parse", "ok")
+            await persist_queue.put({"title": item["title"] or item["link"], "url": item["link"], "content": full_content, "source": item["source"], "author": item["author"], "published_at": published_at, "minhash": signature})
+
+    async def _persist(self, persist_queue, saved):
+        """Writes parsed articles in bulk, flushing on batch size or after a quiet period."""
+        batch = []
+        while True:
+            try:
+                article = await asyncio.wait_for(persist_queue.get(), PERSIST_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                article = None
+            if article is not None and article is not STOP:
+                batch.append(article)
+            if batch and (article is None or article is STOP or len(batch) >= self.persist_batch):
+                try:
+                    with timed("db_write"):
+                        stored = await asyncio.to_thread(save_articles, batch)
+                        await asyncio.to_thread(mark_fetched, [article["url"] for article in batch])
+                finally:
+                    for stored_article in batch:
+                        self._release(stored_article["url"])
+                count("db_write", "saved", len(stored))
+                count("db_write", "skipped", len(batch) - len(stored))
+                saved.extend(stored_article for stored_article in batch if stored_article["url"] in stored)
+                batch = []
+            if article is STOP:
+                return
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from metrics import REWRITE_CACHE
+
+# Cache settings: REWRITE_CACHE is "on", "off" or "replay" (serve hits only, never call the model)
+MODE = os.getenv("REWRITE_CACHE", "on")
+MAX_AGE_DAYS = int(os.getenv("REWRITE_CACHE_MAX_AGE_DAYS", "30"))
+MAX_BYTES = int(os.getenv("REWRITE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Per-process counters, logged by the worker
+stats = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_content(text):
+    """Normalizes article text so re-scraped copies with only whitespace/Unicode-form changes share a key."""
+    return WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+def cache_key(article_text, prompt, model, temperature, settings=None):
+    """Returns the SHA-256 hex key for one rewrite request.
+
+    `settings` is a dict of any other options that change the output (chunking, output budgets).
+    """
+    payload = json.dumps({
+        "content": normalize_content(article_text),
+        "prompt": prompt,
+        "model": model,
+        "temperature": temperature,
+        "settings": settings or {},
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def lookup(conn, key):
+    """Returns the cached (rewritten_content, model) for a key and records the hit, or None on a miss."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE rewrite_cache SET hits = hits + 1, last_used_at = now()
+        WHERE cache_key = %s AND created_at > now() - make_interval(days => %s)
+        RETURNING rewritten_content, model
+    """, (key, MAX_AGE_DAYS))
+    row = cursor.fetchone()
+    cursor.close()
+    stats["hits" if row else "misses"] += 1
+    REWRITE_CACHE.labels("hit" if row else "miss").inc()
+    return row
+
+def store(conn, key, completion):
+    """Caches a model completion under its request key."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO rewrite_cache (cache_key, model, rewritten_content, prompt_tokens, completion_tokens, size_bytes)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (cache_key) DO UPDATE
+        SET rewritten_content = EXCLUDED.rewritten_content, model = EXCLUDED.model,
+            prompt_tokens = EXCLUDED.prompt_tokens, completion_tokens = EXCLUDED.completion_tokens,
+            size_bytes = EXCLUDED.size_bytes, created_at = now(), last_used_at = now()
+    """, (key, completion.model, completion.text, completion.prompt_tokens, completion.completion_tokens,
+          len(completion.text.encode("utf-8"))))
+    cursor.close()
+    stats["stores"] += 1
+
+def evict(conn, max_age_days=MAX_AGE_DAYS, max_bytes=MAX_BYTES):
+    """Drops entries older than max_age_days, then least recently used ones until the cache fits max_bytes."""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM rewrite_cache WHERE created_at < now() - make_interval(days => %s)", (max_age_days,))
+    evicted = cursor.rowcount
+    cursor.execute("""
+        DELETE FROM rewrite_cache WHERE cache_key IN (
+            SELECT cache_key FROM (
+                SELECT cache_key, sum(size_bytes) OVER (ORDER BY last_used_at DESC, cache_key) AS running_bytes
+                FROM rewrite_cache
+            ) ranked WHERE running_bytes > %s
+        )
+    """, (max_bytes,))
+    evicted += cursor.rowcount
+    cursor.close()
+    stats["evicted"] += evicted
+    return evicted
+
+def cache_stats(conn):
+    """Returns entry count, stored bytes, lifetime hits and tokens saved across the whole cache."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT count(*), coalesce(sum(size_bytes), 0), coalesce(sum(hits), 0),
+               coalesce(sum(hits * (prompt_tokens + completion_tokens)), 0)
+        FROM rewrite_cache
+    """)
+    entries, size_bytes, hits, tokens_saved = cursor.fetchone()
+    cursor.close()
+    return {"entries": entries, "bytes": size_bytes, "hits": hits, "tokens_saved": tokens_saved}
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import os
+import random
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from archive import create_partitions
+import integrity
+from pipeline import PARSE_WORKERS, ScrapePipeline
+import metrics
+from metrics import count
+from scraper import FEEDS, make_fetcher
+
+# Each feed's interval is sized so a poll finds about POLL_TARGET_ITEMS new items at its observed rate
+POLL_TARGET_ITEMS = float(os.getenv("POLL_TARGET_ITEMS", "2"))
+POLL_RATE_ALPHA = 0.3  # EWMA weight of the newest rate sample
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.1"))  # +-10% so feeds on one host drift apart
+STARTUP_SPREAD_SECONDS = float(os.getenv("INGEST_STARTUP_SPREAD_SECONDS", "30"))
+SHUTDOWN_GRACE_SECONDS = float(os.getenv("INGEST_SHUTDOWN_GRACE_SECONDS", "30"))
+HEALTH_PORT = int(os.getenv("INGEST_HEALTH_PORT", "8081"))
+# Keep idle connections between polls instead of reconnecting (and redoing TLS) every time
+KEEPALIVE_SECONDS = float(os.getenv("INGEST_KEEPALIVE_SECONDS", "120"))
+PARTITION_CHECK_SECONDS = 24 * 3600
+# Published articles are sealed into one integrity batch per interval
+INTEGRITY_SEAL_SECONDS = float(os.getenv("INTEGRITY_SEAL_SECONDS", "3600"))
+STARTED_AT = time.time()
+
+def utc_iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+
+class FeedSchedule:
+    """Poll interval for one feed, adapted from the rate at which it publishes new items.
+
+    The rate rises immediately when a poll finds more than expected and decays through an
+    EWMA when the feed goes quiet, so busy feeds are picked up fast and quiet ones back off
+    towards max_poll_interval. Failed polls back off exponentially on top of the interval.
+    """
+
+    def __init__(self, feed):
+        self.url = feed["url"]
+        self.min_interval = feed.get("min_poll_interval", feed["poll_interval"])
+        self.max_interval = feed.get("max_poll_interval", feed["poll_interval"])
+        self.interval = self.clamp(feed["poll_interval"])
+        self.rate = None  # new items per second
+        self.last_read = None  # monotonic time of the last successful read
+        self.failures = 0
+        self.last_success = None
+        self.last_error = None
+        self.next_poll = None
+
+    def clamp(self, seconds):
+        return max(self.min_interval, min(self.max_interval, seconds))
+
+    def record(self, new_items, started):
+        """Updates the interval after a poll that began at monotonic `started`; None means it failed."""
+        if new_items is None:
+            self.failures += 1
+            self.last_error = time.time()
+            return
+        self.failures = 0
+        self.last_success = time.time()
+        # The first read records the whole feed backlog, so it says nothing about the rate
+        if self.last_read is not None:
+            sample = new_items / max(1.0, started - self.last_read)
+            if self.rate is None or sample > self.rate:
+                self.rate = sample
+            else:
+                self.rate = POLL_RATE_ALPHA * sample + (1 - POLL_RATE_ALPHA) * self.rate
+            self.interval = self.clamp(POLL_TARGET_ITEMS / self.rate if self.rate > 0 else self.max_interval)
+        self.last_read = started
+
+    def delay(self):
+        """Seconds until the next poll, with backoff after failures and jitter."""
+        seconds = self.interval if not self.failures else min(self.max_interval, self.interval * 2 ** self.failures)
+        seconds *= random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+        self.next_poll = time.time() + seconds
+        return seconds
+
+    def stale(self, now):
+        """True when the feed has not been read for more than twice its longest interval."""
+        return now - (self.last_success or STARTED_AT) > 2 * self.max_interval + SHUTDOWN_GRACE_SECONDS
+
+    def describe(self, now):
+        return {"interval": round(self.interval, 1), "rate_per_hour": round(self.rate * 3600, 2) if self.rate is not None else None,
+                "failures": self.failures, "next_poll": utc_iso(self.next_poll), "last_success": utc_iso(self.last_success),
+                "last_error": utc_iso(self.last_error), "stale": self.stale(now)}
+
+async def sleep_until_stopped(stop, seconds):
+    """Sleeps for `seconds`, waking early on shutdown; returns True if shutdown was requested."""
+    try:
+        await asyncio.wait_for(stop.wait(), max(0, seconds))
+    except asyncio.TimeoutError:
+        pass
+    return stop.is_set()
+
+async def poll_feed(pipeline, feed, schedule, stop):
+    """Scrapes one feed until shutdown, waiting its adaptive interval between polls."""
+    if await sleep_until_stopped(stop, random.uniform(0, STARTUP_SPREAD_SECONDS)):
+        return
+    while True:
+        started = time.monotonic()
+        new_items = {}
+        try:
+            articles = await pipeline.run([feed], new_items)
+            if articles:
+                print(f"✅ {feed['url']}: {len(articles)} new articles")
+        except Exception as e:
+            print(f"❌ Polling {feed['url']} failed: {e}")
+        schedule.record(new_items.get(feed["url"]), started)
+        count("feed_poll", "failed" if schedule.failures else "ok")
+        delay = schedule.delay() - (time.monotonic() - started)
+        if await sleep_until_stopped(stop, delay):
+            return
+
+async def maintain_partitions():
+    """Keeps next months' article partitions created ahead of the inserts that need them."""
+    while True:
+        try:
+            created = await asyncio.to_thread(create_partitions)
+            if created:
+                print(f"📅 Created article partitions: {', '.join(created)}")
+        except Exception as e:
+            print(f"❌ Creating article partitions failed: {e}")
+        await asyncio.sleep(PARTITION_CHECK_SECONDS)
+
+async def seal_integrity():
+    """Seals newly published articles and rewrites into Merkle batches and anchors their roots."""
+    while True:
+        try:
+            await asyncio.to_thread(integrity.seal)
+        except Exception as e:
+            print(f"❌ Sealing integrity batch failed: {e}")
+        await asyncio.sleep(INTEGRITY_SEAL_SECONDS)
+
+def health_report(schedules, stop):
+    """(HTTP status, body) for the health endpoint: 503 while shutting down or when every feed is stale."""
+    now = time.time()
+    feeds = {schedule.url: schedule.describe(now) for schedule in schedules}
+    if stop.is_set():
+        status = "stopping"
+    elif feeds and all(feed["stale"] for feed in feeds.values()):
+        status = "stale"
+    else:
+        status = "ok"
+    body = {"status": status, "uptime": round(now - STARTED_AT), "feeds": feeds}
+    return (200 if status == "ok" else 503), body
+
+async def serve_health(schedules, stop, port=HEALTH_PORT):
+    """Minimal HTTP server answering GET /health with the scheduler state as JSON."""
+
+    async def handle(reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/health":
+                status, body = health_report(schedules, stop)
+            else:
+                status, body = 404, {"detail": "Not Found"}
+            payload = json.dumps(body).encode("utf-8")
+            reason = {200: "OK", 404: "Not Found", 503: "Service Unavailable"}[status]
+            writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1") + payload)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, port=port)
+    print(f"🩺 Serving ingest health on :{port}/health")
+    return server
+
+async def run_scheduler(feeds=None, health_port=HEALTH_PORT):
+    """Polls every registered feed on its own adaptive cadence until SIGTERM/SIGINT.
+
+    One fetcher (with its connection pool), process pool and pipeline are shared by all
+    feeds for the life of the process. On shutdown no new polls start; polls in flight get
+    SHUTDOWN_GRACE_SECONDS to finish before they are cancelled.
+    """
+    feeds = feeds or FEEDS
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    schedules = [FeedSchedule(feed) for feed in feeds]
+    health = await serve_health(schedules, stop, health_port) if health_port else None
+    try:
+        with ProcessPoolExecutor(PARSE_WORKERS) as parse_pool:
+            async with make_fetcher(keepalive_expiry=KEEPALIVE_SECONDS) as fetcher:
+                pipeline = ScrapePipeline(fetcher, parse_pool)
+                maintenance = [asyncio.create_task(maintain_partitions()), asyncio.create_task(seal_integrity())]
+                polls = [asyncio.create_task(poll_feed(pipeline, feed, schedule, stop)) for feed, schedule in zip(feeds, schedules)]
+                print(f"🕒 Scheduling {len(feeds)} feeds")
+                await stop.wait()
+                print(f"🛑 Shutting down; waiting up to {SHUTDOWN_GRACE_SECONDS:.0f}s for polls in flight")
+                done, pending = await asyncio.wait(polls, timeout=SHUTDOWN_GRACE_SECONDS)
+                for task in [*pending, *maintenance]:
+                    task.cancel()
+                await asyncio.gather(*pending, *maintenance, return_exceptions=True)
+                if pending:
+                    print(f"⚠️ Cancelled {len(pending)} polls still running")
+    finally:
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(signum)
+        if health is not None:
+            health.close()
+            await health.wait_closed()
+    print("✅ Scheduler stopped")
+
+if __name__ == "__main__":
+    metrics.serve(metrics.SCHEDULER_METRICS_PORT)
+    asyncio.run(run_scheduler())
@@ -1,125 +1,78 @@
-import requests
-import xml.etree.ElementTree as ET
-from bs4 import BeautifulSoup
-from database import SessionLocal
-from models import Article
-import time
-from datetime import datetime
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from archive import create_partitions
+from fetcher import Fetcher
+from extractors import parse_article
+from article_store import save_articles
+from pipeline import PARSE_WORKERS, ScrapePipeline
+from sources import load_feeds
 import os
 
-# HS.fi RSS Feeds
-HS_RSS_FEEDS = [
-    {"name": "Helsingin Sanomat", "url": "http://www.hs.fi/rss/suomi.xml"},
-    {"name": "Helsingin Sanomat", "url": "http://www.hs.fi/rss/maailma.xml"},
-    {"name": "Helsingin Sanomat", "url": "https://www.hs.fi/rss/politiikka.xml"}
-]
+# RSS feeds from the source registry (sources.json)
+FEEDS = load_feeds()
 
-def article_exists(link):
-    """Checks if an article with the given link already exists in the database."""
-    db = SessionLocal()
-    exists = db.query(Article).filter_by(source_url=link).first() is not None
-    db.close()
-    return exists
+# Fetch engine settings (requests per second and burst are per host)
+FETCH_RATE = float(os.getenv("SCRAPER_RATE", "2"))
+FETCH_BURST = int(os.getenv("SCRAPER_BURST", "4"))
+FETCH_PER_HOST = int(os.getenv("SCRAPER_PER_HOST", "4"))
 
-def scrape_hs_rss():
-    """Fetches article links from HS.fi RSS feeds and extracts full article content with metadata."""
-    articles = []
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-
-    for feed in HS_RSS_FEEDS:
-        response = requests.get(feed["url"], headers=headers)
-        if response.status_code != 200:
-            print(f"⚠️ Failed to fetch RSS feed: {feed['url']}")
-            continue
-
-        root = ET.fromstring(response.content)
-        article_count = 0  # Track the number of articles scraped
-
-        for item in root.findall(".//item"):
-            if article_count >= 10:  # Stop after scraping 10 articles (for testing)
-                break
-
-            title = item.find("title").text
-            link = item.find("link").text
-
-            if article_exists(link):
-                print(f"⏩ Skipping duplicate article: {title}")
-                continue
-
-            published_at = item.find("pubDate").text if item.find("pubDate") else None
-            author = item.find("dc:creator").text if item.find("dc:creator") else "Tuntematon"
-            source = feed["name"]
-
-            if published_at:
-                try:
-                    published_at = datetime.strptime(published_at, "%a, %d %b %Y %H:%M:%S %z")
-                except ValueError:
-                    published_at = None
-
-            full_content, published_at = fetch_full_article(link)
-
-            if full_content:
-                save_article(title, link, full_content, published_at, source)
-                articles.append({"title": title, "url": link, "content": full_content, "source": source, "author": author, "published_at": published_at})
-                article_count += 1
+def make_fetcher(**options):
+    """Builds the shared fetch engine used for feeds and articles."""
+    return Fetcher(per_host=FETCH_PER_HOST, rate=FETCH_RATE, burst=FETCH_BURST, **options)
 
-            time.sleep(1)
+async def scrape_hs_rss_async(fetcher=None, parse_pool=None, feeds=None):
+    """Runs the fetch -> parse -> persist pipeline once over all registered feeds."""
+    try:
+        # One-shot runs may be all that is scheduled, so they keep the monthly partitions ahead too
+        await asyncio.to_thread(create_partitions)
+    except Exception as e:
+        print(f"❌ Creating article partitions failed: {e}")
+    own_fetcher = fetcher is None
+    own_pool = parse_pool is None
+    fetcher = fetcher or make_fetcher()
+    parse_pool = parse_pool or ProcessPoolExecutor(PARSE_WORKERS)
+    try:
+        return await ScrapePipeline(fetcher, parse_pool).run(feeds or FEEDS)
+    finally:
+        if own_fetcher:
+            await fetcher.close()
+        if own_pool:
+            parse_pool.shutdown()
 
-    return articles
+def scrape_hs_rss():
+    """Fetches article links from all registered RSS feeds and extracts full article content with metadata."""
+    return asyncio.run(scrape_hs_rss_async())
 
-def fetch_full_article(url):
-    """Fetches and extracts full article content and publication date from a given URL."""
+async def fetch_full_article_async(fetcher, url, rules=None):
+    """Fetches and extracts full article content and publication date using the shared fetcher."""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
+        response = await fetcher.get(url)
+        if response is None or response.status_code != 200:
             print(f"Failed to fetch article: {url}")
             return None, None
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        date_element = soup.select_one("meta[itemprop='datePublished']")
-        published_at = date_element["content"] if date_element else None
+        content, published_at = parse_article(response.content, response.charset_encoding, rules)
         print(f"📅 Extracted published_at: {published_at} for {url}")
-
-        article_body = soup.select_one("div.article-body")
-        if not article_body:
-            article_body = soup.find("div", class_="hs-article-content")
-        if not article_body:
-            article_body = soup.find("article")
-
-        if article_body:
-            paragraphs = article_body.find_all("p")
-            content = "\n".join([p.get_text(strip=True) for p in paragraphs]) if paragraphs else article_body.get_text(strip=True)
-            return content, published_at
-        else:
+        if not content:
             print(f"Could not find article content for: {url}")
             return None, None
+        return content, published_at
 
     except Exception as e:
         print(f"Error extracting article content from {url}: {e}")
         return None, None
 
+def fetch_full_article(url, rules=None):
+    """Fetches and extracts full article content and publication date from a given URL."""
+    async def run():
+        async with make_fetcher() as fetcher:
+            return await fetch_full_article_async(fetcher, url, rules)
+    return asyncio.run(run())
+
 def save_article(title, url, content, published_at, source):
     """Stores the article in the database if it's not already saved."""
-    db = SessionLocal()
-    existing_article = db.query(Article).filter_by(source_url=url).first()
-    if not existing_article:
-        print(f"✅ Saving article: {title}, Published At: {published_at}")
-        new_article = Article(
-            title=title,
-            content=content,
-            source_url=url,
-            source=source,
-            published_at=published_at if published_at else None
-        )
-        db.add(new_article)
-        db.commit()
-    db.close()
+    return url in save_articles([{"title": title, "url": url, "content": content, "published_at": published_at, "source": source}])
 
 if __name__ == "__main__":
     articles = scrape_hs_rss()
-    print(f"✅ Scraped {len(articles)} full articles from HS.fi RSS")
\ No newline at end of file
+    print(f"✅ Scraped {len(articles)} full articles from {len(FEEDS)} RSS feeds")
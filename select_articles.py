@@ -1,21 +1,14 @@
-import psycopg2
-import os
-
-# Database connection settings (using environment variables securely)
-DB_SETTINGS = {
-    "dbname": os.getenv("DB_NAME", "news_platform"),
-    "user": os.getenv("DB_USER", "news_admin"),
-    "password": os.getenv("DB_PASSWORD"),
-    "host": os.getenv("DB_HOST", "localhost")
-}
+import argparse
+from database import db_connection
+import job_queue
 
 def list_articles():
     """Fetch all newly scraped articles that are not yet selected for rewriting."""
-    conn = psycopg2.connect(**DB_SETTINGS)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id, title FROM articles WHERE selected_for_rewrite = FALSE ORDER BY created_at DESC;")
-    articles = cursor.fetchall()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, title FROM articles WHERE selected_for_rewrite = FALSE AND duplicate_of IS NULL ORDER BY created_at DESC;")
+        articles = cursor.fetchall()
+        cursor.close()
 
     if not articles:
         print("✅ No new articles available for selection.")
@@ -24,35 +17,63 @@ def list_articles():
         for article in articles:
             print(f"{article[0]}: {article[1]}")
 
-    cursor.close()
-    conn.close()
-
-def select_articles():
-    """Allows user to manually select which articles should be rewritten."""
-    list_articles()
-    article_ids = input("\nEnter the article IDs to be rewritten (comma-separated): ").strip()
-    
-    if not article_ids:
-        print("⚠️ No articles selected.")
-        return
+def mark_selected(article_ids):
+    """Moves not_selected articles to 'pending' and queues their rewrites in one transaction; returns the ids that changed."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE articles SET rewrite_status = 'pending', selected_for_rewrite = TRUE
+            WHERE id = ANY(%s) AND rewrite_status = 'not_selected' AND duplicate_of IS NULL
+            RETURNING id
+        """, (article_ids,))
+        selected = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        job_queue.enqueue(conn, selected)
+    return selected
 
-    try:
-        article_ids = [int(i) for i in article_ids.split(",")]
-    except ValueError:
-        print("❌ Invalid input. Please enter valid article IDs.")
-        return
+def newest_unselected(source=None, limit=100):
+    """Returns ids of the newest not_selected articles, optionally from one source."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id FROM articles
+            WHERE rewrite_status = 'not_selected' AND duplicate_of IS NULL AND (%(source)s IS NULL OR source = %(source)s)
+            ORDER BY created_at DESC LIMIT %(limit)s
+        """, {"source": source, "limit": limit})
+        article_ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+    return article_ids
 
-    conn = psycopg2.connect(**DB_SETTINGS)
-    cursor = conn.cursor()
+def select_articles(article_ids=None):
+    """Selects articles for rewriting; prompts for ids when none are given."""
+    if article_ids is None:
+        list_articles()
+        article_ids = input("\nEnter the article IDs to be rewritten (comma-separated): ").strip()
 
-    query = "UPDATE articles SET selected_for_rewrite = TRUE WHERE id = ANY(%s)"
-    cursor.execute(query, (article_ids,))
-    conn.commit()
+        if not article_ids:
+            print("⚠️ No articles selected.")
+            return
 
-    cursor.close()
-    conn.close()
+        try:
+            article_ids = [int(i) for i in article_ids.split(",")]
+        except ValueError:
+            print("❌ Invalid input. Please enter valid article IDs.")
+            return
 
-    print(f"✅ Selected {len(article_ids)} articles for rewriting.")
+    selected = mark_selected(article_ids)
+    print(f"✅ Selected {len(selected)} articles for rewriting.")
+    skipped = sorted(set(article_ids) - set(selected))
+    if skipped:
+        print(f"⚠️ Skipped {len(skipped)} articles that are missing, near-duplicates or not in 'not_selected': {skipped}")
 
 if __name__ == "__main__":
-    select_articles()
+    parser = argparse.ArgumentParser(description="Select articles for rewriting.")
+    parser.add_argument("ids", nargs="*", type=int, help="article ids to select (prompts when omitted)")
+    parser.add_argument("--source", help="select the newest unselected articles from this source")
+    parser.add_argument("--limit", type=int, default=100, help="how many articles --source selects")
+    args = parser.parse_args()
+
+    if args.source:
+        select_articles(newest_unselected(args.source, args.limit))
+    else:
+        select_articles(args.ids or None)
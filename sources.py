@@ -0,0 +1,37 @@
+import json
+import os
+
+# Registry of news sources and their RSS feeds; see sources.json for the format
+SOURCES_FILE = os.getenv("SOURCES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "sources.json"))
+
+def load_feeds(path=SOURCES_FILE):
+    """Loads the source registry and returns one dict per feed with its source settings merged in.
+
+    Settings resolve feed -> source -> defaults, so a feed can override its source's
+    poll_interval (and its min/max bounds), concurrency or extractor rules.
+    """
+    with open(path, encoding="utf-8") as f:
+        registry = json.load(f)
+
+    defaults = registry.get("defaults", {})
+    feeds = []
+    for key, source in registry["sources"].items():
+        if not source.get("enabled", True):
+            continue
+        for feed in source["feeds"]:
+            if isinstance(feed, str):
+                feed = {"url": feed}
+            settings = {**defaults, **{k: v for k, v in source.items() if k != "feeds"}, **feed}
+            extractor = {**defaults.get("extractor", {}), **source.get("extractor", {}), **feed.get("extractor", {})}
+            feeds.append({
+                "source": key,
+                "name": source["name"],
+                "url": feed["url"],
+                "poll_interval": settings["poll_interval"],
+                # Bounds for the scheduler's adaptive interval; poll_interval is where it starts
+                "min_poll_interval": settings.get("min_poll_interval", settings["poll_interval"]),
+                "max_poll_interval": settings.get("max_poll_interval", settings["poll_interval"]),
+                "concurrency": settings["concurrency"],
+                "extractor": extractor,
+            })
+    return feeds
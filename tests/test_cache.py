@@ -0,0 +1,62 @@
+import gzip
+from cache import ENTRY_OVERHEAD_BYTES, ByteLRU, Encoded, accepted_encodings
+
+class Value:
+    def __init__(self, size):
+        self.size = size
+
+def test_byte_accounting_and_lru_eviction():
+    cache = ByteLRU(max_bytes=100)
+    for key in "abc":
+        assert cache.put(key, Value(30))
+    assert cache.bytes == 90
+    cache.get("a")  # "b" is now least recently used
+    assert cache.put("d", Value(30))
+    assert list(cache.entries) == ["c", "a", "d"] and cache.bytes == 90
+    assert cache.stats["evictions"] == 1
+
+def test_replacing_a_key_does_not_leak_bytes():
+    cache = ByteLRU(max_bytes=100)
+    cache.put("a", Value(40))
+    cache.put("a", Value(10))
+    assert cache.bytes == 10 and len(cache.entries) == 1
+
+def test_value_larger_than_cache_is_refused():
+    cache = ByteLRU(max_bytes=100)
+    cache.put("a", Value(50))
+    assert not cache.put("b", Value(101))
+    assert list(cache.entries) == ["a"] and cache.bytes == 50
+
+def test_stale_put_after_invalidation_is_rejected():
+    cache = ByteLRU(max_bytes=100)
+    token = cache.token()
+    cache.invalidate(["a"])
+    assert not cache.put("a", Value(10), token)
+    assert cache.get("a") is None and cache.stats["stale_puts"] == 1
+    assert cache.put("a", Value(10), cache.token())
+
+def test_invalidate_and_clear():
+    cache = ByteLRU(max_bytes=100)
+    cache.put("a", Value(10))
+    cache.put("b", Value(20))
+    cache.invalidate(["a", "missing"])
+    assert list(cache.entries) == ["b"] and cache.bytes == 20 and cache.stats["invalidations"] == 1
+    token = cache.token()
+    cache.clear()
+    assert not cache.entries and cache.bytes == 0 and cache.token() != token
+
+def test_encoded_bodies_and_negotiation():
+    payload = b'{"content": "' + b"uutinen " * 200 + b'"}'
+    encoded = Encoded(payload)
+    assert encoded.size == sum(len(body) for body in encoded.bodies.values()) + ENTRY_OVERHEAD_BYTES
+    encoding, body = encoded.body_for("gzip, deflate")
+    assert encoding == "gzip" and gzip.decompress(body) == payload
+    assert encoded.body_for("gzip;q=0") == (None, payload)
+    assert encoded.body_for(None) == (None, payload)
+    assert Encoded(b"{}").bodies.keys() == {"identity"}
+    assert Encoded(payload).etag == encoded.etag != Encoded(payload + b" ").etag
+
+def test_accepted_encodings():
+    assert accepted_encodings("br;q=1.0, GZIP , identity;q=0") == {"br", "gzip"}
+    assert accepted_encodings("gzip; q=0") == set()
+    assert accepted_encodings("") == set()
@@ -0,0 +1,42 @@
+import chunking
+from chunking import count_tokens, output_budget, plan_chunks, split_oversized
+
+def paragraphs(count, words):
+    return "\n".join(" ".join(f"sana{p}x{w}" for w in range(words)) for p in range(count))
+
+def test_short_article_is_one_chunk():
+    text = "Lyhyt uutinen.\nToinen kappale."
+    assert plan_chunks(text, chunk_tokens=1200) == [(text, count_tokens(text))]
+
+def test_chunks_stay_within_limit_and_keep_paragraph_order():
+    text = paragraphs(30, 40)
+    chunks = plan_chunks(text, chunk_tokens=400)
+    assert len(chunks) > 1
+    for chunk, tokens in chunks:
+        assert count_tokens(chunk) <= tokens <= 400
+    assert "\n".join(chunk for chunk, _ in chunks) == text
+
+def test_chunk_sizes_are_evened_out():
+    text = paragraphs(18, 20)  # about 1.5 chunks of 600 tokens
+    sizes = [tokens for _, tokens in plan_chunks(text, chunk_tokens=count_tokens(text) * 2 // 3)]
+    assert len(sizes) == 2 and abs(sizes[0] - sizes[1]) < max(sizes) / 3
+
+def test_oversized_paragraph_is_split_within_limit():
+    text = "Pitkä lause ilman loppua " * 400 + "ja " + "x" * 5000
+    units = split_oversized(text, 300, None)
+    assert all(count_tokens(unit) <= 300 for unit in units)
+    assert "".join(units).replace(" ", "") == text.replace(" ", "")
+
+def test_split_rechecks_dense_stretches(monkeypatch):
+    # Numbers cost a token per digit here, so an even split by word count would overshoot
+    monkeypatch.setattr(chunking, "count_tokens",
+                        lambda text, model=None: sum(len(word) if word.isdigit() else 1 for word in text.split(" ")))
+    text = " ".join(["sana"] * 600 + ["1234567890"] * 60)
+    units = split_oversized(text, 100, None)
+    assert all(chunking.count_tokens(unit) <= 100 for unit in units)
+
+def test_output_budget_is_clamped():
+    assert output_budget(1) == chunking.MIN_OUTPUT_TOKENS
+    assert output_budget(10 ** 6) == chunking.MAX_OUTPUT_TOKENS
+    middle = 1000
+    assert chunking.MIN_OUTPUT_TOKENS <= output_budget(middle) <= chunking.MAX_OUTPUT_TOKENS
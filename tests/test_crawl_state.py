@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta, timezone
+from crawl_state import feed_cursor, new_items, utc_naive
+
+HELSINKI = timezone(timedelta(hours=2))
+
+def item(guid, hour=None):
+    return {"guid": guid, "link": f"https://www.hs.fi/a/{guid}",
+            "published_at": datetime(2025, 3, 3, hour, tzinfo=HELSINKI) if hour is not None else None}
+
+def test_utc_naive():
+    assert utc_naive(datetime(2025, 3, 3, 8, tzinfo=HELSINKI)) == datetime(2025, 3, 3, 6)
+    assert utc_naive(datetime(2025, 3, 3, 8)) == datetime(2025, 3, 3, 8)
+    assert utc_naive(None) is None
+
+def test_first_read_takes_every_item():
+    items = [item("c", 10), item("b", 9)]
+    assert new_items(items, None) == items
+
+def test_dated_items_newer_than_cursor():
+    items = [item("d", 11), item("c", 10), item("a", 8), item("b", 9)]
+    cache = {"last_guid": "c", "last_published_at": datetime(2025, 3, 3, 8)}  # 10:00 +02:00 in UTC
+    assert [i["guid"] for i in new_items(items, cache)] == ["d"]
+
+def test_undated_items_read_up_to_last_guid():
+    items = [item("c"), item("b"), item("a")]
+    assert [i["guid"] for i in new_items(items, {"last_guid": "b", "last_published_at": None})] == ["c"]
+    assert [i["guid"] for i in new_items(items, {"last_guid": "gone", "last_published_at": None})] == ["c", "b", "a"]
+
+def test_feed_cursor_is_newest_item():
+    assert feed_cursor([item("b", 9), item("c", 10), item("x")]) == ("c", datetime(2025, 3, 3, 8))
+    assert feed_cursor([item("b"), item("a")]) == ("b", None)
+    assert feed_cursor([]) == (None, None)
+
+def test_cursor_round_trip_finds_nothing_new():
+    items = [item("b", 9), item("c", 10), item("a", 8)]
+    guid, published_at = feed_cursor(items)
+    assert new_items(items, {"last_guid": guid, "last_published_at": published_at}) == []
@@ -0,0 +1,70 @@
+import xml.etree.ElementTree as ET
+import pytest
+from datetime import datetime, timedelta, timezone
+from extractors import LxmlStreamExtractor, SoupExtractor, etree, parse_feed, sniff_encoding
+
+needs_lxml = pytest.mark.skipif(etree is None, reason="lxml is not installed")
+
+BODY = "<div class='article-body'><p>Pääministeri sanoi</p><p>Toinen <b>kappale</b>.</p></div>"
+DATE = "<meta itemprop='datePublished' content='2025-03-03T08:00:00+02:00'>"
+EXPECTED = ("Pääministeri sanoi\nToinenkappale.", "2025-03-03T08:00:00+02:00")
+
+def page(head="", body=BODY):
+    return f"<html><head>{head}{DATE}</head><body>{body}</body></html>"
+
+SAMPLES = {
+    "meta charset latin-1": (page("<meta charset='iso-8859-1'>").encode("latin-1"), None),
+    "http-equiv windows-1252": (page('<meta http-equiv="Content-Type" content="text/html; charset=windows-1252">').encode("cp1252"), None),
+    "meta charset utf-8": (page("<meta charset='utf-8'>").encode(), None),
+    "undeclared utf-8": (page().encode(), None),
+    "utf-8 byte-order mark": (b"\xef\xbb\xbf" + page().encode(), None),
+    "header charset wins": (page("<meta charset='utf-8'>").encode("latin-1"), "iso-8859-1"),
+}
+
+@needs_lxml
+@pytest.mark.parametrize("name", SAMPLES)
+def test_backends_agree_on_encodings(name):
+    data, encoding = SAMPLES[name]
+    assert SoupExtractor().extract(data, encoding) == EXPECTED
+    assert LxmlStreamExtractor().extract(data, encoding) == EXPECTED
+
+@needs_lxml
+@pytest.mark.parametrize("body", [
+    "<article><p>Varakopio</p></article><div class='article-body'><p>Oikea</p></div>",
+    "<div class='hs-article-content'>Ei kappaleita <i>lainkaan</i></div>",
+    "<div class='article-body'><script>var x = 1;</script><p>Teksti<!-- kommentti --></p></div>",
+    "<div>Ei artikkelia</div>",
+    "<div class='article-body'><p>" + "pitkä sivu " * 5000 + "</p></div>",
+])
+def test_backends_agree_on_containers(body):
+    data = page(body=body).encode()
+    assert LxmlStreamExtractor().extract(data) == SoupExtractor().extract(data)
+
+def test_sniff_encoding():
+    assert sniff_encoding(b"<meta charset='ISO-8859-1'>") == "ISO-8859-1"
+    assert sniff_encoding(b'<meta http-equiv="Content-Type" content="text/html; charset=windows-1252">') == "windows-1252"
+    assert sniff_encoding(b"<meta charset=no-such-codec>") == "utf-8"
+    assert sniff_encoding(b"<html>") == "utf-8"
+    assert sniff_encoding(b"\xef\xbb\xbf<html>") is None
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/"><channel>
+<item><title> Pääuutinen </title><link> https://www.hs.fi/a/1 </link><guid>hs-1</guid>
+  <pubDate>Mon, 03 Mar 2025 08:00:00 +0200</pubDate><dc:creator>Maija Meikäläinen</dc:creator></item>
+<item><link>https://www.hs.fi/a/2</link><pubDate>maanantaina</pubDate></item>
+<item><title>Ei linkkiä</title></item>
+</channel></rss>""".encode("utf-8")
+
+def test_parse_feed():
+    first, second, third = parse_feed(FEED)
+    assert first == {"title": "Pääuutinen", "link": "https://www.hs.fi/a/1", "guid": "hs-1",
+                     "published_at": datetime(2025, 3, 3, 8, tzinfo=timezone(timedelta(hours=2))),
+                     "author": "Maija Meikäläinen"}
+    # Missing titles become "", guids fall back to the link, unparseable dates to None
+    assert second == {"title": "", "link": "https://www.hs.fi/a/2", "guid": "https://www.hs.fi/a/2",
+                      "published_at": None, "author": "Tuntematon"}
+    assert third["link"] is None and third["guid"] is None
+
+def test_parse_feed_rejects_malformed_xml():
+    with pytest.raises(ET.ParseError):
+        parse_feed(b"<rss><channel><item>")
@@ -0,0 +1,17 @@
+from feed_cache import body_hash, conditional_headers
+
+def entry(**fields):
+    return {"etag": None, "last_modified": None, "body_hash": None, "last_guid": None, "last_published_at": None, **fields}
+
+def test_conditional_headers():
+    assert conditional_headers(None) == {}
+    assert conditional_headers(entry()) == {}
+    assert conditional_headers(entry(etag='"abc"')) == {"If-None-Match": '"abc"'}
+    assert conditional_headers(entry(etag='W/"abc"', last_modified="Mon, 03 Mar 2025 08:00:00 GMT")) == {
+        "If-None-Match": 'W/"abc"', "If-Modified-Since": "Mon, 03 Mar 2025 08:00:00 GMT"}
+
+def test_body_hash_detects_any_change():
+    feed = b"<rss><channel><item><guid>1</guid></item></channel></rss>"
+    assert body_hash(feed) == body_hash(bytes(feed))
+    assert body_hash(feed) != body_hash(feed.replace(b"1", b"2"))
+    assert len(body_hash(b"")) == 64
@@ -0,0 +1,56 @@
+import asyncio
+import time
+import httpx
+from fetcher import Fetcher, TokenBucket
+
+def test_token_bucket_allows_burst_then_rate():
+    async def run():
+        bucket = TokenBucket(rate=50, capacity=5)
+        started = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        burst = time.monotonic() - started
+        for _ in range(10):
+            await bucket.acquire()
+        return burst, time.monotonic() - started
+    burst, total = asyncio.run(run())
+    assert burst < 0.05
+    assert 0.18 <= total < 1.0  # 10 more tokens at 50/s
+
+def test_token_bucket_default_capacity():
+    assert TokenBucket(0.5).capacity == 1
+    assert TokenBucket(3.7).capacity == 3
+
+def fetch(handler, url="https://example.test/rss", **options):
+    async def run():
+        fetcher = Fetcher(backoff=0.001, **options)
+        await fetcher.client.aclose()
+        fetcher.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with fetcher:
+            return await fetcher.get(url)
+    return asyncio.run(run())
+
+def test_get_retries_transient_errors():
+    calls = []
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("refused")
+        return httpx.Response(503 if len(calls) == 2 else 200, text="ok")
+    response = fetch(handler)
+    assert response.status_code == 200 and len(calls) == 3
+
+def test_get_gives_up_after_retries():
+    calls = []
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(502)
+    assert fetch(handler, retries=2) is None
+    assert len(calls) == 3
+
+def test_get_does_not_retry_client_errors():
+    calls = []
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+    assert fetch(handler).status_code == 404 and len(calls) == 1
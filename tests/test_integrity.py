@@ -0,0 +1,70 @@
+import hashlib
+import pytest
+from integrity import FileAnchor, article_hash, leaf_node, merkle_tree, rewrite_hash, verify_inclusion
+
+def content_hashes(size):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(size)]
+
+def build(hashes):
+    root, proofs = merkle_tree([leaf_node(h) for h in hashes])
+    return root.hex(), [[sibling.hex() for sibling in proof] for proof in proofs]
+
+@pytest.mark.parametrize("size", [*range(1, 71), 1000])
+def test_every_proof_verifies(size):
+    hashes = content_hashes(size)
+    root, proofs = build(hashes)
+    for index, content_hash in enumerate(hashes):
+        assert verify_inclusion(content_hash, index, size, proofs[index], root)
+
+def test_single_leaf_root_is_the_leaf():
+    [content_hash] = content_hashes(1)
+    root, proofs = build([content_hash])
+    assert root == leaf_node(content_hash).hex() and proofs == [[]]
+
+@pytest.mark.parametrize("size", [2, 7, 64, 69])
+def test_tampering_is_rejected(size):
+    hashes = content_hashes(size)
+    root, proofs = build(hashes)
+    index = size // 2
+    tampered = hashlib.sha256(b"tampered").hexdigest()
+    assert not verify_inclusion(tampered, index, size, proofs[index], root)
+    assert not verify_inclusion(hashes[index], (index + 1) % size, size, proofs[index], root)
+    # The size is bound by the anchored leaf count; a size giving the leaf a different path must fail
+    assert not verify_inclusion(hashes[index], index, size * 2, proofs[index], root)
+    assert not verify_inclusion(hashes[index], size, size, proofs[index], root)
+    assert not verify_inclusion(hashes[index], index, size, proofs[index] + [tampered], root)
+    if proofs[index]:
+        assert not verify_inclusion(hashes[index], index, size, [tampered] + proofs[index][1:], root)
+        assert not verify_inclusion(hashes[index], index, size, proofs[index][:-1], root)
+
+def test_leaf_cannot_pose_as_inner_node():
+    hashes = content_hashes(4)
+    root, _ = build(hashes)
+    left, _ = build(hashes[:2])
+    right, _ = build(hashes[2:])
+    # An inner node presented as a one-leaf proof must not verify, thanks to the leaf/node prefixes
+    assert not verify_inclusion(left, 0, 2, [right], root)
+
+def test_canonical_hash_ignores_line_endings_and_unicode_form():
+    composed = "Pääministeri\nsanoi"
+    decomposed = "Pääministeri\r\nsanoi  "
+    assert article_hash(1, "u", "T", None, None, composed) == article_hash(1, "u", "T", None, None, decomposed)
+    assert rewrite_hash(1, composed, "m") == rewrite_hash(1, decomposed, "m")
+    assert rewrite_hash(1, composed, "m") != rewrite_hash(1, composed + ".", "m")
+    assert rewrite_hash(1, composed, "m") != rewrite_hash(2, composed, "m")
+
+def test_file_anchor_round_trip(tmp_path):
+    anchor = FileAnchor(tmp_path / "anchors.jsonl")
+    first = anchor.anchor(1, "aa" * 32, 3)
+    second = anchor.anchor(2, "bb" * 32, 5)
+    assert anchor.verify(first, "aa" * 32) and anchor.verify(second, "bb" * 32)
+    assert not anchor.verify(first, "bb" * 32)
+    assert not anchor.verify("0:" + "0" * 64, "aa" * 32)
+
+def test_file_anchor_detects_edited_file(tmp_path):
+    path = tmp_path / "anchors.jsonl"
+    anchor = FileAnchor(path)
+    ref = anchor.anchor(1, "aa" * 32, 3)
+    path.write_bytes(path.read_bytes().replace(b'"leaves": 3', b'"leaves": 4'))
+    assert not anchor.verify(ref, "aa" * 32)
+    assert not FileAnchor(tmp_path / "missing.jsonl").verify(ref, "aa" * 32)
@@ -0,0 +1,16 @@
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from main import decode_cursor, encode_cursor
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 3, 3, 8, 0, 0, 123456)
+    cursor = encode_cursor(created_at, 42)
+    assert decode_cursor(cursor) == (created_at, 42)
+    assert "/" not in cursor and "+" not in cursor  # safe in a query string
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "bm9waXBl", "MjAyNS0wMy0wM3x4", "w6Q="])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,33 @@
+import random
+from near_dup import BANDS, DUPLICATE_THRESHOLD, NUM_PERM, lsh_buckets, minhash, shingles, similarity
+
+random.seed(7)
+WORDS = [f"sana{i}" for i in range(2000)]
+STORY = " ".join(random.choice(WORDS) for _ in range(400))
+OTHER = " ".join(random.choice(WORDS) for _ in range(400))
+
+def edit(text, every):
+    """Replaces every `every`-th word, a light copy edit."""
+    return " ".join("muokattu" if i % every == 0 else word for i, word in enumerate(text.split()))
+
+def test_signature_is_deterministic():
+    signature = minhash(STORY)
+    assert len(signature) == NUM_PERM and signature == minhash(STORY)
+    assert minhash(STORY.upper()) == signature  # shingles are case-insensitive
+    assert minhash("") is None and minhash("!!") is None
+
+def test_short_texts_use_single_words():
+    assert len(shingles("kaksi sanaa")) == 2
+    assert len(shingles("yksi kaksi kolme neljä")) == 2
+
+def test_similarity_separates_copies_from_other_stories():
+    assert similarity(minhash(STORY), minhash(STORY)) == 1.0
+    assert similarity(minhash(STORY), minhash(edit(STORY, 40))) >= DUPLICATE_THRESHOLD
+    assert similarity(minhash(STORY), minhash(OTHER)) < 0.2
+
+def test_lsh_buckets_shared_by_near_copies_only():
+    buckets = set(lsh_buckets(minhash(STORY)))
+    assert len(buckets) == BANDS
+    assert all(-(1 << 63) <= bucket < (1 << 63) for _, bucket in buckets)  # fits a bigint
+    assert buckets & set(lsh_buckets(minhash(edit(STORY, 40))))
+    assert not buckets & set(lsh_buckets(minhash(OTHER)))
@@ -0,0 +1,26 @@
+import unicodedata
+from rewrite_cache import cache_key, normalize_content
+
+PROMPT = "Kirjoita uudelleen: {article_text}"
+SETTINGS = {"chunk_tokens": 1200, "output_ratio": 1.3}
+
+def key(text="Pääministeri sanoi.\nToinen kappale.", prompt=PROMPT, model="gpt-4o", temperature=0.3, settings=SETTINGS):
+    return cache_key(text, prompt, model, temperature, settings=settings)
+
+def test_normalize_content():
+    assert normalize_content("  Pääministeri \r\n\n sanoi\t ") == "Pääministeri sanoi"
+    assert normalize_content(None) == ""
+
+def test_key_ignores_whitespace_and_unicode_form():
+    decomposed = unicodedata.normalize("NFD", "  Pääministeri  sanoi.\r\n\nToinen kappale. ")
+    assert key("Pääministeri sanoi.\nToinen kappale.") == key(decomposed)
+
+def test_key_changes_with_request_settings():
+    base = key()
+    variants = [key(text="Pääministeri sanoi!"), key(prompt=PROMPT + "."), key(model="gpt-4o-mini"),
+                key(temperature=0.7), key(settings={**SETTINGS, "chunk_tokens": 800}), key(settings=None)]
+    assert len({base, *variants}) == len(variants) + 1
+
+def test_key_is_stable_hex():
+    assert key() == key(settings=dict(reversed(list(SETTINGS.items()))))
+    assert len(key()) == 64 and int(key(), 16) >= 0
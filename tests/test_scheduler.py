@@ -0,0 +1,63 @@
+import pytest
+import scheduler
+from scheduler import FeedSchedule
+
+FEED = {"url": "https://example.test/rss", "poll_interval": 300, "min_poll_interval": 120, "max_poll_interval": 3600}
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(scheduler, "POLL_JITTER", 0)
+
+def test_interval_is_clamped():
+    schedule = FeedSchedule({**FEED, "poll_interval": 10})
+    assert schedule.interval == 120
+    assert schedule.clamp(10 ** 6) == 3600
+    assert FeedSchedule({"url": "u", "poll_interval": 600}).clamp(5) == 600  # no bounds: fixed interval
+
+def test_first_poll_does_not_set_rate():
+    schedule = FeedSchedule(FEED)
+    schedule.record(50, started=1000.0)
+    assert schedule.rate is None and schedule.interval == 300
+
+def test_interval_follows_rate():
+    schedule = FeedSchedule(FEED)
+    schedule.record(0, started=0.0)
+    schedule.record(4, started=600.0)  # 4 items in 10 minutes: 2 items every 5 minutes
+    assert schedule.interval == pytest.approx(scheduler.POLL_TARGET_ITEMS / (4 / 600))
+    schedule.record(40, started=660.0)  # a burst raises the rate immediately
+    assert schedule.interval == 120
+
+def test_quiet_feed_backs_off_to_max():
+    schedule = FeedSchedule(FEED)
+    schedule.record(0, started=0.0)
+    schedule.record(0, started=300.0)
+    assert schedule.rate == 0 and schedule.interval == 3600
+
+def test_rate_decays_gradually():
+    schedule = FeedSchedule(FEED)
+    schedule.record(0, started=0.0)
+    schedule.record(10, started=100.0)
+    schedule.record(0, started=200.0)
+    assert schedule.rate == pytest.approx((1 - scheduler.POLL_RATE_ALPHA) * 0.1)
+
+def test_failures_back_off_exponentially_up_to_max():
+    schedule = FeedSchedule(FEED)
+    delays = []
+    for _ in range(6):
+        schedule.record(None, started=0.0)
+        delays.append(schedule.delay())
+    assert delays == [600, 1200, 2400, 3600, 3600, 3600]
+    schedule.record(1, started=10.0)
+    assert schedule.failures == 0 and schedule.delay() == 300
+
+def test_jitter_stays_in_bounds(monkeypatch):
+    monkeypatch.setattr(scheduler, "POLL_JITTER", 0.1)
+    schedule = FeedSchedule(FEED)
+    assert all(270 <= schedule.delay() <= 330 for _ in range(200))
+
+def test_stale_after_twice_the_longest_interval():
+    schedule = FeedSchedule(FEED)
+    schedule.last_success = 1000.0
+    limit = 2 * 3600 + scheduler.SHUTDOWN_GRACE_SECONDS
+    assert not schedule.stale(1000.0 + limit)
+    assert schedule.stale(1000.0 + limit + 1)
@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from ai_rewriter import complete_rewrites, rewrite_article_async
+from database import db_connection
+from llm_client import LLMClient
+import job_queue
+import metrics
+import rewrite_cache
+
+IDLE_SECONDS = float(os.getenv("REWRITE_WORKER_IDLE_SECONDS", "5"))
+# Finished rewrites are written in batches: one transaction per FLUSH_BATCH results or FLUSH_SECONDS
+FLUSH_BATCH = int(os.getenv("REWRITE_FLUSH_BATCH", "20"))
+FLUSH_SECONDS = float(os.getenv("REWRITE_FLUSH_SECONDS", "2"))
+# A resident worker re-applies the rewrite cache's age and size limits this often
+CACHE_EVICT_SECONDS = float(os.getenv("REWRITE_CACHE_EVICT_SECONDS", "600"))
+
+stopping = False
+
+def request_stop(signum, frame):
+    global stopping
+    stopping = True
+
+def flush_rewrites(results):
+    """Stores a batch of finished rewrites and completes their jobs in a single transaction."""
+    with metrics.timed("status_update"), db_connection() as conn:
+        complete_rewrites(conn, [(article_id, completion) for _, article_id, completion in results])
+        job_queue.complete(conn, [job_id for job_id, _, _ in results])
+    metrics.count("status_update", "completed", len(results))
+    logging.info(f"✅ Saved {len(results)} rewritten articles and marked them 'completed'.")
+    print(f"✅ Saved {len(results)} rewritten articles and marked them 'completed'.")
+
+def fail_job(job_id, error):
+    with db_connection() as conn:
+        status = job_queue.fail(conn, job_id, error)
+    metrics.count("rewrite_job", status)
+    return status
+
+def evict_cache():
+    with db_connection() as conn:
+        return rewrite_cache.evict(conn)
+
+async def evict():
+    """Runs one rewrite cache eviction; a failure is logged and retried at the next interval."""
+    try:
+        evicted = await asyncio.to_thread(evict_cache)
+        logging.info(f"🧹 Evicted {evicted} rewrite cache entries")
+    except Exception as e:
+        logging.error(f"❌ Rewrite cache eviction failed: {e}")
+
+def claim_jobs(worker_id, limit):
+    with metrics.timed("job_claim"), db_connection() as conn:
+        job_queue.reap_expired(conn)
+        return job_queue.claim(conn, worker_id, limit)
+
+async def process_job(llm, job):
+    """Rewrites one claimed article on the shared client; returns (job_id, article_id, completion), or None on failure."""
+    job_id, article_id, attempt, content = job
+    try:
+        completion = await rewrite_article_async(article_id, content, llm)
+        if not completion or completion.text == "":
+            raise RuntimeError(f"AI returned empty content for article {article_id}")
+        return job_id, article_id, completion
+    except Exception as e:
+        status = await asyncio.to_thread(fail_job, job_id, e)
+        logging.warning(f"⚠️ Job {job_id} for article {article_id} failed on attempt {attempt}: {e} -> {status}")
+        print(f"⚠️ Job {job_id} for article {article_id} failed on attempt {attempt}: {e} -> {status}")
+        return None
+
+async def flush(results):
+    """Writes buffered results; on a database error their leases expire and the jobs are retried (from the rewrite cache)."""
+    try:
+        await asyncio.to_thread(flush_rewrites, results)
+        return len(results)
+    except Exception as e:
+        logging.error(f"❌ Failed to save {len(results)} rewrites: {e}")
+        print(f"❌ Failed to save {len(results)} rewrites: {e}")
+        return 0
+
+async def run_worker_async(worker_id=None, drain=False, llm=None):
+    """Keeps up to the client's concurrency cap of jobs in flight until stopped (or, with drain=True, until the queue is empty)."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    own_llm = llm is None
+    llm = llm or LLMClient()
+    in_flight = set()
+    results = []
+    buffered_at = None  # when the oldest unflushed result arrived
+    processed = 0
+    evicted_at = None
+    logging.info(f"🔹 Rewrite worker {worker_id} started (concurrency {llm.concurrency})")
+
+    try:
+        while not stopping or in_flight:
+            if rewrite_cache.MODE != "off" and (evicted_at is None or time.monotonic() - evicted_at >= CACHE_EVICT_SECONDS):
+                await evict()
+                evicted_at = time.monotonic()
+            jobs = []
+            if not stopping and len(in_flight) < llm.concurrency:
+                jobs = await asyncio.to_thread(claim_jobs, worker_id, llm.concurrency - len(in_flight))
+                in_flight.update(asyncio.create_task(process_job(llm, job)) for job in jobs)
+            if not in_flight:
+                if drain:
+                    break
+                await asyncio.sleep(IDLE_SECONDS)
+                continue
+            if not jobs or len(in_flight) >= llm.concurrency:
+                # Wake up when the oldest buffered result is due, not only when another model call ends
+                timeout = max(0, buffered_at + FLUSH_SECONDS - time.monotonic()) if results else None
+                done, in_flight = await asyncio.wait(in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                finished = [task.result() for task in done if task.result()]
+                if finished and not results:
+                    buffered_at = time.monotonic()
+                results.extend(finished)
+            if results and (len(results) >= FLUSH_BATCH or not in_flight or time.monotonic() - buffered_at >= FLUSH_SECONDS):
+                processed += await flush(results)
+                results = []
+    finally:
+        if results:
+            processed += await flush(results)
+        if own_llm:
+            await llm.close()
+
+    logging.info(f"✅ Rewrite worker {worker_id} stopped after {processed} jobs ({llm.stats}, cache {rewrite_cache.stats})")
+    return processed
+
+def run_worker(worker_id=None, drain=False):
+    """Claims and processes rewrite jobs until stopped; with drain=True, returns once the queue is empty."""
+    return asyncio.run(run_worker_async(worker_id, drain))
+
+def worker_process(index=0):
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    metrics.serve(metrics.WORKER_METRICS_PORT + index)  # one scrape target per worker process
+    run_worker()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Run rewrite queue workers.")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes on this host")
+    parser.add_argument("--requeue-dead", action="store_true", help="move dead-lettered jobs back to the queue and exit")
+    parser.add_argument("--cache-stats", action="store_true", help="evict expired rewrite cache entries, print cache stats and exit")
+    args = parser.parse_args()
+
+    if args.requeue_dead:
+        with db_connection() as conn:
+            print(f"✅ Requeued {job_queue.requeue_dead(conn)} dead jobs.")
+    elif args.cache_stats:
+        with db_connection() as conn:
+            print(f"🧹 Evicted {rewrite_cache.evict(conn)} rewrite cache entries.")
+            print(f"📊 Rewrite cache: {rewrite_cache.cache_stats(conn)}")
+    else:
+        processes = [multiprocessing.Process(target=worker_process, args=(index,)) for index in range(args.processes)]
+        for process in processes:
+            process.start()
+        signal.signal(signal.SIGTERM, lambda signum, frame: [p.terminate() for p in processes])
+        for process in processes:
+            process.join()